@@ -1,6 +1,10 @@
+import json
+import asyncio
+
 import websockets
 
-from ..mtypes import Cosmic
+from ..mtypes import Cosmic, console
+from ..protocol import subscribe_message
 from ..config import ClientConfig as Config
 
 
@@ -20,13 +24,37 @@ class Handler:
             print(e)
 
 
+async def subscribe(level: str):
+    """告诉服务端本连接需要的结果级别，full 为旧版行为，无需发送"""
+    if level == "full" or Cosmic.websocket is None:
+        return
+    await Cosmic.websocket.send(json.dumps(subscribe_message(level)))
+
+
+def show_status(message: dict):
+    """显示服务端的状态消息"""
+    status = message.get("status")
+    if status == "warming_up":
+        console.print("[yellow]服务端模型载入中，录音会在载入完成后识别")
+    elif status == "ready":
+        console.print("[green]服务端模型载入完成")
+    elif status == "rejected":
+        console.print("[red]服务端尚未就绪且缓存已满，本段录音未被识别")
+    elif status == "failed":
+        console.print("[red]服务端识别中途丢失了本段的结果，请重新识别")
+
+
 async def check_websocket() -> bool:
     if Cosmic.websocket and not Cosmic.websocket.closed:
         return True
-    for _ in range(3):
+    for i in range(Config.connect_retries):
+        if i:
+            await asyncio.sleep(Config.connect_retry_delay)
         with Handler():
             Cosmic.websocket = await websockets.connect(
-                f"ws://{Config.addr}:{Config.port}", max_size=None
+                f"ws://{Config.addr}:{Config.port}",
+                subprotocols=[websockets.Subprotocol("binary")],
+                max_size=None,
             )
             return True
     else:
@@ -2,9 +2,10 @@ import json
 
 import websockets
 
-from .ws_check import check_websocket
+from .ws_check import check_websocket, subscribe, show_status
 from ..config import ClientConfig as Config
 from ..mtypes import Cosmic, console
+from ..protocol import ResultAssembler, TRACE
 from ..utils import (
     hot_sub,
     rename_audio_file,
@@ -18,26 +19,35 @@ async def ws_recv():
     if not await check_websocket():
         return
     console.print("[green]连接成功\n")
+    assembler = ResultAssembler()
     try:
+        await subscribe(Config.mic_result_level)
         while True and Cosmic.websocket is not None:
-            # 接收消息
+            # 接收消息，增量消息拼接为完整结果
             message = await Cosmic.websocket.recv()
-            message = json.loads(message)
-            text = message["text"]
-            delay = message["time_complete"] - message["time_submit"]
-
-            # 如果非最终结果，继续等待
+            message = assembler.feed(json.loads(message))
+            if message.get("type") == "status":
+                show_status(message)
+                continue
+            # 如果非最终结果，继续等待；progress 级别的中间消息不带文字
             if not message["is_final"]:
                 continue
+            text = message["text"]
+            delay = message["time_complete"] - message["time_submit"]
+            task_id = message["task_id"]
+            TRACE.end(task_id, "wait")
 
-            # 消除末尾标点
-            text = strip_punc(text)
+            with TRACE.span(task_id, "postprocess"):
+                # 消除末尾标点
+                text = strip_punc(text)
 
-            # 热词替换
-            text = hot_sub(text)
+                # 热词替换
+                text = hot_sub(text)
 
             # 打字
-            await type_result(text)
+            with TRACE.span(task_id, "type"):
+                await type_result(text)
+            TRACE.flush(task_id, message.get("spans"))
 
             if Config.save_audio:
                 # 重命名录音文件
@@ -1,6 +1,14 @@
 class ClientConfig:
     addr = "127.0.0.1"  # Server 地址
     port = "6016"  # Server 端口
+    binary_frame = True  # 以二进制帧发送音频（v2 协议），旧版服务端请改为 False
+    connect_retries = 10  # 连接服务端的尝试次数
+    connect_retry_delay = 1.0  # 每次重试前等待的秒数
+    int16_audio = False  # 二进制帧中以 int16 传输音频，流量减半
+    mic_result_level = "final"  # 听写订阅的结果级别：full、final、progress、text 等
+    file_result_level = "progress"  # 转录文件订阅的结果级别，旧版服务端请都改为 "full"
+    trace_path = ""  # 逐阶段追踪写入的 JSONL 文件，如 "logs/trace.jsonl"，留空不追踪
+    file_model = ""  # 转录文件的识别模型，即服务端的 [models.<名称>]，留空用默认
 
     shortcut = "caps lock"  # 控制录音的快捷键，默认是 CapsLock
     hold_mode = True  # 长按模式，按下录音，松开停止，像对讲机一样用。
@@ -0,0 +1,3 @@
+from .loadgen import LoadSettings, load_audio, summarize, run_stage, run_curve
+
+__all__ = ["LoadSettings", "load_audio", "summarize", "run_stage", "run_curve"]
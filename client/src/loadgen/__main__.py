@@ -0,0 +1,107 @@
+"""
+并发压测客户端：以不同并发数连接服务端，测出最终结果延迟随并发数变化的曲线，
+用来确定服务端 [pool] 的识别进程数
+
+每个模拟用户循环执行：发送一段音频、等待最终结果、按指数分布停顿 think 秒。
+延迟从发出最后一帧算到收到最终结果。mic 模式按实时速度发送，file 模式尽快发送。
+在 client 目录下运行：
+    python -m src.loadgen --concurrency 1 2 4 8 --duration 30
+    python -m src.loadgen a.wav b.wav --mode file --churn 5 --output curve.json
+"""
+
+import json
+import asyncio
+from pathlib import Path
+from typing import List, Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from ..config import ClientConfig as Config
+from .loadgen import LoadSettings, load_audio, run_curve
+
+console = Console(highlight=False)
+
+COLUMNS = [
+    ("并发", "concurrency"),
+    ("任务", "utterances"),
+    ("错误", "errors"),
+    ("任务/s", "utterances_per_s"),
+    ("音频秒/s", "audio_seconds_per_s"),
+    ("p50 ms", "latency_p50_ms"),
+    ("p95 ms", "latency_p95_ms"),
+    ("p99 ms", "latency_p99_ms"),
+    ("max ms", "latency_max_ms"),
+]
+
+
+def show_curve(curve: List[dict]):
+    table = Table(title="延迟-并发曲线")
+    for title, _ in COLUMNS:
+        table.add_column(title, justify="right")
+    for report in curve:
+        table.add_row(*(str(report.get(key, "-")) for _, key in COLUMNS))
+    console.print(table)
+
+
+def main(
+    files: Optional[List[Path]] = typer.Argument(
+        None, help="回放的 WAV 文件，不给则用合成音频"
+    ),
+    concurrency: List[int] = typer.Option([1, 2, 4, 8], help="依次测试的并发数"),
+    duration: float = typer.Option(30.0, help="每个并发数持续的秒数"),
+    mode: str = typer.Option("mic", help="mic 按实时速度发送，file 尽快发送"),
+    seconds: float = typer.Option(5.0, help="合成音频的秒数"),
+    think: float = typer.Option(1.0, help="任务之间的平均停顿秒数"),
+    churn: int = typer.Option(0, help="每个连接完成多少个任务后重连，0 为不重连"),
+    chunk: float = typer.Option(0.05, help="mic 模式每条消息的秒数"),
+    level: str = typer.Option(Config.mic_result_level, help="订阅的结果级别"),
+    timeout: float = typer.Option(60.0, help="等待最终结果的上限秒数"),
+    seed: int = typer.Option(0, help="停顿与选取音频的随机种子"),
+    addr: str = typer.Option(Config.addr),
+    port: str = typer.Option(Config.port),
+    output: Optional[Path] = typer.Option(None, help="把曲线写入该 JSON 文件"),
+):
+    if mode not in ("mic", "file"):
+        raise typer.BadParameter("mode 只能是 mic 或 file")
+    if mode == "mic":
+        seg_duration, seg_overlap = Config.mic_seg_duration, Config.mic_seg_overlap
+    else:
+        seg_duration, seg_overlap = Config.file_seg_duration, Config.file_seg_overlap
+    settings = LoadSettings(
+        addr=addr,
+        port=port,
+        mode=mode,
+        duration=duration,
+        think=think,
+        churn=churn,
+        chunk=chunk,
+        seg_duration=seg_duration,
+        seg_overlap=seg_overlap,
+        level=level,
+        timeout=timeout,
+        seed=seed,
+    )
+    clips = load_audio(files or [], seconds)
+
+    def on_stage(report: dict):
+        p50 = report.get("latency_p50_ms", "-")
+        console.print(
+            f"并发 {report['concurrency']}：{report['utterances']} 个任务，"
+            f"{report['errors']} 个错误，p50 {p50} ms"
+        )
+
+    curve = asyncio.run(run_curve(concurrency, clips, settings, on_stage))
+    show_curve(curve)
+    result = {
+        "settings": {**vars(settings), "files": [str(f) for f in files or []]},
+        "curve": curve,
+    }
+    if output:
+        output.write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n")
+        console.print(f"曲线已写入 {output}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,272 @@
+import json
+import time
+import uuid
+import wave
+import random
+import asyncio
+import statistics
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import websockets
+
+from ..config import ClientConfig as Config
+from ..protocol import encode_message, subscribe_message, ResultAssembler
+
+__all__ = ["LoadSettings", "load_audio", "summarize", "run_stage", "run_curve"]
+
+SAMPLERATE = 16000
+
+
+class LoadSettings:
+    """一轮压测的参数"""
+
+    def __init__(
+        self,
+        addr: str = Config.addr,
+        port: str = Config.port,
+        mode: str = "mic",
+        duration: float = 30.0,
+        think: float = 1.0,
+        churn: int = 0,
+        chunk: float = 0.05,
+        seg_duration: float = Config.mic_seg_duration,
+        seg_overlap: float = Config.mic_seg_overlap,
+        binary: bool = Config.binary_frame,
+        int16: bool = Config.int16_audio,
+        level: str = "final",
+        timeout: float = 60.0,
+        seed: int = 0,
+    ):
+        self.addr = addr
+        self.port = port
+        self.mode = mode  # mic：按实时速度送音频；file：尽快送出
+        self.duration = duration  # 每轮持续的秒数，之后不再开始新的任务
+        self.think = think  # 两个任务之间的平均间隔（指数分布）
+        self.churn = churn  # 每个连接完成多少个任务后断开重连，0 为不重连
+        self.chunk = chunk  # mic 模式每条消息的秒数
+        self.seg_duration = seg_duration
+        self.seg_overlap = seg_overlap
+        self.binary = binary  # 二进制帧（v2 协议），旧版服务端改为 False
+        self.int16 = int16
+        self.level = level  # 订阅的结果级别，旧版服务端改为 "full"
+        self.timeout = timeout  # 等待最终结果的上限
+        self.seed = seed
+
+
+def load_audio(paths: List[Path], seconds: float = 5.0) -> List[np.ndarray]:
+    """读取 16 bit PCM 的 WAV 文件，转为 16000 采样率单声道；没有文件时生成合成音频"""
+    if not paths:
+        rng = np.random.default_rng(0)
+        return [rng.normal(0, 0.01, int(SAMPLERATE * seconds)).astype(np.float32)]
+    clips = []
+    for path in paths:
+        with wave.open(str(path), "rb") as f:
+            if f.getsampwidth() != 2:
+                raise ValueError(f"只支持 16 bit PCM 的 WAV：{path}")
+            frames = f.readframes(f.getnframes())
+            channels, rate = f.getnchannels(), f.getframerate()
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+        samples = samples.reshape(-1, channels).mean(axis=1)
+        if rate != SAMPLERATE:
+            positions = np.arange(0, len(samples), rate / SAMPLERATE)
+            samples = np.interp(positions, np.arange(len(samples)), samples)
+        clips.append(samples.astype(np.float32))
+    return clips
+
+
+def _messages(task_id: str, samples: np.ndarray, settings: LoadSettings):
+    """按客户端 send_audio / transcribe_send 的格式切分一段音频"""
+    seconds = settings.chunk if settings.mode == "mic" else 60
+    step = int(SAMPLERATE * seconds)
+    time_start = time.time()
+    for offset in range(0, len(samples), step):
+        data = samples[offset : offset + step]
+        yield {
+            "task_id": task_id,
+            "seg_duration": settings.seg_duration,
+            "seg_overlap": settings.seg_overlap,
+            "is_final": settings.mode == "file" and offset + step >= len(samples),
+            "time_start": time_start,
+            "time_frame": time.time(),
+            "source": settings.mode,
+            "offset": offset,
+            "data": data.tobytes(),
+        }
+    if settings.mode == "mic":
+        # 松开按键后发一条空的结束消息
+        yield {
+            "task_id": task_id,
+            "seg_duration": settings.seg_duration,
+            "seg_overlap": settings.seg_overlap,
+            "is_final": True,
+            "time_start": time_start,
+            "time_frame": time.time(),
+            "source": "mic",
+            "offset": len(samples),
+            "data": b"",
+        }
+
+
+class _Connection:
+    """一个模拟用户的连接：接收协程把最终结果交给等待中的任务"""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.waiting: dict[str, asyncio.Future] = {}
+        self.assembler = ResultAssembler()
+        self.receiver = asyncio.create_task(self._receive())
+
+    async def _receive(self):
+        try:
+            async for raw in self.websocket:
+                message = json.loads(raw)
+                future = self.waiting.get(message.get("task_id"))
+                if future is None or future.done():
+                    continue
+                try:
+                    message = self.assembler.feed(message)
+                except ValueError as e:
+                    future.set_exception(e)
+                    continue
+                if message.get("status") in ("rejected", "failed"):
+                    future.set_exception(RuntimeError(message["status"]))
+                elif message.get("is_final"):
+                    future.set_result(time.perf_counter())
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("连接断开"))
+
+    async def close(self):
+        await self.websocket.close()
+        await asyncio.gather(self.receiver, return_exceptions=True)
+
+
+async def _connect(settings: LoadSettings) -> _Connection:
+    subprotocols = [websockets.Subprotocol("binary")] if settings.binary else None
+    websocket = await websockets.connect(
+        f"ws://{settings.addr}:{settings.port}",
+        subprotocols=subprotocols,
+        max_size=None,
+    )
+    if settings.level != "full":
+        await websocket.send(json.dumps(subscribe_message(settings.level)))
+    return _Connection(websocket)
+
+
+async def _user(index: int, clips, settings: LoadSettings, deadline: float, record):
+    """一个模拟用户：循环说话、等结果、停顿，按 churn 断开重连"""
+    rng = random.Random(settings.seed * 100003 + index)
+    connection: Optional[_Connection] = None
+    done = 0
+    # 各用户错开开始，避免所有连接同时发出第一句
+    await asyncio.sleep(rng.uniform(0, settings.think))
+    try:
+        while time.perf_counter() < deadline:
+            if connection is None:
+                try:
+                    connection = await _connect(settings)
+                except OSError as e:
+                    record["errors"].append(f"connect: {e}")
+                    await asyncio.sleep(1)
+                    continue
+                record["connections"] += 1
+
+            samples = clips[rng.randrange(len(clips))]
+            task_id = str(uuid.uuid1())
+            future = asyncio.get_running_loop().create_future()
+            connection.waiting[task_id] = future
+            try:
+                for message in _messages(task_id, samples, settings):
+                    if settings.mode == "mic" and not message["is_final"]:
+                        # 麦克风音频按实时速度产生
+                        await asyncio.sleep(settings.chunk)
+                    await connection.websocket.send(
+                        encode_message(message, settings.binary, settings.int16)
+                    )
+                sent = time.perf_counter()
+                received = await asyncio.wait_for(future, settings.timeout)
+                record["latencies"].append(received - sent)
+                record["audio_seconds"] += len(samples) / SAMPLERATE
+            except (asyncio.TimeoutError, RuntimeError, ValueError) as e:
+                record["errors"].append(f"{type(e).__name__}: {e}")
+            except (ConnectionError, websockets.ConnectionClosed) as e:
+                # 连接断开，记一次错误后重连
+                record["errors"].append(f"{type(e).__name__}: {e}")
+                await connection.close()
+                connection = None
+                continue
+            finally:
+                if connection is not None:
+                    connection.waiting.pop(task_id, None)
+
+            done += 1
+            if settings.churn and done % settings.churn == 0:
+                await connection.close()
+                connection = None
+            await asyncio.sleep(_think_time(rng, settings.think))
+    finally:
+        if connection is not None:
+            await connection.close()
+
+
+def _think_time(rng: random.Random, mean: float) -> float:
+    """两个任务之间的停顿，服从均值为 mean 的指数分布"""
+    return rng.expovariate(1 / mean) if mean > 0 else 0.0
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+async def run_stage(concurrency: int, clips, settings: LoadSettings) -> dict:
+    """以 concurrency 个并发用户压测 settings.duration 秒，返回延迟统计"""
+    record = {"latencies": [], "errors": [], "audio_seconds": 0.0, "connections": 0}
+    t = time.perf_counter()
+    deadline = t + settings.duration
+    await asyncio.gather(
+        *(_user(i, clips, settings, deadline, record) for i in range(concurrency))
+    )
+    return summarize(concurrency, record, time.perf_counter() - t)
+
+
+def summarize(concurrency: int, record: dict, elapsed: float) -> dict:
+    """把一轮的记录汇总为曲线上的一个点"""
+    latencies = record["latencies"]
+    report = {
+        "concurrency": concurrency,
+        "utterances": len(latencies),
+        "errors": len(record["errors"]),
+        "connections": record["connections"],
+        "elapsed_s": round(elapsed, 2),
+        "utterances_per_s": round(len(latencies) / elapsed, 3),
+        "audio_seconds_per_s": round(record["audio_seconds"] / elapsed, 3),
+    }
+    if latencies:
+        report.update(
+            {
+                "latency_p50_ms": round(statistics.median(latencies) * 1000, 1),
+                "latency_p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+                "latency_p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+                "latency_max_ms": round(max(latencies) * 1000, 1),
+            }
+        )
+    if record["errors"]:
+        report["error_samples"] = sorted(set(record["errors"]))[:5]
+    return report
+
+
+async def run_curve(levels: List[int], clips, settings: LoadSettings, on_stage=None):
+    """依次在各并发数下压测，得到延迟随并发数变化的曲线"""
+    curve = []
+    for concurrency in levels:
+        report = await run_stage(concurrency, clips, settings)
+        curve.append(report)
+        if on_stage is not None:
+            on_stage(report)
+    return curve
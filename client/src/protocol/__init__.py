@@ -0,0 +1,12 @@
+from .frame import pack_frame, encode_message
+from .assembler import ResultAssembler, subscribe_message
+from .trace import TraceLog, TRACE
+
+__all__ = [
+    "pack_frame",
+    "encode_message",
+    "ResultAssembler",
+    "subscribe_message",
+    "TraceLog",
+    "TRACE",
+]
@@ -0,0 +1,40 @@
+import zlib
+
+__all__ = ["LEVELS", "ResultAssembler", "subscribe_message"]
+
+# 可订阅的结果级别，需与服务端 src/net/delta.py 保持一致
+LEVELS = ("full", "final", "progress", "text", "tokens")
+
+
+def subscribe_message(level: str) -> dict:
+    """订阅结果级别的控制消息"""
+    if level not in LEVELS:
+        raise ValueError(f"Unsupported level: {level!r}")
+    return {"type": "subscribe", "level": level}
+
+
+class ResultAssembler:
+    """把服务端的增量消息拼接为完整结果；完整消息原样返回"""
+
+    def __init__(self):
+        self._tasks = {}  # task_id -> {"text", "tokens", "timestamps"}
+
+    def feed(self, message: dict) -> dict:
+        level = message.get("level")
+        if level not in ("text", "tokens"):
+            return message
+
+        state = self._tasks.setdefault(
+            message["task_id"], {"text": "", "tokens": [], "timestamps": []}
+        )
+        state["text"] = state["text"][: message["text_start"]] + message["text"]
+        if level == "tokens":
+            start = message["token_start"]
+            state["tokens"] = state["tokens"][:start] + message["tokens"]
+            state["timestamps"] = state["timestamps"][:start] + message["timestamps"]
+
+        if message["is_final"]:
+            del self._tasks[message["task_id"]]
+            if zlib.crc32(state["text"].encode("utf-8")) != message["checksum"]:
+                raise ValueError(f"结果校验失败：{message['task_id']}")
+        return {**message, **state}
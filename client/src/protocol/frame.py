@@ -0,0 +1,64 @@
+import json
+import uuid
+import base64
+import struct
+from typing import Union
+
+import numpy as np
+
+__all__ = ["pack_frame", "encode_message"]
+
+# v2 二进制帧头（小端），需与服务端 src/net/protocol.py 保持一致：
+#   magic(2s) version(B) flags(B) seg_duration(f) seg_overlap(f)
+#   time_start(d) time_frame(d) offset(Q, 本帧首个采样的序号)
+#   task_id(16s, uuid) extra_len(H)
+# 帧头之后是 extra_len 字节的 JSON 扩展字段，再之后是 PCM 数据
+HEADER = struct.Struct("<2sBBffddQ16sH")
+MAGIC = b"CW"
+VERSION = 2
+
+FLAG_FINAL = 1  # 是否结束
+FLAG_FILE = 2  # 数据来源：文件；否则为麦克风
+FLAG_INT16 = 4  # 采样格式 int16；否则为 float32
+
+
+def pack_frame(message: dict, int16: bool = False) -> bytes:
+    """把消息（data 为 float32 bytes）打包为二进制帧"""
+    data = message["data"]
+    flags = FLAG_FINAL if message["is_final"] else 0
+    if message["source"] == "file":
+        flags |= FLAG_FILE
+    if int16:
+        flags |= FLAG_INT16
+        samples = np.frombuffer(data, dtype=np.float32)
+        data = (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+
+    extra = message.get("extra")
+    extra = json.dumps(extra).encode("utf-8") if extra else b""
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        flags,
+        message["seg_duration"],
+        message["seg_overlap"],
+        message["time_start"],
+        message["time_frame"],
+        message.get("offset", 0),
+        uuid.UUID(message["task_id"]).bytes,
+        len(extra),
+    )
+    return header + extra + data
+
+
+def encode_message(
+    message: dict, binary: bool, int16: bool = False
+) -> Union[bytes, str]:
+    """按协议版本编码消息：二进制帧，或旧版的 base64 JSON"""
+    if binary:
+        return pack_frame(message, int16)
+    # 旧版 JSON 协议没有扩展字段，直接并入消息
+    extra = message.get("extra") or {}
+    message = {k: v for k, v in message.items() if k not in ("offset", "extra")}
+    message = {**extra, **message}
+    message["data"] = base64.b64encode(message["data"]).decode("utf-8")
+    return json.dumps(message)
@@ -0,0 +1,78 @@
+import json
+import time
+from pathlib import Path
+from contextlib import contextmanager
+from collections import OrderedDict
+
+from ..config import ClientConfig as Config
+
+__all__ = ["TraceLog", "TRACE"]
+
+
+class TraceLog:
+    """
+    客户端逐阶段追踪，以任务 id 为 trace id
+
+    暂存各任务的 [阶段名, 开始, 结束]，收到最终结果后连同消息里服务端的阶段
+    一起追加写入 JSONL 文件，格式与服务端 src/utils/trace.py 相同
+    """
+
+    def __init__(self, path: str = "", max_tasks: int = 64):
+        self.path = Path(path) if path else None
+        self.max_tasks = max_tasks
+        self._pending: "OrderedDict[str, list]" = OrderedDict()
+
+    @property
+    def enable(self) -> bool:
+        return self.path is not None
+
+    def begin(self, trace_id: str, name: str):
+        if not self.enable:
+            return
+        self._pending.setdefault(trace_id, []).append([name, time.time(), None])
+        while len(self._pending) > self.max_tasks:
+            self._pending.popitem(last=False)
+
+    def end(self, trace_id: str, name: str):
+        for item in reversed(self._pending.get(trace_id, [])):
+            if item[0] == name and item[2] is None:
+                item[2] = time.time()
+                return
+
+    def add(self, trace_id: str, name: str, start: float, end: float):
+        """记录一个已知起止时刻的阶段"""
+        if self.enable:
+            self.begin(trace_id, name)
+            self._pending[trace_id][-1][1:] = [start, end]
+
+    @contextmanager
+    def span(self, trace_id: str, name: str):
+        self.begin(trace_id, name)
+        try:
+            yield
+        finally:
+            self.end(trace_id, name)
+
+    def flush(self, trace_id: str, server_spans=None):
+        """写出该任务的全部阶段"""
+        spans = self._pending.pop(trace_id, [])
+        if not self.enable:
+            return
+        records = [(s, "server") for s in server_spans or []]
+        records += [(s, "client") for s in spans]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for (name, start, end), process in records:
+                if end is None:
+                    continue
+                record = {
+                    "trace_id": trace_id,
+                    "name": name,
+                    "start": start,
+                    "end": end,
+                    "process": process,
+                }
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+TRACE = TraceLog(Config.trace_path)
@@ -3,13 +3,13 @@ import sys
 import uuid
 import time
 import json
-import base64
 import subprocess
 from pathlib import Path
 
 from ..utils import srt_from_txt
 from ..mtypes import Cosmic, console
-from ..comm.ws_check import check_websocket
+from ..protocol import encode_message, ResultAssembler, TRACE
+from ..comm.ws_check import check_websocket, subscribe, show_status
 from ..config import ClientConfig as Config
 
 __all__ = ["transcribe_check", "transcribe_send", "transcribe_recv"]
@@ -20,6 +20,7 @@ async def transcribe_check(file: Path):
     if not await check_websocket():
         console.print("无法连接到服务端")
         sys.exit()
+    await subscribe(Config.file_result_level)
 
     if not file.exists():
         console.print(f"文件不存在：{file}")
@@ -79,13 +80,19 @@ async def transcribe_send(file: Path) -> None:
             "time_start": time.time(),  # 录音起始时间
             "time_frame": time.time(),  # 该帧时间
             "source": "file",  # 数据来源：从文件读的数据
-            "data": base64.b64encode(data[offset:chunk_end]).decode("utf-8"),
+            "offset": offset // 4,  # 本帧首个采样的序号
+            "data": data[offset:chunk_end],
         }
+        if Config.file_model:
+            message["extra"] = {"model": Config.file_model}  # 选用的识别模型
         offset = chunk_end
         progress = min(offset / 4 / 16000, audio_duration)
-        await websocket.send(json.dumps(message))
+        await websocket.send(
+            encode_message(message, Config.binary_frame, Config.int16_audio)
+        )
         console.print(f"    发送进度：{progress:.2f}s", end="\r")
         if is_final:
+            TRACE.begin(task_id, "wait")
             break
 
 
@@ -98,11 +105,19 @@ async def transcribe_recv(file: Path) -> None:
     # 初始化message
     message = None
 
-    # 接收结果
+    # 接收结果，增量消息拼接为完整结果
+    assembler = ResultAssembler()
     async for message in websocket:
-        message = json.loads(message)
+        message = assembler.feed(json.loads(message))
+        if message.get("type") == "status":
+            show_status(message)
+            if message.get("status") == "rejected":
+                raise RuntimeError("服务端拒绝了转录任务")
+            continue
         console.print(f"    转录进度: {message['duration']:.2f}s", end="\r")
         if message["is_final"]:
+            TRACE.end(message["task_id"], "wait")
+            TRACE.flush(message["task_id"], message.get("spans"))
             break
 
     # 检查是否收到有效消息
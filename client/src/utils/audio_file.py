@@ -1,10 +1,9 @@
 import os
 import re
+import json
 import uuid
 import time
-import json
 import shutil
-import base64
 import asyncio
 from pathlib import Path
 from typing import Union, Tuple
@@ -16,6 +15,7 @@ import websockets
 import numpy as np
 
 from ..mtypes import Cosmic, console
+from ..protocol import encode_message, TRACE
 from ..config import ClientConfig as Config
 
 __all__ = [
@@ -118,7 +118,15 @@ async def send_message(message):
             console.print("    服务端未连接，无法发送\n")
     else:
         try:
-            await Cosmic.websocket.send(json.dumps(message))
+            if message["is_final"]:
+                TRACE.begin(message["task_id"], "send")
+            await Cosmic.websocket.send(
+                encode_message(message, Config.binary_frame, Config.int16_audio)
+            )
+            if message["is_final"]:
+                # 最后一帧发出后，等待最终结果
+                TRACE.end(message["task_id"], "send")
+                TRACE.begin(message["task_id"], "wait")
         except websockets.ConnectionClosedError as _:
             if message["is_final"]:
                 console.print("[red]连接中断了")
@@ -127,6 +135,17 @@ async def send_message(message):
             print(e)
 
 
+async def send_cancel(task_id):
+    """通知服务端取消任务，丢弃已发送的音频"""
+    if Cosmic.websocket is None or Cosmic.websocket.closed:
+        return
+    try:
+        message = {"type": "cancel", "task_id": task_id}
+        await Cosmic.websocket.send(json.dumps(message))
+    except Exception as e:
+        print(e)
+
+
 async def send_audio():
     try:
         # 生成唯一任务 ID
@@ -138,6 +157,7 @@ async def send_audio():
         # 音频数据临时存放处
         cache = []
         duration = 0
+        offset = 0  # 已发送的采样数
 
         # 保存音频文件
         file_path, file = "", None
@@ -173,7 +193,8 @@ async def send_audio():
                 if Config.save_audio and file:
                     write_audio_file(file, data)
 
-                # 发送音频数据用于识别
+                # 发送音频数据用于识别，降采样到 16000 的单声道
+                samples = np.mean(data[::3], axis=1)
                 message = {
                     "task_id": task_id,  # 任务 ID
                     "seg_duration": Config.mic_seg_duration,  # 分段长度
@@ -182,10 +203,10 @@ async def send_audio():
                     "time_start": time_start,  # 录音起始时间
                     "time_frame": task["time"],  # 该帧时间
                     "source": "mic",  # 数据来源：从麦克风收到的数据
-                    "data": base64.b64encode(  # 数据
-                        np.mean(data[::3], axis=1).tobytes()
-                    ).decode("utf-8"),
+                    "offset": offset,  # 本帧首个采样的序号
+                    "data": samples.tobytes(),  # 数据
                 }
+                offset += len(samples)
                 task = asyncio.create_task(send_message(message))
             elif task["type"] == "finish":
                 # 完成写入本地文件
@@ -194,6 +215,7 @@ async def send_audio():
 
                 console.print(f"任务标识：{task_id}")
                 console.print(f"    录音时长：{duration:.2f}s")
+                TRACE.add(task_id, "record", time_start, task["time"])
 
                 # 告诉服务端音频片段结束了
                 message = {
@@ -204,9 +226,17 @@ async def send_audio():
                     "time_start": time_start,
                     "time_frame": task["time"],
                     "source": "mic",
-                    "data": "",
+                    "offset": offset,
+                    "data": b"",
                 }
                 task = asyncio.create_task(send_message(message))
                 break
+    except asyncio.CancelledError:
+        # 录音被取消，已经发出过音频的话，让服务端也停止识别
+        if Config.save_audio and file:
+            finish_audio_file(file)
+        if offset:
+            await send_cancel(task_id)
+        raise
     except Exception as e:
         print(e)
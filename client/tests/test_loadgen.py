@@ -0,0 +1,82 @@
+import wave
+import random
+
+import numpy as np
+import pytest
+
+from src.loadgen import LoadSettings, load_audio, summarize
+from src.loadgen.loadgen import _messages, _think_time
+
+
+@pytest.mark.unit
+class TestSchedule:
+    """测试压测客户端的发送节奏与停顿"""
+
+    def test_mic_messages(self):
+        settings = LoadSettings(mode="mic", chunk=0.1)
+        samples = np.zeros(16000, dtype=np.float32)
+        messages = list(_messages("t", samples, settings))
+
+        # 每块 0.1 秒，最后再发一条空的结束消息
+        assert len(messages) == 11
+        assert all(len(m["data"]) == 4 * 1600 for m in messages[:-1])
+        assert [m["is_final"] for m in messages] == [False] * 10 + [True]
+        assert messages[-1]["data"] == b"" and messages[-1]["offset"] == 16000
+
+    def test_file_messages(self):
+        settings = LoadSettings(mode="file")
+        samples = np.zeros(16000 * 70, dtype=np.float32)
+        messages = list(_messages("t", samples, settings))
+
+        # 每块 60 秒，最后一块即为结束消息
+        assert [m["offset"] for m in messages] == [0, 16000 * 60]
+        assert [m["is_final"] for m in messages] == [False, True]
+        assert len(messages[-1]["data"]) == 4 * 16000 * 10
+
+    def test_think_time(self):
+        rng = random.Random(0)
+        times = [_think_time(rng, 0.5) for _ in range(2000)]
+        assert min(times) >= 0
+        assert abs(sum(times) / len(times) - 0.5) < 0.05
+        assert _think_time(rng, 0) == 0.0
+
+    def test_load_wav(self, tmp_path):
+        path = tmp_path / "a.wav"
+        with wave.open(str(path), "wb") as f:
+            f.setnchannels(2)
+            f.setsampwidth(2)
+            f.setframerate(8000)
+            f.writeframes(np.full(8000 * 2, 16384, dtype="<i2").tobytes())
+
+        # 双声道 8000 采样率转为单声道 16000 采样率
+        (clip,) = load_audio([path])
+        assert len(clip) == 16000 and clip.dtype == np.float32
+        assert np.allclose(clip, 0.5)
+
+
+@pytest.mark.unit
+class TestSummarize:
+    """测试一轮压测的延迟统计"""
+
+    def test_percentiles_and_throughput(self):
+        record = {
+            "latencies": [i / 1000 for i in range(1, 101)],
+            "errors": ["TimeoutError: ", "TimeoutError: "],
+            "audio_seconds": 500.0,
+            "connections": 4,
+        }
+        report = summarize(4, record, 10.0)
+
+        assert report["utterances"] == 100 and report["errors"] == 2
+        assert report["utterances_per_s"] == 10.0
+        assert report["audio_seconds_per_s"] == 50.0
+        assert report["latency_p50_ms"] == 50.5
+        assert report["latency_p95_ms"] == 96.0
+        assert report["latency_p99_ms"] == 100.0
+        assert report["latency_max_ms"] == 100.0
+        assert report["error_samples"] == ["TimeoutError: "]
+
+    def test_no_results(self):
+        record = {"latencies": [], "errors": [], "audio_seconds": 0.0, "connections": 1}
+        report = summarize(1, record, 5.0)
+        assert report["utterances"] == 0 and "latency_p50_ms" not in report
@@ -0,0 +1,59 @@
+import json
+import asyncio
+
+import pytest
+import websockets
+
+# 依赖录音、键盘等桌面端的包，缺少时跳过
+ws_recv = pytest.importorskip("src.comm.ws_recv")
+
+
+class FakeWebSocket:
+    """按顺序返回给定的消息，之后按正常关闭处理"""
+
+    def __init__(self, messages):
+        self.messages = [json.dumps(m) for m in messages]
+        self.closed = False
+
+    async def send(self, message):
+        pass
+
+    async def recv(self):
+        if not self.messages:
+            raise websockets.ConnectionClosedOK(None, None)
+        return self.messages.pop(0)
+
+
+def make_result(is_final, text="你好。"):
+    return {
+        "task_id": "t",
+        "duration": 1.0,
+        "time_start": 0.0,
+        "time_submit": 0.0,
+        "time_complete": 0.5,
+        "text": text,
+        "is_final": is_final,
+    }
+
+
+@pytest.mark.unit
+class TestReceive:
+    """测试客户端接收识别结果"""
+
+    def test_progress_message(self, monkeypatch):
+        progress = make_result(False)
+        del progress["text"]
+        progress["level"] = "progress"
+        websocket = FakeWebSocket([progress, make_result(True)])
+        monkeypatch.setattr(ws_recv.Cosmic, "websocket", websocket)
+        monkeypatch.setattr(ws_recv.Config, "save_audio", False)
+        typed = []
+
+        async def type_result(text):
+            typed.append(text)
+
+        monkeypatch.setattr(ws_recv, "type_result", type_result)
+
+        # 不带文字的进度消息被跳过，之后的最终结果照常输出
+        asyncio.run(ws_recv.ws_recv())
+        assert typed == ["你好"]
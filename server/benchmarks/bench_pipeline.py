@@ -0,0 +1,283 @@
+"""
+端到端流水线基准：不需要模型，用 stub 加载器跑通 message_handler、调度队列、
+识别进程与 ws_send_service，报告吞吐、实时率与最终结果的延迟分位数
+
+stub 加载器的解码耗时与音频时长成正比（见 src/asr/stub.py），结果可复现。
+实时率为墙钟时间 / 音频秒数，mic 模式按实时速度送音频，主要看延迟；
+file 模式尽快送出，看吞吐与实时率。
+与保存的基线比较，任一指标变差超过容差时以非零状态退出。在 server 目录下运行：
+    python -m benchmarks.bench_pipeline --clients 8 --mode mic
+    python -m benchmarks.bench_pipeline --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_pipeline --baseline benchmarks/baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import tomllib
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import numpy as np
+from rich import get_console
+
+from src import main
+from src.net import ws
+from src.utils import Cosmic, console, load_config
+
+# 指标的方向：1 越大越好，-1 越小越好
+DIRECTIONS = {
+    "throughput": 1,
+    "rtf": -1,
+    "latency_p50_ms": -1,
+    "latency_p95_ms": -1,
+    "latency_p99_ms": -1,
+}
+
+
+def dump_toml(config: dict, prefix: str = "") -> str:
+    """把配置写回 TOML，只支持 config.toml 用到的标量、列表与嵌套表"""
+
+    def value(v):
+        if isinstance(v, bool):
+            return "true" if v else "false"
+        if isinstance(v, (list, tuple)):
+            return "[" + ", ".join(value(x) for x in v) + "]"
+        if isinstance(v, str):
+            return json.dumps(v, ensure_ascii=False)
+        return repr(v)
+
+    lines, tables = [], []
+    for key, v in config.items():
+        if isinstance(v, dict):
+            tables.append((key, v))
+        else:
+            lines.append(f"{key} = {value(v)}")
+    for key, table in tables:
+        name = f"{prefix}{key}"
+        lines += ["", f"[{name}]", dump_toml(table, f"{name}.")]
+    return "\n".join(lines)
+
+
+def bench_config(args) -> dict:
+    """在 config.toml 的基础上换成 stub 模型，关掉与被测路径无关的功能"""
+    with open("config.toml", "rb") as f:
+        config = tomllib.load(f)
+    config["recognize_model"] = {
+        "_type": "stub",
+        "_decode_threads": args.decode_threads,
+        "rtf": args.rtf,
+        "overhead": args.overhead,
+    }
+    config["punc_model"] = {"_enable": False}
+    config["streaming_model"] = {"_enable": False}
+    config["vad"] = {**config.get("vad", {}), "enable": False}
+    config["pool"] = {**config.get("pool", {}), "workers": args.workers}
+    config["pool"]["autoscale"] = False
+    config["batch"] = {**config.get("batch", {}), "enable": args.batch > 1}
+    config["batch"]["max_size"] = args.batch
+    config["shm"] = {**config.get("shm", {}), "enable": args.shm}
+    config["scheduler"] = {**config.get("scheduler", {}), "report_interval": 0}
+    for section in ("warmup", "metrics", "trace", "profiler"):
+        config[section] = {"enable": False}
+    config["startup"] = {"profile": ""}
+    config.pop("models", None)
+    return config
+
+
+class BenchSocket:
+    """代替 websocket 连接：记录每个任务最终结果的到达时刻"""
+
+    subprotocol = "binary"
+
+    def __init__(self):
+        self.id = uuid.uuid4()
+        self.finished: dict[str, float] = {}
+        self.events: dict[str, asyncio.Event] = {}
+        self.messages = 0
+
+    def expect(self, task_id: str) -> asyncio.Event:
+        return self.events.setdefault(task_id, asyncio.Event())
+
+    async def send(self, message: str):
+        self.messages += 1
+        message = json.loads(message)
+        if message.get("is_final") and "task_id" in message:
+            self.finished[message["task_id"]] = time.perf_counter()
+            self.expect(message["task_id"]).set()
+
+    async def close(self):
+        pass
+
+
+def make_messages(task_id: str, samples: np.ndarray, args) -> list[dict]:
+    """按客户端的格式切成消息：麦克风每块 chunk 秒，文件每块 60 秒"""
+    chunk = int(16000 * (args.chunk if args.mode == "mic" else 60))
+    messages = []
+    for start in range(0, len(samples), chunk):
+        messages.append(
+            {
+                "task_id": task_id,
+                "seg_duration": args.seg_duration,
+                "seg_overlap": args.seg_overlap,
+                "is_final": False,
+                "time_start": time.time(),
+                "time_frame": time.time(),
+                "source": args.mode,
+                "offset": start,
+                "data": samples[start : start + chunk].tobytes(),
+            }
+        )
+    if args.mode == "mic":
+        # 麦克风松开按键后再发一条空的结束消息
+        messages.append({**messages[-1], "is_final": True, "data": b""})
+    else:
+        messages[-1]["is_final"] = True
+    return messages
+
+
+async def run_client(index: int, args, latencies: list, audio: list):
+    socket = BenchSocket()
+    Cosmic.router.register(socket)
+    cache = ws.Cache()
+    rng = np.random.default_rng(index)
+    try:
+        for _ in range(args.utterances):
+            samples = rng.normal(0, 0.01, int(16000 * args.seconds)).astype(np.float32)
+            task_id = str(uuid.uuid4())
+            done = socket.expect(task_id)
+            for message in make_messages(task_id, samples, args):
+                if args.mode == "mic" and not message["is_final"]:
+                    # 麦克风按实时速度送出
+                    await asyncio.sleep(args.chunk)
+                sent = time.perf_counter()
+                await ws.message_handler(socket, message, cache)
+            await asyncio.wait_for(done.wait(), args.timeout)
+            latencies.append(socket.finished[task_id] - sent)
+            audio.append(args.seconds)
+            if args.think > 0:
+                await asyncio.sleep(args.think)
+    finally:
+        await Cosmic.router.unregister(str(socket.id))
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+async def run(args) -> dict:
+    await main.initialize_shared_resources()
+    main.start_recognizer_service()
+    services = [
+        asyncio.create_task(ws.ws_send_service()),
+        asyncio.create_task(Cosmic.pool.serve()),
+    ]
+    try:
+        await Cosmic.pool.wait_ready()
+        latencies, audio = [], []
+        t = time.perf_counter()
+        await asyncio.gather(
+            *(run_client(i, args, latencies, audio) for i in range(args.clients))
+        )
+        elapsed = time.perf_counter() - t
+    finally:
+        Cosmic.queue_out.put(None)
+        Cosmic.pool.stop()
+        for service in services:
+            service.cancel()
+        await asyncio.gather(*services, return_exceptions=True)
+        if Cosmic.arena is not None:
+            Cosmic.arena.close()
+
+    total = sum(audio)
+    return {
+        "utterances": len(latencies),
+        "audio_seconds": round(total, 3),
+        "elapsed_s": round(elapsed, 3),
+        "throughput": round(total / elapsed, 3),
+        "rtf": round(elapsed / total, 4),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "latency_p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "latency_max_ms": round(max(latencies) * 1000, 1),
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """各指标与基线比较，返回变差超过容差的指标"""
+    regressions = []
+    for key, direction in DIRECTIONS.items():
+        old, new = baseline.get(key), report.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * direction
+        if change < -tolerance:
+            regressions.append(f"{key}: {old} -> {new}（{change:+.1%}）")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=4, help="并发连接数")
+    parser.add_argument("--utterances", type=int, default=5, help="每个连接的任务数")
+    parser.add_argument("--seconds", type=float, default=5.0, help="每个任务的音频秒数")
+    parser.add_argument("--mode", choices=("mic", "file"), default="mic")
+    parser.add_argument("--chunk", type=float, default=0.1, help="麦克风每块的秒数")
+    parser.add_argument("--think", type=float, default=0.0, help="任务之间的间隔秒数")
+    parser.add_argument("--seg-duration", type=int, default=15)
+    parser.add_argument("--seg-overlap", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=1, help="识别进程数")
+    parser.add_argument("--batch", type=int, default=1, help="批量解码的最大批大小")
+    parser.add_argument("--decode-threads", type=int, default=1)
+    parser.add_argument("--shm", action="store_true", help="经共享内存传音频")
+    parser.add_argument("--rtf", type=float, default=0.05, help="stub 的解码实时率")
+    parser.add_argument(
+        "--overhead", type=float, default=0.005, help="stub 每次解码的固定耗时"
+    )
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--baseline", type=Path, help="与该基线比较")
+    parser.add_argument("--save-baseline", type=Path, help="把本次结果存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许变差的比例")
+    args = parser.parse_args()
+
+    settings = {
+        k: v
+        for k, v in vars(args).items()
+        if k not in ("baseline", "save_baseline", "tolerance", "timeout")
+    }
+    config = bench_config(args)
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # 识别进程从工作目录读取 config.toml
+        Path(tmp, "config.toml").write_text(dump_toml(config), encoding="utf-8")
+        os.chdir(tmp)
+        load_config.cache_clear()
+        console.quiet = get_console().quiet = True
+        try:
+            report = asyncio.run(run(args))
+        finally:
+            console.quiet = get_console().quiet = False
+            os.chdir(cwd)
+
+    output = {"settings": settings, "report": report}
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(output, indent=2) + "\n")
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["settings"] != settings:
+            print("警告：基线的参数与本次不同，比较结果仅供参考", file=sys.stderr)
+        regressions = compare(report, baseline["report"], args.tolerance)
+        output["regressions"] = regressions
+    print(json.dumps(output, indent=2, ensure_ascii=False))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
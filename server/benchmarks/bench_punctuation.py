@@ -0,0 +1,93 @@
+"""
+标点基准：模拟文件转录逐段产出文字，比较每段全文重算与增量加标点的总耗时
+
+没有标点模型时用一个耗时与输入长度成正比的替身，只看增长趋势；
+指定 --model 则使用 config.toml 中的 CT-Transformer。在 server 目录下运行：
+    python -m benchmarks.bench_punctuation --minutes 10 30 60 120
+"""
+
+import json
+import time
+import argparse
+
+from src.asr.punctuation import IncrementalPunctuator
+from src.utils import Result
+
+CHARS_PER_SECOND = 4  # 中文语速约每秒 4 字
+SENTENCE = "今天天气很好我们一起去公园散步然后回家吃饭了"
+
+
+class StubPunctuator:
+    """逐字扫描、每句话后加句号的替身，耗时与输入长度成正比"""
+
+    def __call__(self, text: str) -> str:
+        out = []
+        for ch in text:
+            out.append(ch)
+            if ch == "了":
+                out.append("。")
+        return "".join(out)
+
+
+def load_punctuator():
+    from src.asr import load_model
+    from src.utils import load_config
+
+    config = load_config()["punc_model"]
+    model = load_model(config["_type"], **config)
+    return lambda text: model(text).text
+
+
+def transcript(minutes: float, seg_duration: float):
+    """逐段累积的识别文本"""
+    total = int(minutes * 60 * CHARS_PER_SECOND)
+    step = int(seg_duration * CHARS_PER_SECOND)
+    full = (SENTENCE * (total // len(SENTENCE) + 1))[:total]
+    return [full[:end] for end in range(step, total + step, step)]
+
+
+def full_text(punctuate, texts) -> None:
+    """旧实现：每段都给全文加标点"""
+    for text in texts:
+        punctuate(text)
+
+
+def incremental(punctuate, texts) -> None:
+    """新实现：只给新文字加标点"""
+    punctuator = IncrementalPunctuator(punctuate)
+    for i, text in enumerate(texts):
+        result = Result("bench", "bench", "file")
+        result.text, result.is_final = text, i == len(texts) - 1
+        punctuator(result)
+
+
+def run(func, punctuate, minutes: float, seg_duration: float):
+    texts = transcript(minutes, seg_duration)
+    t = time.perf_counter()
+    func(punctuate, texts)
+    return {
+        "impl": func.__name__,
+        "audio_minutes": minutes,
+        "segments": len(texts),
+        "elapsed_s": round(time.perf_counter() - t, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[10, 30, 60, 120])
+    parser.add_argument("--seg-duration", type=float, default=25)
+    parser.add_argument("--model", action="store_true", help="使用真实标点模型")
+    args = parser.parse_args()
+
+    punctuate = load_punctuator() if args.model else StubPunctuator()
+    report = [
+        run(func, punctuate, minutes, args.seg_duration)
+        for minutes in args.minutes
+        for func in (full_text, incremental)
+    ]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
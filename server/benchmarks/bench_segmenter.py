@@ -0,0 +1,86 @@
+"""
+分段缓冲区微基准：模拟一条很长的音频流，测量切分吞吐（MB/s）与峰值内存
+
+在 server 目录下运行：
+    python -m benchmarks.bench_segmenter --hours 3 --chunk 60
+"""
+
+import json
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from src.net.ring_buffer import RingBuffer
+
+BYTES_PER_SECOND = 4 * 16000
+
+
+def segment_bytes(chunks, window: int, step: int, threshold: int) -> int:
+    """旧实现：不可变 bytes 拼接与切片"""
+    cache, count = b"", 0
+    for chunk in chunks:
+        cache += chunk
+        while len(cache) >= threshold:
+            data = cache[:window]
+            cache = cache[step:]
+            count += len(data)
+    return count
+
+
+def segment_ring(chunks, window: int, step: int, threshold: int) -> int:
+    """新实现：环形缓冲区，窗口为 memoryview"""
+    cache, count = RingBuffer(), 0
+    for chunk in chunks:
+        cache.write(chunk)
+        for data in cache.cut(window, step, threshold):
+            count += len(data)
+    return count
+
+
+def run(func, hours: float, chunk_seconds: float, seg_duration, seg_overlap):
+    chunk = np.random.default_rng(0).random(
+        int(BYTES_PER_SECOND * chunk_seconds) // 4, dtype=np.float32
+    )
+    chunk = chunk.tobytes()
+    chunks_num = int(hours * 3600 / chunk_seconds)
+    window = BYTES_PER_SECOND * (seg_duration + seg_overlap)
+    step = BYTES_PER_SECOND * seg_duration
+    threshold = BYTES_PER_SECOND * (seg_duration + seg_overlap * 2)
+
+    tracemalloc.start()
+    t = time.perf_counter()
+    func((chunk for _ in range(chunks_num)), window, step, threshold)
+    elapsed = time.perf_counter() - t
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = len(chunk) * chunks_num
+    return {
+        "impl": func.__name__,
+        "audio_hours": hours,
+        "chunk_seconds": chunk_seconds,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_mb_s": round(total / elapsed / 2**20, 1),
+        "peak_memory_mb": round(peak / 2**20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=3.0, help="模拟的音频时长")
+    parser.add_argument("--chunk", type=float, default=60.0, help="每条消息的秒数")
+    parser.add_argument("--seg-duration", type=int, default=25)
+    parser.add_argument("--seg-overlap", type=int, default=2)
+    args = parser.parse_args()
+
+    report = [
+        run(func, args.hours, args.chunk, args.seg_duration, args.seg_overlap)
+        for func in (segment_bytes, segment_ring)
+    ]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
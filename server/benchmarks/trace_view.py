@@ -0,0 +1,85 @@
+"""
+追踪查看：把服务端与客户端的追踪 JSONL 合并为 Chrome 追踪格式，并打印各阶段耗时
+
+输出的 JSON 可在 chrome://tracing 或 https://ui.perfetto.dev 中以瀑布图查看，
+每个任务一行，客户端与服务端的阶段排在同一条时间线上。在 server 目录下运行：
+    python -m benchmarks.trace_view logs/trace.jsonl ../client/logs/trace.jsonl -o trace.json
+"""
+
+import json
+import argparse
+import statistics
+from pathlib import Path
+
+
+def load_spans(paths) -> list[dict]:
+    spans = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            spans += [json.loads(line) for line in f if line.strip()]
+    return spans
+
+
+def to_chrome(spans: list[dict]) -> dict:
+    """每个 trace_id 一个线程，进程为 client/server"""
+    threads: dict[str, int] = {}
+    events = []
+    for item in sorted(spans, key=lambda s: s["start"]):
+        tid = threads.setdefault(item["trace_id"], len(threads) + 1)
+        events.append(
+            {
+                "name": item["name"],
+                "cat": item["process"],
+                "ph": "X",
+                "ts": item["start"] * 1e6,
+                "dur": max(0.0, item["end"] - item["start"]) * 1e6,
+                "pid": item["process"],
+                "tid": tid,
+                "args": {"trace_id": item["trace_id"]},
+            }
+        )
+    for trace_id, tid in threads.items():
+        for process in {s["process"] for s in spans}:
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": process,
+                    "tid": tid,
+                    "args": {"name": trace_id[:8]},
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def summarize(spans: list[dict]) -> dict:
+    """各阶段耗时（毫秒）的次数、中位数与 p95"""
+    durations: dict[str, list[float]] = {}
+    for item in spans:
+        key = f"{item['process']}/{item['name']}"
+        durations.setdefault(key, []).append((item["end"] - item["start"]) * 1000)
+    report = {}
+    for key, values in durations.items():
+        values.sort()
+        report[key] = {
+            "count": len(values),
+            "p50_ms": round(statistics.median(values), 3),
+            "p95_ms": round(values[min(int(len(values) * 0.95), len(values) - 1)], 3),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="+", type=Path, help="追踪 JSONL 文件")
+    parser.add_argument("-o", "--output", type=Path, help="Chrome 追踪 JSON 的输出路径")
+    args = parser.parse_args()
+
+    spans = load_spans(args.paths)
+    if args.output:
+        args.output.write_text(json.dumps(to_chrome(spans)), encoding="utf-8")
+    print(json.dumps(summarize(spans), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
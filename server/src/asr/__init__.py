@@ -1,4 +1,5 @@
 from .loaders import load_model
 from .recognizer import recognize_service
+from .pool import RecognizerPool
 
-__all__ = ["load_model", "recognize_service"]
+__all__ = ["load_model", "recognize_service", "RecognizerPool"]
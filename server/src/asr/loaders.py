@@ -1,19 +1,49 @@
+from __future__ import annotations
+
 import re
+import sys
 import time
+from array import array
+from itertools import zip_longest
 from abc import ABC, abstractmethod
-from typing import Literal, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Literal, Dict, Optional
 
 import numpy as np
-import sherpa_onnx
-import funasr_onnx
 
-from ..utils import Task, Result
+from .stub import StubRecognizer
+from .result_store import ResultStore
+from ..utils import console, Task, Result, PROFILE, span
+
+if TYPE_CHECKING:
+    import sherpa_onnx
 
+# sherpa_onnx、funasr_onnx 在各加载器的 load 中按需导入：
+# 未启用的模型不付导入开销，funasr_onnx 还会连带导入 jieba 等
 
 __all__ = ["load_model"]
 
 
-RESULTS = {}
+RESULTS = ResultStore()
+
+
+class ThreadCpu:
+    """
+    并行解码线程花费的 CPU 时间
+
+    识别主循环用 thread_time 计时，计不到解码线程池里的开销，由解码线程汇报到这里，
+    主循环解码完一组后取走。只在主循环线程里读写
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def take(self) -> float:
+        seconds, self.seconds = self.seconds, 0.0
+        return seconds
+
+
+THREAD_CPU = ThreadCpu()
 
 
 class BaseLoader(ABC):
@@ -24,19 +54,182 @@ class BaseLoader(ABC):
     @abstractmethod
     def __call__(self, *args, **kwargs) -> Result: ...
 
+    def recognize_batch(self, tasks: list[Task]) -> list[Result]:
+        """批量识别，默认逐个调用，支持批量解码的加载器可覆盖"""
+        return [self(task) for task in tasks]
+
+
+class ReorderBuffer:
+    """一个任务已解码、等待按 seq 顺序合并的片段"""
+
+    def __init__(self):
+        self.next_seq = 0
+        self.pending: Dict[int, tuple] = {}  # seq -> (task, stream)
+        self.failed = False  # 结果在任务进行中被清理，任务作废
+        self.touched = time.time()
+
+    def fail(self) -> Optional[Task]:
+        """丢弃缓冲的片段并作废任务，返回其中已到达的最后一个片段"""
+        self.failed = True
+        final = next((t for t, _ in self.pending.values() if t.is_final), None)
+        self.pending.clear()
+        return final
+
+    def push(self, task: Task, stream) -> list[tuple]:
+        """放入一个片段，返回此时可以按序合并的连续片段"""
+        self.touched = time.time()
+        self.pending[task.seq] = (task, stream)
+        ready = []
+        while self.next_seq in self.pending:
+            ready.append(self.pending.pop(self.next_seq))
+            self.next_seq += 1
+        return ready
+
 
 class ParaformerLoader(BaseLoader):
+    # task_id -> 乱序到达的片段；与 RESULTS 一样全进程共享，模型被卸载或重新载入后
+    # 未完成的任务照常合并
+    _buffers: Dict[str, ReorderBuffer] = {}
+
+    def __init__(self):
+        self._decode_threads = 1  # 并行解码的线程数
+        self._executor: Optional[ThreadPoolExecutor] = None
+
     def load(self, **kwargs):
+        self._decode_threads = kwargs.get("_decode_threads", 1)
         kwargs = {k: v for k, v in kwargs.items() if not k.startswith("_")}
+        sherpa_onnx = PROFILE.import_module("sherpa_onnx")
         self._model = sherpa_onnx.OfflineRecognizer.from_paraformer(**kwargs)
         return self
 
     def __call__(self, task: Task, *args, **kwargs):
         return self._sherpa_recognize(self._model, task, *args, **kwargs)
 
+    def recognize_batch(self, tasks: list[Task]) -> list[Result]:
+        return self._sherpa_recognize_batch(self._model, tasks)
+
     def _sherpa_recognize(
         self, recognizer: sherpa_onnx.OfflineRecognizer, task: Task
-    ) -> Result:
+    ) -> Optional[Result]:
+        """识别单个片段；前面的片段还没解码完时返回 None"""
+        samples = np.frombuffer(task.data, dtype=np.float32)
+
+        # 执行识别
+        with span(task, "decode"):
+            stream = self._perform_recognition(recognizer, samples, task.samplerate)
+
+        results = self._collect_ordered(task, stream)
+        return results[-1] if results else None
+
+    def _sherpa_recognize_batch(
+        self, recognizer: sherpa_onnx.OfflineRecognizer, tasks: list[Task]
+    ) -> list[Result]:
+        """
+        每个任务建一个流，分给若干线程用 decode_streams 并行解码
+
+        哪个线程先解码完就先合并；同一任务的片段先进重排缓冲区，
+        凑成从上次合并处开始的连续片段后再按序去重、合并
+        """
+        streams = []
+        for task in tasks:
+            with span(task, "features"):
+                samples = np.frombuffer(task.data, dtype=np.float32)
+                stream = recognizer.create_stream()
+                stream.accept_waveform(task.samplerate, samples)
+            streams.append(stream)
+
+        parts = min(self._decode_threads, len(tasks))
+        if parts <= 1:
+            with span(tasks, "decode"):
+                recognizer.decode_streams(streams)
+            return self._collect_all(zip(tasks, streams))
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self._decode_threads)
+        futures = {}
+        for i in range(parts):
+            part = list(zip(tasks[i::parts], streams[i::parts]))
+            future = self._executor.submit(
+                self._decode_part,
+                recognizer,
+                [t for t, _ in part],
+                [s for _, s in part],
+            )
+            futures[future] = part
+
+        results = []
+        for future in as_completed(futures):
+            THREAD_CPU.seconds += future.result()
+            results += self._collect_all(futures[future])
+        return results
+
+    def _decode_part(self, recognizer, tasks: list[Task], streams: list) -> float:
+        """在解码线程里解码一部分流，返回本线程花费的 CPU 时间"""
+        cpu_start = time.thread_time()
+        with span(tasks, "decode"):
+            recognizer.decode_streams(streams)
+        return time.thread_time() - cpu_start
+
+    def _collect_all(self, pairs) -> list[Result]:
+        results = []
+        for task, stream in pairs:
+            results += self._collect_ordered(task, stream)
+        return results
+
+    def _collect_ordered(self, task: Task, stream) -> list[Result]:
+        """按 seq 顺序合并片段，返回每次合并后的结果；没有 seq 的片段按到达顺序合并"""
+        if task.seq is None:
+            return [self._collect_result(task, stream)]
+
+        results = self._sweep_buffers()
+        buffer = self._buffers.get(task.task_id)
+        if buffer is not None and buffer.failed:
+            # 已作废的任务：丢弃后续片段，最后一个片段到达时告知失败
+            buffer.touched = time.time()
+            if task.is_final:
+                del self._buffers[task.task_id]
+                results.append(self._failed_result(task))
+            return results
+
+        self._ensure_result_container(task)
+        buffer = self._buffers.setdefault(task.task_id, ReorderBuffer())
+        for ready_task, ready_stream in buffer.push(task, stream):
+            results.append(self._collect_result(ready_task, ready_stream))
+            if ready_task.is_final:
+                self._buffers.pop(task.task_id, None)
+        return results
+
+    def _sweep_buffers(self) -> list[Result]:
+        """
+        结果在任务进行中被清理（取消、超时、超出内存预算）时作废该任务
+
+        已合并的文字已丢失，不能从 seq 0 重新缓冲，否则之后的片段永远等不到；
+        作废的缓冲保留到最后一个片段到达，或超过 RESULTS.ttl 没有新片段
+        """
+        results, now = [], time.time()
+        for task_id, buffer in list(self._buffers.items()):
+            if task_id in RESULTS:
+                continue
+            final = buffer.fail()
+            if final is not None:
+                del self._buffers[task_id]
+                results.append(self._failed_result(final))
+            elif now - buffer.touched > RESULTS.ttl:
+                del self._buffers[task_id]
+        return results
+
+    def _failed_result(self, task: Task) -> Result:
+        console.print(f"任务的结果已被清理，放弃识别：{task.task_id}", style="yellow")
+        result = Result(task.task_id, task.socket_id, task.source)
+        result.time_start = task.time_start
+        result.time_submit = task.time_submit
+        result.time_complete = time.time()
+        result.is_final = True
+        result.error = "evicted"
+        return result
+
+    def _collect_result(self, task: Task, stream) -> Result:
+        """把解码完成的流合并到任务的结果容器中"""
         # 确保结果容器存在
         result = self._ensure_result_container(task)
 
@@ -45,21 +238,19 @@ class ParaformerLoader(BaseLoader):
         result.time_submit = task.time_submit
 
         # 处理音频片段
-        samples, duration = self._process_audio_segment(result, task)
+        _, duration = self._process_audio_segment(result, task)
 
-        # 执行识别
-        stream = self._perform_recognition(recognizer, samples, task.samplerate)
+        len_before = len(result.tokens)
 
-        # 去重处理
-        m, n = self._deduplicate_timestamps(
-            stream, result, duration, task.overlap, task.is_final
-        )
-
-        # 合并结果
-        self._merge_results(result, stream, m, n, task.offset)
+        with span(task, "merge"):
+            # 去重处理
+            m, n = self._deduplicate_timestamps(
+                stream, result, duration, task.overlap, task.is_final
+            )
 
-        # 格式化文本
-        result.text = self._format_text(result.tokens)
+            # 合并结果，只格式化新 token 与上一个 token 之间的衔接处
+            self._merge_results(result, stream, m, n, task.offset)
+            result.text = self._append_text(result.text, result.tokens, len_before)
 
         if not task.is_final:
             return result
@@ -98,22 +289,23 @@ class ParaformerLoader(BaseLoader):
         self, stream, result: Result, duration: float, overlap: float, is_final: bool
     ) -> tuple[int, int]:
         """处理时间戳去重并返回有效范围(m,n)"""
-        m = n = len(stream.result.timestamps)
-
-        # 粗去重：基于时间戳
-        for i, timestamp in enumerate(stream.result.timestamps, start=0):
-            if timestamp > overlap / 2:
-                m = i
-                break
-        for i, timestamp in enumerate(stream.result.timestamps, start=1):
-            n = i
-            if timestamp > duration - overlap / 2:
-                break
+        timestamps = np.asarray(stream.result.timestamps, dtype=np.float64)
+        n = len(timestamps)
+
+        # 无重叠的片段（如 VAD 切分）不需要去重
+        if overlap == 0:
+            return 0, n
+
+        # 粗去重：基于时间戳，丢掉两端各半个重叠区内的 token
+        m = int(np.searchsorted(timestamps, overlap / 2, side="right"))
+        n = min(
+            int(np.searchsorted(timestamps, duration - overlap / 2, "right")) + 1, n
+        )
 
         if not result.timestamps:
             m = 0
         if is_final:
-            n = len(stream.result.timestamps)
+            n = len(timestamps)
 
         # 细去重：基于重复token
         if result.tokens and result.tokens[-2:] == stream.result.tokens[m:n][:2]:
@@ -125,25 +317,180 @@ class ParaformerLoader(BaseLoader):
 
     def _merge_results(self, result: Result, stream, m: int, n: int, offset: float):
         """合并识别结果到最终结果"""
-        result.timestamps += [t + offset for t in stream.result.timestamps[m:n]]
-        result.tokens += [token for token in stream.result.tokens[m:n]]
+        timestamps = np.asarray(stream.result.timestamps[m:n], dtype=np.float64)
+        result.timestamps.frombytes((timestamps + offset).tobytes())
+        result.tokens += map(sys.intern, stream.result.tokens[m:n])
 
     def _format_text(self, tokens: list[str]) -> str:
         """格式化token为文本"""
         text = " ".join(tokens).replace("@@ ", "")
         return re.sub("([^a-zA-Z0-9]) (?![a-zA-Z0-9])", r"\1", text)
 
+    def _append_text(self, text: str, tokens: list[str], start: int) -> str:
+        """
+        text 是 tokens[:start] 格式化后的文本，追加 tokens[start:]，结果与整体
+        _format_text 相同；空格只取决于相邻两个 token，只需重新格式化衔接处
+        """
+        if start == len(tokens):
+            return text
+        last = tokens[start - 1] if start else ""
+        if not start or not text.endswith(last):
+            return self._format_text(tokens)
+        return text[: len(text) - len(last)] + self._format_text(tokens[start - 1 :])
+
 
 class SensevoiceLoader(ParaformerLoader):
     def load(self, **kwargs):
+        self._decode_threads = kwargs.get("_decode_threads", 1)
         kwargs = {k: v for k, v in kwargs.items() if not k.startswith("_")}
+        sherpa_onnx = PROFILE.import_module("sherpa_onnx")
         self._model = sherpa_onnx.OfflineRecognizer.from_sense_voice(**kwargs)
         return self
 
 
+class StreamState:
+    """一个流式任务的持久识别流，以及端点之前已确定的部分"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.tokens: list[str] = []  # 已确定的 token
+        self.timestamps = array("d")
+        self.received = 0.0  # 已送入的音频秒数
+        self.segment_offset = 0.0  # 当前句子的起始时间
+        self.text = ""  # 上次发出的文本
+
+
+class StreamingParaformerLoader(ParaformerLoader):
+    """
+    基于 OnlineRecognizer 的流式识别
+
+    每个任务保持一个持久的识别流，音频一到就送入解码，产出中间结果；
+    检测到端点时确定当前句子并重置流，这一句单独发出（Result.sentence），
+    任务结束时只需解码最后一小段
+    """
+
+    def load(self, **kwargs):
+        kwargs = {k: v for k, v in kwargs.items() if not k.startswith("_")}
+        self._model = self._create(**kwargs)
+        self._states: Dict[str, StreamState] = {}
+        return self
+
+    def _create(self, **kwargs):
+        sherpa_onnx = PROFILE.import_module("sherpa_onnx")
+        return sherpa_onnx.OnlineRecognizer.from_paraformer(**kwargs)
+
+    def __call__(self, task: Task, *args, **kwargs):
+        results = self.recognize_batch([task])
+        return results[0] if results else None
+
+    def recognize_batch(self, tasks: list[Task]) -> list[Result]:
+        """
+        各任务的帧逐轮送入各自的流：每轮每个任务送一帧，一起解码所有就绪的流，
+        再检查端点，一批里有多个句子时每句单独产出一条句子结果
+        """
+        recognizer = self._model
+        frames: Dict[str, list[Task]] = {}
+        for task in tasks:
+            frames.setdefault(task.task_id, []).append(task)
+        states: Dict[str, StreamState] = {}
+        finals = set()
+        results = []
+        for round_tasks in zip_longest(*frames.values()):
+            active = []
+            for task in round_tasks:
+                if task is None:
+                    continue
+                state = self._ensure_state(task)
+                samples = np.frombuffer(task.data, dtype=np.float32)
+                state.stream.accept_waveform(task.samplerate, samples)
+                state.received += len(samples) / task.samplerate
+                states[task.task_id] = state
+                active.append((task.task_id, state))
+                if task.is_final:
+                    state.stream.input_finished()
+                    finals.add(task.task_id)
+
+            while ready := [
+                s.stream for _, s in active if recognizer.is_ready(s.stream)
+            ]:
+                recognizer.decode_streams(ready)
+
+            for task_id, state in active:
+                if task_id not in finals and recognizer.is_endpoint(state.stream):
+                    sentence = self._end_sentence(task_id, state)
+                    if sentence is not None:
+                        results.append(sentence)
+
+        for task_id, state in states.items():
+            result = self._collect_stream(task_id, state, task_id in finals)
+            if result is not None:
+                results.append(result)
+        return results
+
+    def _ensure_state(self, task: Task) -> StreamState:
+        # 结果被清理（取消、超时）后，流也随之丢弃
+        for task_id in [k for k in self._states if k not in RESULTS]:
+            del self._states[task_id]
+        result = self._ensure_result_container(task)
+        result.time_start = task.time_start
+        result.time_submit = task.time_submit
+        if task.task_id not in self._states:
+            self._states[task.task_id] = StreamState(self._model.create_stream())
+        return self._states[task.task_id]
+
+    def _segment(self, state: StreamState) -> tuple[list[str], array]:
+        """当前句子（上次端点之后）的 tokens 与时间戳"""
+        recognizer = self._model
+        tokens = [sys.intern(token) for token in recognizer.tokens(state.stream)]
+        timestamps = array(
+            "d",
+            [t + state.segment_offset for t in recognizer.timestamps(state.stream)],
+        )
+        return tokens, timestamps
+
+    def _end_sentence(self, task_id, state: StreamState) -> Optional[Result]:
+        """端点：确定当前句子并重置流，返回带这一句的结果；句子为空时返回 None"""
+        tokens, timestamps = self._segment(state)
+        state.tokens = state.tokens + tokens
+        state.timestamps = state.timestamps + timestamps
+        state.segment_offset = state.received
+        self._model.reset(state.stream)
+        if not tokens:
+            return None
+
+        result = RESULTS[task_id]
+        result.tokens, result.timestamps = state.tokens, state.timestamps
+        result.duration = state.received
+        result.text = state.text = self._format_text(result.tokens)
+        sentence = result.snapshot()
+        sentence.sentence = self._format_text(tokens)
+        return sentence
+
+    def _collect_stream(self, task_id, state: StreamState, is_final: bool):
+        """生成当前结果；非最终且文本未变化时返回 None"""
+        result = RESULTS[task_id]
+        tokens, timestamps = self._segment(state)
+        result.tokens = state.tokens + tokens
+        result.timestamps = state.timestamps + timestamps
+        result.duration = state.received
+        result.text = self._format_text(result.tokens)
+
+        if is_final:
+            result.time_complete = time.time()
+            result.is_final = True
+            del self._states[task_id]
+            return RESULTS.pop(task_id)
+
+        if result.text == state.text:
+            return None
+        state.text = result.text
+        return result
+
+
 class CttransformerLoader(BaseLoader):
     def load(self, **kwargs):
         kwargs = {k: v for k, v in kwargs.items() if not k.startswith("_")}
+        funasr_onnx = PROFILE.import_module("funasr_onnx")
         self._model = funasr_onnx.CT_Transformer(**kwargs)
         return self
 
@@ -154,12 +501,26 @@ class CttransformerLoader(BaseLoader):
         return result
 
 
-LoaderName = Literal["paraformer", "sensevoice", "cttransformer"]
+class StubLoader(ParaformerLoader):
+    """不需要模型的替身，解码耗时与音频时长成正比，见 stub.StubRecognizer"""
+
+    def load(self, **kwargs):
+        self._decode_threads = kwargs.get("_decode_threads", 1)
+        kwargs = {k: v for k, v in kwargs.items() if not k.startswith("_")}
+        self._model = StubRecognizer(**kwargs)
+        return self
+
+
+LoaderName = Literal[
+    "paraformer", "sensevoice", "paraformer_online", "cttransformer", "stub"
+]
 
 LOADERS: Dict[LoaderName, type[BaseLoader]] = {
     "paraformer": ParaformerLoader,
     "sensevoice": SensevoiceLoader,
+    "paraformer_online": StreamingParaformerLoader,
     "cttransformer": CttransformerLoader,
+    "stub": StubLoader,
 }
 
 
@@ -0,0 +1,76 @@
+import time
+import threading
+from queue import Queue
+
+from ..utils import Result, console, span, span_begin
+
+__all__ = ["StageTimer", "PunctuationStage", "split_threads"]
+
+
+def split_threads(total: int, punc_share: float) -> tuple[int, int]:
+    """把线程预算分给识别与标点两级，各至少一个线程"""
+    punc = min(max(1, round(total * punc_share)), max(1, total - 1))
+    return max(1, total - punc), punc
+
+
+class StageTimer:
+    """流水线一级的忙碌时间，utilization() 返回上次调用以来的忙碌比例"""
+
+    def __init__(self):
+        self.busy = 0.0
+        self.items = 0
+        self._since = time.perf_counter()
+        self._busy_since = 0.0
+
+    def add(self, seconds: float, items: int = 1):
+        self.busy += seconds
+        self.items += items
+
+    def utilization(self) -> float:
+        now = time.perf_counter()
+        elapsed, self._since = now - self._since, now
+        busy, self._busy_since = self.busy - self._busy_since, self.busy
+        return busy / elapsed if elapsed > 0 else 0.0
+
+
+class PunctuationStage:
+    """
+    标点流水线级：独立线程从自己的队列取结果，加标点后发给主进程
+
+    识别线程交出结果的快照后即可解码下一批，与标点计算重叠；
+    单线程按顺序处理，同一任务的结果不会乱序
+    """
+
+    def __init__(self, punctuator, queue_out):
+        self.punctuator = punctuator
+        self.queue_out = queue_out
+        self.queue: Queue = Queue()
+        self.timer = StageTimer()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, result: Result):
+        # 结果容器还会被识别线程继续合并，交出去的是快照
+        self.queue.put(result.snapshot())
+
+    def backlog(self) -> int:
+        return self.queue.qsize()
+
+    def stop(self):
+        """处理完队列中剩余的结果后退出"""
+        self.queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while (result := self.queue.get()) is not None:
+            t = time.perf_counter()
+            try:
+                with span(result, "punctuation"):
+                    result.text = self.punctuator(result)
+            except Exception as e:
+                # 标点失败时照常发出未加标点的文字
+                console.print(f"[red]标点出错：{e}")
+            result.punc_time = time.perf_counter() - t
+            self.timer.add(result.punc_time)
+            span_begin(result, "deliver")
+            self.queue_out.put(result)
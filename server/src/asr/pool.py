@@ -0,0 +1,310 @@
+import asyncio
+from typing import Callable, Dict, List
+from multiprocessing import Process, Queue, Value, Event
+
+from .recognizer import recognize_service
+from .scheduler import TaskScheduler
+from ..utils import console, Task, span_begin, span_end
+
+__all__ = ["RecognizerPool", "WorkerContext"]
+
+
+class WorkerContext:
+    """识别子进程与主进程之间共享的状态"""
+
+    def __init__(self, index: int, cancelled, arena=None):
+        self.index = index
+        self.cancelled = cancelled  # 已取消的任务与已断开的连接
+        self.arena = arena  # 音频共享内存，未启用时为 None
+        self.pending = Value("i", 0)  # 已派发、尚未识别完的任务数
+        self.ready = Event()  # 模型载入完成后置位
+        self.profile = Event()  # 置位后识别进程开始一次按需剖析
+        self.profile_seconds = Value("d", 0.0)  # 剖析时长，0 为配置的默认值
+
+
+class Worker:
+    """一个识别子进程及其专属输入队列"""
+
+    def __init__(self, index: int, queue_out: Queue, cancelled, arena=None):
+        self.context = WorkerContext(index, cancelled, arena)
+        self.queue_in = Queue()
+        self.draining = False  # 缩容中，不再接收新任务
+        self.process = Process(
+            target=recognize_service,
+            args=(self.queue_in, queue_out, self.context),
+            daemon=True,
+        )
+
+    @property
+    def index(self) -> int:
+        return self.context.index
+
+    @property
+    def pending(self) -> int:
+        return self.context.pending.value
+
+    @property
+    def ready(self) -> bool:
+        return self.context.ready.is_set()
+
+    def start(self):
+        self.process.start()
+
+    def put(self, task: Task):
+        with self.context.pending.get_lock():
+            self.context.pending.value += 1
+        self.queue_in.put(task)
+
+    def stop(self):
+        """放入 None，子进程处理完已排队的任务后退出"""
+        self.queue_in.put(None)
+
+
+class RecognizerPool:
+    """
+    识别进程池
+
+    任务先进入主进程的优先调度队列，进程有空余时才派发过去，
+    这样麦克风任务不会排在一长串文件片段之后。
+    同一 task_id 的片段固定派发到同一个进程（结果在进程内按任务合并），
+    新任务派发给积压最少的进程；开启 autoscale 后按持续积压扩缩容
+    """
+
+    def __init__(
+        self,
+        queue_out: Queue,
+        cancelled,
+        config: dict,
+        arena=None,
+        scheduler_config: dict | None = None,
+    ):
+        self.queue_out = queue_out
+        self.cancelled = cancelled
+        self.arena = arena
+
+        self.workers_num = config.get("workers", 1)
+        self.min_workers = config.get("min_workers", self.workers_num)
+        self.max_workers = config.get("max_workers", self.workers_num)
+        self.autoscale_enable = config.get("autoscale", False)
+        self.scale_up_backlog = config.get("scale_up_backlog", 4)
+        self.scale_down_backlog = config.get("scale_down_backlog", 0)
+        self.sustain = config.get("sustain", 5)
+        self.interval = config.get("interval", 1.0)
+        # 模型就绪前先缓存收到的音频，超过该上限的任务被拒绝
+        self.buffer_limit = config.get("warmup_buffer_mb", 64) * 2**20
+        self._buffered = 0
+
+        scheduler_config = scheduler_config or {}
+        # 进程的输入队列是先进先出的，积压的文件片段会排在新来的麦克风任务前面
+        self.max_inflight = scheduler_config.get("max_inflight", 1)
+        self.poll_interval = scheduler_config.get("poll_interval", 0.005)
+        self.report_interval = scheduler_config.get("report_interval", 60.0)
+        self.scheduler = TaskScheduler(
+            scheduler_config.get("max_batch_wait", 5.0),
+            scheduler_config.get("batch_every", 8),
+            scheduler_config.get("quantum", 30.0),
+        )
+
+        self.workers: List[Worker] = []
+        self.affinity: Dict[str, Worker] = {}  # task_id -> 固定的进程
+        self._next_index = 0
+        self._wakeup = asyncio.Event()
+
+    @property
+    def active_workers(self) -> List[Worker]:
+        return [w for w in self.workers if not w.draining]
+
+    @property
+    def ready(self) -> bool:
+        """至少有一个进程载入完成，可以开始派发"""
+        return any(w.ready for w in self.active_workers)
+
+    def launch(self):
+        """启动初始进程，不等待模型载入"""
+        for _ in range(self.workers_num):
+            self._spawn()
+
+    async def wait_ready(self):
+        """等待全部初始进程载入完成"""
+        for worker in list(self.workers):
+            await asyncio.to_thread(worker.context.ready.wait)
+        self._buffered = 0
+
+    async def start(self):
+        """启动初始进程，并等待全部载入完成"""
+        self.launch()
+        await self.wait_ready()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def submit(self, task: Task) -> bool:
+        """放入调度队列，由 dispatch 按优先级派发；就绪前缓存已满时返回 False"""
+        if not self.ready:
+            if self._buffered + len(task.data) > self.buffer_limit:
+                return False
+            self._buffered += len(task.data)
+        span_begin(task, "queue")
+        self.scheduler.put(task)
+        self._wakeup.set()
+        return True
+
+    def profile(self, seconds: float | None = None):
+        """让各识别进程各自剖析一次"""
+        for worker in self.active_workers:
+            worker.context.profile_seconds.value = seconds or 0.0
+            worker.context.profile.set()
+
+    def cancel(self, task_id: str):
+        """取消任务：移除调度队列中的片段，已派发的由识别进程取出时丢弃"""
+        self.cancelled.add(task_id)
+        self.affinity.pop(task_id, None)
+        self.scheduler.purge(lambda t: t.task_id == task_id)
+
+    def cancel_socket(self, socket_id: str):
+        """连接断开：移除它所有排队中的片段"""
+        self.cancelled.add(socket_id)
+        removed = self.scheduler.purge(lambda t: t.socket_id == socket_id)
+        for task in removed:
+            self.affinity.pop(task.task_id, None)
+
+    def _eligible(self, worker: Worker) -> Callable[[Task], bool]:
+        """worker 能否接收该任务：任务未绑定到别的进程，且进程未满载"""
+
+        def eligible(task: Task) -> bool:
+            pinned = self.affinity.get(task.task_id)
+            if pinned is not None and pinned is not worker:
+                return False
+            # 麦克风任务不受并发上限约束
+            return task.source == "mic" or worker.pending < self.max_inflight
+
+        return eligible
+
+    def dispatch_once(self) -> int:
+        """按优先级把能派发的任务都派发出去，返回派发数量"""
+        count = 0
+        while True:
+            pinned = self._pinned_count()
+            workers = sorted(
+                [w for w in self.active_workers if w.ready],
+                key=lambda w: (w.pending, pinned.get(w.index, 0)),
+            )
+            for worker in workers:
+                task = self.scheduler.pop(self._eligible(worker))
+                if task is not None:
+                    self._assign(task, worker)
+                    count += 1
+                    break
+            else:
+                return count
+
+    def _assign(self, task: Task, worker: Worker):
+        if task.is_final:
+            self.affinity.pop(task.task_id, None)
+        else:
+            self.affinity[task.task_id] = worker
+        span_end(task, "queue")
+        span_begin(task, "transfer")
+        if self.arena is not None:
+            # 派发时才写入共享内存：排队中的片段不占槽位，槽位由识别进程用完后归还
+            task.data = self.arena.pack(task.data)
+        worker.put(task)
+
+    def wake(self):
+        """识别进程可能腾出了空位（如收到结果），唤醒派发循环"""
+        self._wakeup.set()
+
+    async def dispatch(self):
+        """派发循环：有新任务或收到结果时派发；仍有积压时定时轮询，队列空时一直等待"""
+        while True:
+            self.dispatch_once()
+            try:
+                if len(self.scheduler):
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                else:
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def report(self):
+        """定期打印各类任务的排队等待时间"""
+        if self.report_interval <= 0:
+            return
+        count = 0
+        while True:
+            await asyncio.sleep(self.report_interval)
+            report = self.scheduler.report()
+            total = sum(r["count"] for r in report.values())
+            if total == count:
+                continue
+            count = total
+            for cls, r in report.items():
+                console.print(
+                    f"排队等待 {cls}：{r['count']} 个，"
+                    f"平均 {r['mean']:.3f}s，p95 {r['p95']:.3f}s，"
+                    f"最长 {r['max']:.3f}s，当前 {r['depth']} 个"
+                )
+
+    async def serve(self):
+        await asyncio.gather(self.dispatch(), self.autoscale(), self.report())
+
+    def _pinned_count(self) -> Dict[int, int]:
+        count: Dict[int, int] = {}
+        for worker in self.affinity.values():
+            count[worker.index] = count.get(worker.index, 0) + 1
+        return count
+
+    def _spawn(self) -> Worker:
+        worker = Worker(self._next_index, self.queue_out, self.cancelled, self.arena)
+        self._next_index += 1
+        worker.start()
+        self.workers.append(worker)
+        return worker
+
+    def _retire(self) -> bool:
+        """挑一个空闲且没有绑定任务的进程下线"""
+        pinned = self._pinned_count()
+        for worker in self.active_workers:
+            if worker.ready and worker.pending == 0 and worker.index not in pinned:
+                worker.draining = True
+                worker.stop()
+                return True
+        return False
+
+    def _reap(self):
+        """移除已退出的进程"""
+        for worker in [w for w in self.workers if not w.process.is_alive()]:
+            worker.process.join(timeout=0)
+            self.workers.remove(worker)
+            for task_id in [k for k, w in self.affinity.items() if w is worker]:
+                del self.affinity[task_id]
+            if not worker.draining:
+                console.print(f"识别进程 {worker.index} 意外退出", style="bright_red")
+
+    async def autoscale(self):
+        """根据持续积压调整进程数"""
+        if not self.autoscale_enable:
+            return
+        high = low = 0
+        while True:
+            await asyncio.sleep(self.interval)
+            self._reap()
+            if not self.ready:
+                # 载入期间的积压是缓存的音频，不据此扩容
+                continue
+            workers = self.active_workers
+            pending = len(self.scheduler) + sum(w.pending for w in workers)
+            backlog = pending / max(len(workers), 1)
+            high = high + 1 if backlog >= self.scale_up_backlog else 0
+            low = low + 1 if backlog <= self.scale_down_backlog else 0
+
+            if high >= self.sustain and len(workers) < self.max_workers:
+                worker = self._spawn()
+                console.print(f"积压 {backlog:.1f}，扩容识别进程 {worker.index}")
+                high = 0
+            elif low >= self.sustain and len(workers) > self.min_workers:
+                if self._retire():
+                    console.print("负载降低，缩减一个识别进程")
+                low = 0
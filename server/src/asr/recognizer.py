@@ -1,60 +1,346 @@
 import time
+import signal
+import logging
+import threading
+from queue import Empty
+from pathlib import Path
 from platform import system
 from multiprocessing import Queue
+from concurrent.futures import ThreadPoolExecutor
 
 from . import load_model
-from ..utils import console, load_config, empty_current_working_set, Task
+from .loaders import RESULTS, THREAD_CPU
+from .pipeline import PunctuationStage, StageTimer, split_threads
+from .punctuation import IncrementalPunctuator
+from .registry import ModelRegistry, DEFAULT_MODEL
+from .warmup import warm_up
+from ..utils import (
+    console,
+    load_config,
+    empty_current_working_set,
+    Task,
+    Result,
+    PROFILE,
+    SamplingProfiler,
+    span,
+    span_begin,
+    span_end,
+)
 
 
-def recognize_service(queue_in: Queue, queue_out: Queue, socket_id):
+def recognize_service(queue_in: Queue, queue_out: Queue, context):
     config = load_config()
     recognizer_config = config["recognize_model"]
     punctuator_config = config["punc_model"]
+    streamer_config = config.get("streaming_model", {"_enable": False})
+    batch_config = config.get("batch", {})
+    batch_size = batch_config.get("max_size", 1) if batch_config.get("enable") else 1
+    batch_wait = batch_config.get("max_wait", 0.0)
+    results_config = config.get("results", {})
+    RESULTS.configure(
+        results_config.get("ttl", 600.0),
+        results_config.get("memory_mb", 256) * 2**20,
+    )
+    pipeline_config = config.get("pipeline", {})
+    report_interval = config.get("scheduler", {}).get("report_interval", 60.0)
+    cancelled = context.cancelled
 
-    t1 = time.time()
-    console.print("[yellow]语音模型载入中", end="\r")
-    recognizer = load_model(recognizer_config["_type"], **recognizer_config)
-    console.print("[green4]语音模型载入完成", end="\n\n")
-    console.print(f"[green4]语音模型载入耗时：{time.time() - t1}", end="\n\n")
+    # 识别与标点分享同一份线程预算
+    threads = pipeline_config.get("threads", 0)
+    if threads > 0 and punctuator_config["_enable"] is True:
+        asr_threads, punc_threads = split_threads(
+            threads, pipeline_config.get("punc_share", 0.25)
+        )
+        recognizer_config["num_threads"] = asr_threads
+        punctuator_config["intra_op_num_threads"] = punc_threads
 
-    t2 = time.time()
-    punctuator = None
+    # 各模型互不依赖，在线程中并行载入
+    t1 = time.time()
+    jobs = {"recognizer": recognizer_config}
+    if streamer_config["_enable"] is True:
+        jobs["streamer"] = streamer_config
     if punctuator_config["_enable"] is True:
+        jobs["punctuator"] = punctuator_config
+    console.print("[yellow]模型载入中", end="\r")
+    with ThreadPoolExecutor(len(jobs)) as executor:
+        futures = {name: executor.submit(_load, name, c) for name, c in jobs.items()}
+        models = {name: future.result() for name, future in futures.items()}
+    streamer = models.get("streamer")
+    punctuator = models.get("punctuator")
 
-        def disable_jieba_debug():
-            # 关闭 jieba 的 debug
-            import jieba
-            import logging
-
-            jieba.setLogLevel(logging.INFO)
-
-        disable_jieba_debug()
-
-        console.print("[yellow]标点模型载入中", end="\r")
-        punctuator = load_model(punctuator_config["_type"], **punctuator_config)
-        console.print("[green4]标点模型载入完成", end="\n\n")
-        console.print(f"[green4]标点模型载入耗时：{time.time() - t2}", end="\n\n")
+    # 客户端可按任务选用的其它识别模型，首次使用时载入
+    registry_config = config.get("registry", {})
+    registry = ModelRegistry(
+        dict(config.get("models", {})),
+        registry_config.get("memory_mb", 2048) * 2**20,
+        registry_config.get("idle_timeout", 1800.0),
+        registry_config.get("check_interval", 5.0),
+        background=True,
+    )
+    # 默认模型也从注册表取用，文件被替换后换入新模型
+    registry.put(DEFAULT_MODEL, models["recognizer"], recognizer_config, pinned=True)
+    if punctuator is not None:
+        punctuator = IncrementalPunctuator(
+            lambda text, model=punctuator: model(text).text,
+            context=punctuator_config.get("_context", 20),
+            skip_partial_file=punctuator_config.get("_skip_partial", False),
+        )
 
     console.print(f"模型加载总耗时 {time.time() - t1:.2f}s", end="\n\n")
 
     if system() == "Windows":
         empty_current_working_set()
 
-    queue_out.put(True)  # 通知主进程服务已准备就绪
+    # 预热：首次推理的初始化开销在就绪之前付掉
+    warmup_config = config.get("warmup", {})
+    if warmup_config.get("enable", False):
+        t3 = time.time()
+        console.print("[yellow]模型预热中", end="\r")
+        with PROFILE.stage("warmup"):
+            warm_up(
+                recognize,
+                registry.get(DEFAULT_MODEL),
+                streamer,
+                punctuator,
+                warmup_config.get("lengths", [2.0]),
+                warmup_config.get("rounds", 1),
+                batch_size if warmup_config.get("full_batch", False) else 1,
+            )
+        console.print(f"[green4]模型预热耗时：{time.time() - t3:.2f}s", end="\n\n")
+
+    # 标点作为独立的流水线级，与下一批的识别重叠
+    stage = None
+    if punctuator is not None and pipeline_config.get("enable", True):
+        stage = PunctuationStage(punctuator, queue_out)
+    asr_timer = StageTimer()
 
+    install_profiler(context, config.get("profiler", {}))
+    save_profile(context.index, config.get("startup", {}).get("profile", ""))
+    context.ready.set()  # 通知主进程服务已准备就绪
+
+    last_sweep = last_report = time.time()
     while True:
+        if report_interval and time.time() - last_report > report_interval:
+            last_report = time.time()
+            report_utilization(context.index, asr_timer, stage)
+
+        # 定期清理已取消、超时或超出内存预算的结果
+        if time.time() - last_sweep > 1:
+            last_sweep = time.time()
+            RESULTS.discard_if(cancelled.cancelled)
+            RESULTS.evict()
+            registry.evict()
+            if punctuator is not None:
+                punctuator.prune(RESULTS)
+
         try:
-            task: Task = queue_in.get(timeout=1)
+            tasks = collect_batch(queue_in, batch_size, batch_wait)
         except KeyboardInterrupt:
+            if stage is not None:
+                stage.stop()
             return
         except Exception as _:
             continue
 
-        if task.socket_id not in socket_id:
-            continue
+        # 收到 None，处理完之前的任务后退出
+        stop = None in tasks
+        tasks = [task for task in tasks if task is not None]
+        done = len(tasks)
+        for task in tasks:
+            span_end(task, "transfer")
+
+        # 共享内存中的音频直接映射为 numpy 视图
+        refs = [task.data for task in tasks]
+        if context.arena is not None:
+            for task in tasks:
+                task.data = context.arena.unpack(task.data)
+
+        # 已取消的任务、已断开连接的任务直接丢弃
+        for task in tasks:
+            if cancelled.cancelled(task):
+                RESULTS.pop(task.task_id, None)
+        tasks = [task for task in tasks if not cancelled.cancelled(task)]
+
+        try:
+            # 麦克风任务先解码、先发送，不必等同批的文件片段
+            interactive = [task for task in tasks if task.source == "mic"]
+            batch = [task for task in tasks if task.source != "mic"]
+            for group in (interactive, batch):
+                # 只计本线程与解码线程的 CPU，不含标点线程与预热等其它开销
+                THREAD_CPU.take()
+                t, cpu_start = time.perf_counter(), time.thread_time()
+                results = recognize(group, None, streamer, registry)
+                wall = time.perf_counter() - t
+                cpu_time = time.thread_time() - cpu_start + THREAD_CPU.take()
+                account(group, results, cpu_time, wall)
+                asr_timer.add(wall, len(group))
+                if punctuator is not None and stage is None:
+                    # 结果容器保留未加标点的文字，供下次增量格式化
+                    results = [result.snapshot() for result in results]
+                    for result in results:
+                        t = time.perf_counter()
+                        with span(result, "punctuation"):
+                            result.text = punctuator(result)
+                        result.punc_time = time.perf_counter() - t
+                for result in results:
+                    if stage is not None:
+                        stage.put(result)
+                    else:
+                        span_begin(result, "deliver")
+                        queue_out.put(result)
+        finally:
+            # 音频已送入识别流，释放共享内存槽位
+            if context.arena is not None:
+                for ref in refs:
+                    context.arena.release(ref)
+
+        _task_done(context, done)
+        if stop:
+            if stage is not None:
+                stage.stop()
+            return
+
+
+def recognize(
+    tasks: list[Task], recognizer, streamer, models: ModelRegistry | None = None
+) -> list[Result]:
+    """
+    识别一组任务；同一任务在一组里可能有多个片段，只返回合并后的最新状态
 
-        result = recognizer(task)
-        if punctuator is not None:
-            result.text = punctuator(result.text).text
+    给出 models 时各任务按所选模型从注册表取用，否则都用 recognizer
+    """
+    results = {}
+    groups: dict[str | None, list[Task]] = {}
+    for task in tasks:
+        if not task.streaming:
+            groups.setdefault(task.model, []).append(task)
+    streaming = [task for task in tasks if task.streaming]
+    for name, group in groups.items():
+        # 按任务选用的模型识别，模型不可用或载入中时退回默认模型
+        loader = recognizer
+        if models is not None:
+            loader = models.get(name) or models.get(DEFAULT_MODEL)
+        with span(group, "recognize"):
+            for result in loader.recognize_batch(group):
+                results[result.task_id] = result
+    # 端点确定的句子各自发出，排在同一任务的最新结果之前
+    sentences = []
+    if streaming and streamer is not None:
+        with span(streaming, "recognize"):
+            for result in streamer.recognize_batch(streaming):
+                if result.sentence is not None:
+                    sentences.append(result)
+                else:
+                    results[result.task_id] = result
 
-        queue_out.put(result)
+    # 结果带上本组中该任务最新片段的各阶段
+    latest = {task.task_id: task for task in tasks if task.spans is not None}
+    results = [*sentences, *results.values()]
+    for result in results:
+        task = latest.get(result.task_id)
+        result.spans = task.spans if task is not None else None
+    return results
+
+
+MODEL_NAMES = {
+    "recognizer": "语音模型",
+    "streamer": "流式模型",
+    "punctuator": "标点模型",
+}
+
+
+def _load(name: str, model_config: dict):
+    """载入一个模型，并记录载入耗时"""
+    with PROFILE.stage(f"load {name}"):
+        if model_config["_type"] == "cttransformer":
+            # 关闭 jieba 的 debug
+            jieba = PROFILE.import_module("jieba")
+            jieba.setLogLevel(logging.INFO)
+        model = load_model(model_config["_type"], **model_config)
+    console.print(
+        f"[green4]{MODEL_NAMES[name]}载入完成，"
+        f"耗时 {PROFILE.stages[f'load {name}']:.2f}s",
+        end="\n\n",
+    )
+    return model
+
+
+def install_profiler(context, config: dict):
+    """按需剖析：主进程置位 context.profile，或直接向本进程发 SIGUSR1"""
+    if not config.get("enable", False):
+        return
+    profiler = SamplingProfiler(f"worker-{context.index}", config)
+    threading.Thread(
+        target=profiler.watch,
+        args=(context.profile, context.profile_seconds),
+        daemon=True,
+    ).start()
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: profiler.trigger())
+
+
+def save_profile(index: int, path: str):
+    """打印启动剖析，并按进程写入 JSON"""
+    profile = PROFILE.to_dict()
+    imports = "，".join(f"{k} {v:.2f}s" for k, v in profile["imports"].items())
+    console.print(f"启动剖析：就绪耗时 {profile['elapsed']:.2f}s，导入 {imports}")
+    if path:
+        path = Path(path)
+        PROFILE.save(path.with_name(f"{path.stem}-{index}{path.suffix}"))
+
+
+def report_utilization(index: int, asr_timer: StageTimer, stage):
+    """打印各流水线级的忙碌比例，用于调整线程预算的分配；期间没有识别任务时不打印"""
+    asr = asr_timer.utilization()
+    punc = stage.timer.utilization() if stage is not None else 0.0
+    if asr == 0:
+        return
+    line = f"识别进程 {index}：识别 {asr:.0%}"
+    if stage is not None:
+        line += f"，标点 {punc:.0%}，标点积压 {stage.backlog()}"
+    console.print(line)
+
+
+def account(
+    tasks: list[Task], results: list[Result], cpu_time: float, wall: float = 0.0
+):
+    """
+    把本组的音频秒数、CPU 时间和解码耗时记到各结果上
+
+    CPU 时间按音频秒数分摊；同组的结果一起解码完成，解码耗时都记为整组的耗时。
+    同一任务有多条结果（端点确定的句子）时，音频秒数只记在第一条上
+    """
+    seconds = {}
+    for task in tasks:
+        length = memoryview(task.data).nbytes / 4 / task.samplerate
+        seconds[task.task_id] = seconds.get(task.task_id, 0.0) + length
+    total = sum(seconds.values())
+    for result in results:
+        result.decode_time = wall
+        result.audio_seconds = seconds.pop(result.task_id, 0.0)
+        if total > 0:
+            result.cpu_time = cpu_time * result.audio_seconds / total
+        else:
+            result.cpu_time = cpu_time / len(results)
+
+
+def _task_done(context, count: int):
+    """减少积压计数，供主进程做负载均衡"""
+    with context.pending.get_lock():
+        context.pending.value -= count
+
+
+def collect_batch(queue_in: Queue, max_size: int, max_wait: float) -> list[Task]:
+    """阻塞取出第一个任务，再在 max_wait 秒内尽量多取，凑成一批"""
+    tasks = [queue_in.get(timeout=1)]
+    deadline = time.time() + max_wait
+    while len(tasks) < max_size:
+        remaining = deadline - time.time()
+        try:
+            if remaining > 0:
+                tasks.append(queue_in.get(timeout=remaining))
+            else:
+                tasks.append(queue_in.get_nowait())
+        except Empty:
+            break
+    return tasks
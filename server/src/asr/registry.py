@@ -0,0 +1,167 @@
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from .loaders import load_model, BaseLoader
+from ..utils import console
+
+__all__ = ["ModelRegistry", "DEFAULT_MODEL"]
+
+DEFAULT_MODEL = "default"  # config.toml 中 [recognize_model] 的模型
+
+
+def _model_files(config: dict) -> list[Path]:
+    """配置中指向已存在文件或目录的路径，即模型文件"""
+    paths = []
+    for key, value in config.items():
+        if key.startswith("_") or not isinstance(value, str):
+            continue
+        path = Path(value)
+        if path.is_file():
+            paths.append(path)
+        elif path.is_dir():
+            paths += [p for p in path.rglob("*") if p.is_file()]
+    return paths
+
+
+class Entry:
+    """一个已载入的模型"""
+
+    def __init__(self, name: str, loader: BaseLoader, config: dict, pinned: bool):
+        self.name = name
+        self.loader = loader
+        self.config = config
+        self.pinned = pinned  # 常驻，不因预算或闲置被卸载
+        self.signature = self.stat()
+        self.memory = sum(size for _, _, size in self.signature)
+        self.used = time.time()
+        self.checked = time.time()
+
+    def stat(self) -> tuple:
+        """模型文件的 (路径, 修改时间, 大小)，用于发现文件被替换"""
+        result = []
+        for path in _model_files(self.config):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            result.append((str(path), st.st_mtime, st.st_size))
+        return tuple(sorted(result))
+
+
+class ModelRegistry:
+    """
+    识别进程内按名称管理多个识别模型
+
+    模型首次被任务选用时才载入；已载入模型的文件大小之和超过 memory_budget，
+    或闲置超过 idle_timeout 秒的模型被卸载（最久未用的先卸载）。
+    模型文件被替换后，下次使用时自动重新载入，无需重启服务。
+    background 为 True 时在后台线程载入，载入完成前 get 返回旧模型或 None，
+    识别线程不必等待载入
+    """
+
+    def __init__(
+        self,
+        configs: Dict[str, dict],
+        memory_budget: int = 2048 * 2**20,
+        idle_timeout: float = 1800.0,
+        check_interval: float = 5.0,
+        background: bool = False,
+    ):
+        self.configs = configs
+        self.memory_budget = memory_budget
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval  # 检查模型文件是否被替换的间隔
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}  # 后台载入中的模型
+        self._executor = ThreadPoolExecutor(1) if background else None
+
+    def __contains__(self, name) -> bool:
+        return name in self._entries
+
+    def put(self, name: str, loader: BaseLoader, config: dict, pinned: bool = False):
+        """登记一个已载入的模型，如启动时载入的默认模型"""
+        self.configs[name] = config
+        self._entries[name] = Entry(name, loader, config, pinned)
+
+    def get(self, name: Optional[str]) -> Optional[BaseLoader]:
+        """取出模型，必要时载入或重新载入；未配置或载入失败返回 None"""
+        name = name or DEFAULT_MODEL
+        self._collect()
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = self._start(name)
+        elif self._changed(entry):
+            # 新文件可能还没写完，载入失败时继续用旧模型，稍后再试
+            console.print(f"模型文件已更新，重新载入：{name}", style="yellow")
+            entry = self._start(name) or entry
+        if entry is None:
+            return None
+        self._entries[name] = entry
+        self._entries.move_to_end(name)
+        entry.used = time.time()
+        self.evict(keep=name)
+        return entry.loader
+
+    def memory(self) -> int:
+        return sum(entry.memory for entry in self._entries.values())
+
+    def evict(self, keep: Optional[str] = None) -> list[str]:
+        """卸载闲置超时的模型，再按最久未用卸载到预算以内"""
+        self._collect()
+        now = time.time()
+        evicted = []
+        for name, entry in list(self._entries.items()):
+            if entry.pinned or name == keep:
+                continue
+            if (
+                now - entry.used > self.idle_timeout
+                or self.memory() > self.memory_budget
+            ):
+                del self._entries[name]
+                evicted.append(name)
+        if evicted:
+            console.print(f"卸载模型：{'、'.join(evicted)}", style="yellow")
+        return evicted
+
+    def _changed(self, entry: Entry) -> bool:
+        if time.time() - entry.checked < self.check_interval:
+            return False
+        entry.checked = time.time()
+        return entry.stat() != entry.signature
+
+    def _start(self, name: str) -> Optional[Entry]:
+        """载入模型；后台载入时只提交给载入线程并返回 None"""
+        if self._executor is None or name not in self.configs:
+            return self._load(name)
+        if name not in self._loading:
+            self._loading[name] = self._executor.submit(self._load, name)
+        return None
+
+    def _collect(self):
+        """换入后台载入完成的模型"""
+        for name, future in list(self._loading.items()):
+            if not future.done():
+                continue
+            del self._loading[name]
+            entry = future.result()
+            if entry is not None:
+                self._entries[name] = entry
+
+    def _load(self, name: str) -> Optional[Entry]:
+        config = self.configs.get(name)
+        if config is None:
+            console.print(f"未配置的模型：{name}", style="bright_red")
+            return None
+        old = self._entries.get(name)
+        t = time.time()
+        try:
+            loader = load_model(config["_type"], **config)
+        except Exception as e:
+            console.print(f"模型载入失败：{name}，{e}", style="bright_red")
+            return None
+        console.print(f"[green4]模型 {name} 载入完成，耗时 {time.time() - t:.2f}s")
+        return Entry(name, loader, config, old.pinned if old else False)
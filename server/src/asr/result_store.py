@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+
+from ..utils import console, Result
+
+__all__ = ["ResultStore"]
+
+# 估算每个 token 占用的内存：列表槽位（字符串已 intern）、双精度时间戳与文本中的字符
+TOKEN_BYTES = 24
+
+
+class ResultStore:
+    """
+    进程内按 task_id 暂存未完成的识别结果
+
+    最近访问的排在末尾；超过 ttl 秒未更新的条目，以及超出内存预算时
+    最久未访问的条目会被清除，避免客户端放弃的任务一直占用内存
+    """
+
+    def __init__(self, ttl: float = 600.0, memory_budget: int = 256 * 2**20):
+        self.ttl = ttl
+        self.memory_budget = memory_budget
+        self._results: "OrderedDict[str, Result]" = OrderedDict()
+        self._touched: dict = {}
+
+    def configure(self, ttl: float, memory_budget: int):
+        self.ttl = ttl
+        self.memory_budget = memory_budget
+
+    def __contains__(self, task_id) -> bool:
+        return task_id in self._results
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def __getitem__(self, task_id) -> Result:
+        self._results.move_to_end(task_id)
+        self._touched[task_id] = time.time()
+        return self._results[task_id]
+
+    def __setitem__(self, task_id, result: Result):
+        self._results[task_id] = result
+        self._results.move_to_end(task_id)
+        self._touched[task_id] = time.time()
+
+    def pop(self, task_id, *default):
+        self._touched.pop(task_id, None)
+        return self._results.pop(task_id, *default)
+
+    def discard_if(self, predicate) -> int:
+        """清除满足条件的条目（如已取消的任务），返回清除数量"""
+        keys = [k for k, r in self._results.items() if predicate(r)]
+        for key in keys:
+            self.pop(key)
+        return len(keys)
+
+    def memory(self) -> int:
+        return sum(len(r.tokens) for r in self._results.values()) * TOKEN_BYTES
+
+    def evict(self) -> int:
+        """按 ttl 和内存预算清理，返回清除数量"""
+        now, count = time.time(), 0
+        for key in [k for k, t in self._touched.items() if now - t > self.ttl]:
+            self.pop(key)
+            count += 1
+
+        memory = self.memory()
+        while self._results and memory > self.memory_budget:
+            key, result = next(iter(self._results.items()))
+            memory -= len(result.tokens) * TOKEN_BYTES
+            self.pop(key)
+            count += 1
+
+        if count:
+            console.print(f"清理了 {count} 个过期的识别结果", style="yellow")
+        return count
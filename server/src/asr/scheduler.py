@@ -0,0 +1,223 @@
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from ..utils import Task, Histogram
+
+__all__ = ["TaskScheduler", "FairQueue", "WaitStats", "task_class", "task_seconds"]
+
+INTERACTIVE = "interactive"  # 麦克风听写
+BATCH = "batch"  # 文件转录
+
+Item = Tuple[float, Task]  # (入队时间, 任务)
+
+
+def task_class(task: Task) -> str:
+    return INTERACTIVE if task.source == "mic" else BATCH
+
+
+def task_seconds(task: Task) -> float:
+    """任务的音频秒数（float32、16000 采样率）"""
+    return len(task.data) / 4 / task.samplerate
+
+
+class WaitStats:
+    """一类任务的排队等待时间统计"""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+        self.histogram = Histogram()  # 全部等待时间的分布，供 /metrics 输出
+
+    def add(self, wait: float):
+        self.histogram.observe(wait)
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+        self.recent.append(wait)
+
+    def percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        return values[min(int(len(values) * q), len(values) - 1)]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+        }
+
+
+class FairQueue:
+    """
+    按 socket_id 分流的赤字轮询（DRR）队列，代价为任务的音频秒数
+
+    每轮给每条流补 quantum 秒的额度，额度够付任务的音频秒数才能出队，
+    N 个同时上传的连接因此各得约 1/N 的识别时间；同一连接内先进先出
+    """
+
+    def __init__(self, quantum: float = 30.0):
+        # 额度不为正时 pop 永远凑不够，会卡死主进程的事件循环
+        if quantum <= 0:
+            raise ValueError(f"quantum must be positive: {quantum!r}")
+        self.quantum = quantum
+        self.flows: Dict[str, Deque[Item]] = {}
+        self.deficit: Dict[str, float] = {}
+        self.active: Deque[str] = deque()  # 轮询顺序
+
+    def __len__(self) -> int:
+        return sum(len(flow) for flow in self.flows.values())
+
+    def __iter__(self):
+        for flow in self.flows.values():
+            yield from flow
+
+    def append(self, item: Item):
+        socket_id = item[1].socket_id
+        if socket_id not in self.flows:
+            self.flows[socket_id] = deque()
+            self.deficit[socket_id] = 0.0
+            self.active.append(socket_id)
+        self.flows[socket_id].append(item)
+
+    def oldest(self) -> float:
+        """最早入队的时间，队列为空时为 inf"""
+        return min((flow[0][0] for flow in self.flows.values()), default=float("inf"))
+
+    def pop(self, eligible: Callable[[Task], bool]) -> Optional[Item]:
+        # 每条流中第一个可派发的任务；没有可派发任务的流本轮跳过，不补额度
+        heads = {}
+        for socket_id, flow in self.flows.items():
+            for i, (_, task) in enumerate(flow):
+                if eligible(task):
+                    heads[socket_id] = i
+                    break
+        if not heads:
+            return None
+
+        while True:
+            socket_id = self.active[0]
+            if socket_id not in heads:
+                self.active.rotate(-1)
+                continue
+            flow, index = self.flows[socket_id], heads[socket_id]
+            if self.deficit[socket_id] < task_seconds(flow[index][1]):
+                self.deficit[socket_id] += self.quantum
+                self.active.rotate(-1)
+                continue
+
+            item = flow[index]
+            del flow[index]
+            self.deficit[socket_id] -= task_seconds(item[1])
+            if not flow:
+                self._remove(socket_id)
+            return item
+
+    def purge(self, predicate: Callable[[Task], bool]) -> List[Item]:
+        removed = []
+        for socket_id in list(self.flows):
+            kept = deque()
+            for item in self.flows[socket_id]:
+                (removed if predicate(item[1]) else kept).append(item)
+            if kept:
+                self.flows[socket_id] = kept
+            else:
+                self._remove(socket_id)
+        return removed
+
+    def _remove(self, socket_id: str):
+        # 流排空即清零额度，空闲的连接不能攒额度
+        del self.flows[socket_id], self.deficit[socket_id]
+        self.active.remove(socket_id)
+
+
+class TaskScheduler:
+    """
+    两级优先调度：麦克风任务（interactive）总是先出队，文件任务（batch）其次
+
+    防饿死：batch 任务已等待 max_batch_wait 秒（从上次派发 batch 与最早入队
+    两者中较晚的时刻算起），或已连续派发 batch_every 个 interactive 任务时，
+    先派发一个 batch 任务。
+    batch 内部按连接公平轮询，见 FairQueue
+    """
+
+    def __init__(
+        self, max_batch_wait: float = 5.0, batch_every: int = 8, quantum: float = 30.0
+    ):
+        self.max_batch_wait = max_batch_wait
+        self.batch_every = batch_every
+        self.queues = {
+            INTERACTIVE: deque(),
+            BATCH: FairQueue(quantum),
+        }
+        self.stats = {INTERACTIVE: WaitStats(), BATCH: WaitStats()}
+        self._streak = 0  # 有 batch 任务等待时，连续派发 interactive 的次数
+        # 上次派发 batch 任务的时间；按积压最早的入队时间算会让长积压一直压过麦克风
+        self._last_batch = 0.0
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+    def put(self, task: Task):
+        self.queues[task_class(task)].append((time.time(), task))
+
+    def depth(self) -> Dict[str, int]:
+        return {cls: len(q) for cls, q in self.queues.items()}
+
+    def _order(self) -> Tuple[str, str]:
+        batch = self.queues[BATCH]
+        if len(batch) and (
+            self._streak >= self.batch_every
+            or time.time() - max(self._last_batch, batch.oldest()) > self.max_batch_wait
+        ):
+            return BATCH, INTERACTIVE
+        return INTERACTIVE, BATCH
+
+    def _pop(self, cls: str, eligible: Callable[[Task], bool]) -> Optional[Item]:
+        queue = self.queues[cls]
+        if cls == BATCH:
+            return queue.pop(eligible)
+        for i, item in enumerate(queue):
+            if eligible(item[1]):
+                del queue[i]
+                return item
+        return None
+
+    def pop(self, eligible: Callable[[Task], bool] = lambda _: True) -> Optional[Task]:
+        """按优先级取出第一个满足 eligible 的任务"""
+        for cls in self._order():
+            item = self._pop(cls, eligible)
+            if item is None:
+                continue
+            enqueued, task = item
+            self.stats[cls].add(time.time() - enqueued)
+            if cls == INTERACTIVE and len(self.queues[BATCH]):
+                self._streak += 1
+            else:
+                self._streak = 0
+            if cls == BATCH:
+                self._last_batch = time.time()
+            return task
+        return None
+
+    def purge(self, predicate: Callable[[Task], bool]) -> List[Task]:
+        """移除满足条件的任务（如已取消的任务），返回被移除的任务"""
+        removed = self.queues[BATCH].purge(predicate)
+        kept = deque()
+        for item in self.queues[INTERACTIVE]:
+            (removed if predicate(item[1]) else kept).append(item)
+        self.queues[INTERACTIVE] = kept
+        return [task for _, task in removed]
+
+    def report(self) -> Dict[str, dict]:
+        """各类任务的排队等待时间与当前队列长度"""
+        return {
+            cls: {"depth": len(self.queues[cls]), **self.stats[cls].summary()}
+            for cls in self.queues
+        }
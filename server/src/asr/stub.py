@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+
+__all__ = ["StubRecognizer"]
+
+# 合成 token 取自这段文字，循环使用
+VOCABULARY = "今天天气很好我们一起去公园散步然后回家吃饭"
+
+
+class StubResult:
+    def __init__(self, tokens: list[str], timestamps: list[float]):
+        self.tokens = tokens
+        self.timestamps = timestamps
+        self.text = "".join(tokens)
+
+
+class StubStream:
+    def __init__(self):
+        self.seconds = 0.0
+        self.result = StubResult([], [])
+
+    def accept_waveform(self, samplerate: int, samples: np.ndarray):
+        self.seconds += len(samples) / samplerate
+
+
+class StubRecognizer:
+    """
+    不需要模型的 sherpa-onnx OfflineRecognizer 替身，用于基准与容量测试
+
+    一次解码耗时 overhead + rtf × 音频总秒数（sleep 会释放 GIL，与 ONNX Runtime 相同），
+    每秒音频产出 token_rate 个 token，时间戳均匀分布；结果只取决于音频长度，可复现
+    """
+
+    def __init__(self, rtf: float = 0.05, overhead: float = 0.005, token_rate=4.0):
+        self.rtf = rtf
+        self.overhead = overhead
+        self.token_rate = token_rate
+
+    def create_stream(self) -> StubStream:
+        return StubStream()
+
+    def decode_stream(self, stream: StubStream):
+        self.decode_streams([stream])
+
+    def decode_streams(self, streams: list[StubStream]):
+        time.sleep(self.overhead + self.rtf * sum(s.seconds for s in streams))
+        for stream in streams:
+            count = int(stream.seconds * self.token_rate)
+            step = 1 / self.token_rate
+            stream.result = StubResult(
+                [VOCABULARY[i % len(VOCABULARY)] for i in range(count)],
+                [round(i * step + step / 2, 3) for i in range(count)],
+            )
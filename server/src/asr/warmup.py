@@ -0,0 +1,91 @@
+import time
+import statistics
+
+import numpy as np
+
+from ..utils import console, Task, Result
+
+__all__ = ["warm_up"]
+
+WARMUP_TEXT = "今天天气很好我们一起去公园散步然后回家吃饭"
+CHARS_PER_SECOND = 4
+
+
+def _synthetic_audio(seconds: float, rng) -> bytes:
+    """低电平噪声，足以走完特征提取与解码的全部流程"""
+    samples = rng.normal(0, 0.01, int(seconds * 16000)).astype(np.float32)
+    return samples.tobytes()
+
+
+def _task(task_id: str, data: bytes, streaming: bool = False) -> Task:
+    return Task(
+        source="mic" if streaming else "file",
+        data=data,
+        offset=0,
+        overlap=0,
+        task_id=task_id,
+        socket_id="warmup",
+        is_final=True,
+        time_start=time.time(),
+        time_submit=time.time(),
+        streaming=streaming,
+    )
+
+
+def _timed(func) -> float:
+    t = time.perf_counter()
+    func()
+    return time.perf_counter() - t
+
+
+def warm_up(
+    recognize, recognizer, streamer, punctuator, lengths, rounds=1, batch_size=1
+) -> dict:
+    """
+    用合成音频把用到的各模型按给定长度各跑 rounds 遍，batch_size 大于 1 时再跑一次满批
+
+    ONNX Runtime 的内存池分配、算子选择与图优化都在首次运行时才发生，
+    预热之后用户的第一句话与之后的识别一样快。返回各项首次与稳定后的耗时
+    """
+    rng = np.random.default_rng(0)
+    report = {}
+
+    def measure(name, func):
+        latencies = [_timed(func) for _ in range(rounds)]
+        steady = statistics.median(latencies[1:]) if rounds > 1 else latencies[0]
+        report[name] = {"first": latencies[0], "steady": steady}
+
+    for seconds in lengths:
+        data = _synthetic_audio(seconds, rng)
+        measure(
+            f"recognize {seconds:g}s",
+            lambda: recognize([_task("warmup", data)], recognizer, None),
+        )
+        if streamer is not None:
+            measure(
+                f"streaming {seconds:g}s",
+                lambda: recognize([_task("warmup", data, True)], None, streamer),
+            )
+        if punctuator is not None:
+            chars = max(1, int(seconds * CHARS_PER_SECOND))
+            text = (WARMUP_TEXT * (chars // len(WARMUP_TEXT) + 1))[:chars]
+
+            def punctuate():
+                result = Result("warmup", "warmup", "file")
+                result.text, result.is_final = text, True
+                punctuator(result)
+
+            measure(f"punctuate {chars}字", punctuate)
+
+    # 批量解码按批大小分配内存，按需单独预热一次满批
+    if batch_size > 1:
+        data = _synthetic_audio(max(lengths), rng)
+        tasks = [_task(f"warmup-{i}", data) for i in range(batch_size)]
+        measure(f"batch {batch_size}", lambda: recognize(tasks, recognizer, None))
+
+    for name, item in report.items():
+        console.print(
+            f"    预热 {name}：首次 {item['first'] * 1000:.0f}ms，"
+            f"稳定 {item['steady'] * 1000:.0f}ms"
+        )
+    return report
@@ -1,12 +1,28 @@
 import os
 import sys
+import signal
 import asyncio
-from multiprocessing import Process, Manager
 from platform import system
 
-from .asr import recognize_service
-from .net import ws_recv_service, ws_send_service
-from .utils import console, Cosmic, load_config, empty_current_working_set
+from .asr import RecognizerPool
+from .net import (
+    ws_recv_service,
+    ws_send_service,
+    request_profile,
+    Router,
+    Metrics,
+    metrics_service,
+)
+from .utils import (
+    console,
+    Cosmic,
+    AudioArena,
+    CancelSet,
+    TRACE,
+    SamplingProfiler,
+    load_config,
+    empty_current_working_set,
+)
 
 __all__ = ["start"]
 
@@ -32,15 +48,38 @@ def start():
 async def start_all_service():
     print_server_info()
     await initialize_shared_resources()
-    await start_recognizer_service()
+    start_recognizer_service()
+    install_profiler()
+    # 先绑定端口接受连接，模型载入期间收到的音频缓存在调度队列中
+    await start_websocket_service()
+
+
+async def wait_recognizer_ready():
+    """识别进程全部就绪后开始服务，并通知已连接的客户端"""
+    await Cosmic.pool.wait_ready()
     console.rule("[green3]开始服务")
     console.line()
     optimize_system()
-    await start_websocket_service()
+    Cosmic.router.broadcast({"type": "status", "status": "ready"})
+
+
+def install_profiler():
+    """启用按需剖析时，SIGUSR1 触发主进程与各识别进程各剖析一次"""
+    config = load_config().get("profiler", {})
+    if not config.get("enable", False):
+        return
+    Cosmic.profiler = SamplingProfiler("main", config)
+    if hasattr(signal, "SIGUSR1"):
+        # 在事件循环里处理信号，避免信号打断持有剖析器锁的代码而死锁
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, request_profile)
 
 
 def stop_all_service():
     Cosmic.queue_out.put(None)
+    if Cosmic.pool is not None:
+        Cosmic.pool.stop()
+    if Cosmic.arena is not None:
+        Cosmic.arena.close()
 
 
 def print_server_info():
@@ -62,24 +101,48 @@ async def start_websocket_service():
     """启动WebSocket服务"""
     recv = ws_recv_service()
     send = ws_send_service()
-    await asyncio.gather(recv, send)
-
-
-async def start_recognizer_service():
-    """启动并等待识别子进程初始化完成"""
-    recognize_process = Process(
-        target=recognize_service,
-        args=(Cosmic.queue_in, Cosmic.queue_out, Cosmic.sockets_id),
-        daemon=True,
+    pool = Cosmic.pool.serve()
+    services = [recv, send, pool, wait_recognizer_ready()]
+    metrics_config = load_config().get("metrics", {})
+    if metrics_config.get("enable", False):
+        services.append(
+            metrics_service(metrics_config, Cosmic.metrics, Cosmic.pool, Cosmic.router)
+        )
+    await asyncio.gather(*services)
+
+
+def start_recognizer_service():
+    """启动识别子进程，不等待模型载入"""
+    config = load_config()
+    scheduler_config = dict(config.get("scheduler", {}))
+    if not scheduler_config.get("max_inflight"):
+        # 默认每个进程只积压一批，麦克风任务最多等正在解码的那一批
+        batch = config.get("batch", {})
+        batch_size = batch.get("max_size", 1) if batch.get("enable") else 1
+        scheduler_config["max_inflight"] = batch_size
+    Cosmic.pool = RecognizerPool(
+        Cosmic.queue_out,
+        Cosmic.cancelled,
+        config.get("pool", {}),
+        Cosmic.arena,
+        scheduler_config,
     )
-    recognize_process.start()
-    # 等待子进程初始化完成
-    Cosmic.queue_out.get()
+    Cosmic.pool.launch()
 
 
 async def initialize_shared_resources():
     """初始化跨进程共享资源"""
-    Cosmic.sockets_id = Manager().list()
+    Cosmic.cancelled = CancelSet()
+    Cosmic.router = Router(load_config()["server"])
+    Cosmic.metrics = Metrics()
+    TRACE.configure(load_config().get("trace", {}))
+
+    # 音频片段经共享内存传给识别进程，队列里只传描述符
+    shm_config = load_config().get("shm", {})
+    if shm_config.get("enable", False):
+        slot_size = 4 * 16000 * shm_config.get("slot_seconds", 30)
+        min_bytes = int(4 * 16000 * shm_config.get("min_seconds", 1.0))
+        Cosmic.arena = AudioArena(shm_config.get("slots", 16), slot_size, min_bytes)
 
 
 def optimize_system():
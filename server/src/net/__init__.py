@@ -1,3 +1,12 @@
-from .ws import ws_recv_service, ws_send_service
+from .ws import ws_recv_service, ws_send_service, request_profile
+from .router import Router
+from .metrics import Metrics, metrics_service
 
-__all__ = ["ws_recv_service", "ws_send_service"]
+__all__ = [
+    "ws_recv_service",
+    "ws_send_service",
+    "request_profile",
+    "Router",
+    "Metrics",
+    "metrics_service",
+]
@@ -0,0 +1,94 @@
+import zlib
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+__all__ = ["LEVELS", "DeltaEncoder", "checksum", "common_prefix"]
+
+# 客户端可订阅的结果级别
+#   full：每条消息都带完整的 tokens/timestamps/text（旧版客户端的默认行为）
+#   final：只发最终结果，以及流式识别在端点确定的句子
+#   progress：中间结果只带进度（duration），最终结果完整
+#   text：中间结果与最终结果只带新增的文字
+#   tokens：在 text 的基础上再带新增的 tokens/timestamps
+LEVELS = ("full", "final", "progress", "text", "tokens")
+
+# 进度消息保留的字段
+PROGRESS_KEYS = ("task_id", "duration", "time_start", "time_submit", "time_complete")
+
+
+def checksum(text: str) -> int:
+    """最终文字的 CRC32，客户端拼接增量后据此校验"""
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def common_prefix(old: Sequence, new: Sequence) -> int:
+    """两个序列公共前缀的长度；通常 new 只是在 old 之后追加，先走快速路径"""
+    if len(new) >= len(old) and new[: len(old)] == old:
+        return len(old)
+    low, high = 0, min(len(old), len(new))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if old[:mid] == new[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class DeltaEncoder:
+    """
+    按连接记录每个任务已发出的文字与 token，把完整结果改写为订阅级别的消息
+
+    增量消息中 text_start/token_start 表示从该位置起替换：流式识别与增量标点
+    可能改写末尾，客户端截断到该位置再追加即可
+    """
+
+    def __init__(self, max_tasks: int = 64):
+        self.max_tasks = max_tasks
+        # task_id -> (已发出的文字, 已发出的 tokens)
+        self._sent: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def encode(self, level: str, message: dict) -> Optional[dict]:
+        """返回要发送的消息，不需要发送时返回 None"""
+        if level == "full" or "type" in message:
+            # 状态等控制消息原样发出
+            return message
+        is_final = message["is_final"]
+        if level == "final":
+            # 流式识别在端点确定的句子也算最终结果
+            return message if is_final or "sentence" in message else None
+        if level == "progress":
+            if is_final:
+                return message
+            delta = {key: message[key] for key in PROGRESS_KEYS}
+            for key in ("sentence", "spans"):
+                if key in message:
+                    delta[key] = message[key]
+            return {**delta, "level": level, "is_final": False}
+
+        task_id = message["task_id"]
+        text, tokens = self._sent.pop(task_id, ("", []))
+        delta = {key: message[key] for key in PROGRESS_KEYS}
+        delta.update(level=level, is_final=is_final)
+
+        start = common_prefix(text, message["text"])
+        delta.update(text_start=start, text=message["text"][start:])
+        if level == "tokens":
+            start = common_prefix(tokens, message["tokens"])
+            delta.update(
+                token_start=start,
+                tokens=message["tokens"][start:],
+                timestamps=message["timestamps"][start:],
+            )
+
+        for key in ("sentence", "spans"):
+            if key in message:
+                delta[key] = message[key]
+        if is_final:
+            delta["checksum"] = checksum(message["text"])
+            delta["token_count"] = len(message["tokens"])
+        else:
+            self._sent[task_id] = (message["text"], message["tokens"])
+            while len(self._sent) > self.max_tasks:
+                self._sent.popitem(last=False)
+        return delta
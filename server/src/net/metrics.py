@@ -0,0 +1,290 @@
+import os
+import sys
+import ctypes
+import asyncio
+from typing import Optional
+
+from ..utils import console, Histogram, Result
+
+__all__ = ["Metrics", "metrics_service", "process_rss"]
+
+PREFIX = "capswriter"
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """进程的常驻内存（字节），读取失败返回 None"""
+    try:
+        if sys.platform == "win32":
+            return _windows_rss(pid)
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _windows_rss(pid: int) -> Optional[int]:
+    class Counters(ctypes.Structure):
+        _fields_ = [
+            ("cb", ctypes.c_ulong),
+            ("PageFaultCount", ctypes.c_ulong),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    # PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ
+    handle = ctypes.windll.kernel32.OpenProcess(0x1000 | 0x0010, False, pid)
+    if not handle:
+        return None
+    try:
+        counters = Counters()
+        counters.cb = ctypes.sizeof(Counters)
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(
+            handle, ctypes.byref(counters), counters.cb
+        ):
+            return None
+        return counters.WorkingSetSize
+    finally:
+        ctypes.windll.kernel32.CloseHandle(handle)
+
+
+class _Writer:
+    """按 Prometheus 文本格式逐行输出，每个指标名只写一次 HELP/TYPE"""
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self._declared: set[str] = set()
+
+    def sample(self, name, kind, help, value, labels: Optional[dict] = None):
+        name = f"{PREFIX}_{name}"
+        if name not in self._declared:
+            self._declared.add(name)
+            self.lines.append(f"# HELP {name} {help}")
+            self.lines.append(f"# TYPE {name} {kind}")
+        self.lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name, help, histogram: Histogram, labels=None):
+        labels = labels or {}
+        full = f"{PREFIX}_{name}"
+        if full not in self._declared:
+            self._declared.add(full)
+            self.lines.append(f"# HELP {full} {help}")
+            self.lines.append(f"# TYPE {full} histogram")
+        for le, count in histogram.cumulative():
+            self.lines.append(f"{full}_bucket{_labels({**labels, 'le': le})} {count}")
+        self.lines.append(f"{full}_sum{_labels(labels)} {_number(histogram.sum)}")
+        self.lines.append(f"{full}_count{_labels(labels)} {histogram.count}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _number(value) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _labels(labels: Optional[dict]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+class Metrics:
+    """
+    主进程汇总的运行指标，以 Prometheus 文本格式输出
+
+    识别结果经 observe() 累计解码与标点耗时；排队深度、排队等待、连接数与
+    各识别进程的内存在 render() 时从进程池与路由表现取
+    """
+
+    def __init__(self):
+        self.results: dict[str, int] = {}
+        self.audio_seconds: dict[str, float] = {}
+        self.cpu_seconds: dict[str, float] = {}
+        self.decode: dict[str, Histogram] = {}
+        self.latency: dict[str, Histogram] = {}
+        self.punctuation = Histogram()
+
+    def observe(self, result: Result):
+        """累计一条识别结果，source 为 mic 或 file"""
+        source = result.source
+        self.results[source] = self.results.get(source, 0) + 1
+        self.audio_seconds[source] = (
+            self.audio_seconds.get(source, 0.0) + result.audio_seconds
+        )
+        self.cpu_seconds[source] = self.cpu_seconds.get(source, 0.0) + result.cpu_time
+        self.decode.setdefault(source, Histogram()).observe(result.decode_time)
+        if result.time_complete and result.time_submit:
+            self.latency.setdefault(source, Histogram()).observe(
+                max(0.0, result.time_complete - result.time_submit)
+            )
+        if result.punc_time:
+            self.punctuation.observe(result.punc_time)
+
+    def render(self, pool=None, router=None) -> str:
+        out = _Writer()
+        for source, count in self.results.items():
+            labels = {"source": source}
+            out.sample("results_total", "counter", "识别结果数", count, labels)
+            out.sample(
+                "audio_seconds_total",
+                "counter",
+                "已识别的音频秒数",
+                self.audio_seconds[source],
+                labels,
+            )
+            out.sample(
+                "decode_cpu_seconds_total",
+                "counter",
+                "识别花费的 CPU 秒数",
+                self.cpu_seconds[source],
+                labels,
+            )
+            if self.audio_seconds[source] > 0:
+                out.sample(
+                    "decode_rtf",
+                    "gauge",
+                    "实时率：识别 CPU 秒数 / 音频秒数",
+                    self.cpu_seconds[source] / self.audio_seconds[source],
+                    labels,
+                )
+        for source, histogram in self.decode.items():
+            out.histogram(
+                "decode_seconds", "一批解码的耗时", histogram, {"source": source}
+            )
+        for source, histogram in self.latency.items():
+            out.histogram(
+                "result_latency_seconds",
+                "片段提交到识别完成的耗时",
+                histogram,
+                {"source": source},
+            )
+        out.histogram("punctuation_seconds", "加标点的耗时", self.punctuation)
+
+        if pool is not None:
+            for cls, depth in pool.scheduler.depth().items():
+                out.sample(
+                    "queue_depth", "gauge", "调度队列中的片段数", depth, {"class": cls}
+                )
+            for cls, stats in pool.scheduler.stats.items():
+                out.histogram(
+                    "queue_wait_seconds",
+                    "片段在调度队列中的等待时间",
+                    stats.histogram,
+                    {"class": cls},
+                )
+            out.sample("workers", "gauge", "识别进程数", len(pool.active_workers))
+            for worker in pool.workers:
+                labels = {"worker": worker.index}
+                out.sample(
+                    "worker_pending",
+                    "gauge",
+                    "已派发未完成的片段数",
+                    worker.pending,
+                    labels,
+                )
+                out.sample(
+                    "worker_ready", "gauge", "模型是否已载入", int(worker.ready), labels
+                )
+                rss = process_rss(worker.process.pid) if worker.process.pid else None
+                if rss is not None:
+                    out.sample(
+                        "worker_rss_bytes", "gauge", "识别进程的常驻内存", rss, labels
+                    )
+
+        if router is not None:
+            stats = router.stats()
+            out.sample("connections", "gauge", "活动连接数", len(stats))
+            out.sample(
+                "send_backlog",
+                "gauge",
+                "各连接待发送的消息数",
+                sum(s["backlog"] for s in stats.values()),
+            )
+            out.sample(
+                "slow_disconnects_total",
+                "counter",
+                "因接收过慢被断开的连接数",
+                router.slow_disconnects,
+            )
+            for socket_id, s in stats.items():
+                labels = {"socket": socket_id}
+                out.sample(
+                    "connection_backlog",
+                    "gauge",
+                    "待发送的消息数",
+                    s["backlog"],
+                    labels,
+                )
+                out.sample(
+                    "connection_dropped",
+                    "gauge",
+                    "被替换或丢弃的中间结果数",
+                    s["dropped"],
+                    labels,
+                )
+                out.sample(
+                    "connection_sent_bytes",
+                    "gauge",
+                    "已发送的字节数",
+                    s["bytes_sent"],
+                    labels,
+                )
+                out.sample(
+                    "connection_decoded_seconds",
+                    "gauge",
+                    "已识别的音频秒数",
+                    s["decoded_seconds"],
+                    labels,
+                )
+                out.sample(
+                    "connection_cpu_seconds",
+                    "gauge",
+                    "识别进程为该连接花费的 CPU 秒数",
+                    s["cpu_time"],
+                    labels,
+                )
+        return out.text()
+
+
+async def metrics_service(config: dict, metrics: Metrics, pool=None, router=None):
+    """在独立端口上提供 GET /metrics，其余路径返回 404"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readline()
+            # 读完请求头
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1] == "/metrics":
+                status = "200 OK"
+                body = metrics.render(pool, router).encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except Exception as e:
+            console.print(f"指标请求出错：{e}", style="bright_red")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, config["addr"], config["port"])
+    console.print(
+        f"指标地址：[cyan underline]http://{config['addr']}:{config['port']}/metrics",
+        end="\n\n",
+    )
+    async with server:
+        await server.serve_forever()
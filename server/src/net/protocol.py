@@ -0,0 +1,119 @@
+import json
+import uuid
+import struct
+import asyncio
+from base64 import b64decode
+from typing import Union
+
+import numpy as np
+
+__all__ = [
+    "HEADER",
+    "FLAG_FINAL",
+    "FLAG_FILE",
+    "FLAG_INT16",
+    "pack_frame",
+    "unpack_frame",
+    "decode_message",
+]
+
+# v2 二进制帧头（小端）：
+#   magic(2s) version(B) flags(B) seg_duration(f) seg_overlap(f)
+#   time_start(d) time_frame(d) offset(Q, 本帧首个采样的序号)
+#   task_id(16s, uuid) extra_len(H)
+# 帧头之后是 extra_len 字节的 JSON 扩展字段，再之后是 PCM 数据
+HEADER = struct.Struct("<2sBBffddQ16sH")
+MAGIC = b"CW"
+VERSION = 2
+
+FLAG_FINAL = 1  # 是否结束
+FLAG_FILE = 2  # 数据来源：文件；否则为麦克风
+FLAG_INT16 = 4  # 采样格式 int16；否则为 float32
+
+# 超过这个大小的消息放到线程里解码，避免阻塞事件循环
+OFFLOAD_SIZE = 64 * 1024
+
+
+def pack_frame(message: dict, int16: bool = False) -> bytes:
+    """把与 JSON 协议字段相同的消息（data 为 float32 bytes）打包为二进制帧"""
+    data = message["data"]
+    flags = FLAG_FINAL if message["is_final"] else 0
+    if message["source"] == "file":
+        flags |= FLAG_FILE
+    if int16:
+        flags |= FLAG_INT16
+        samples = np.frombuffer(data, dtype=np.float32)
+        data = (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+
+    extra = message.get("extra")
+    extra = json.dumps(extra).encode("utf-8") if extra else b""
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        flags,
+        message["seg_duration"],
+        message["seg_overlap"],
+        message["time_start"],
+        message["time_frame"],
+        message.get("offset", 0),
+        uuid.UUID(message["task_id"]).bytes,
+        len(extra),
+    )
+    return header + extra + data
+
+
+def unpack_frame(frame: bytes) -> dict:
+    """解析二进制帧，返回与 JSON 协议相同字段的消息，data 为 float32 bytes"""
+    (
+        magic,
+        version,
+        flags,
+        seg_duration,
+        seg_overlap,
+        time_start,
+        time_frame,
+        offset,
+        task_id,
+        extra_len,
+    ) = HEADER.unpack_from(frame)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"未知的帧头：{magic!r} v{version}")
+
+    start = HEADER.size + extra_len
+    extra = json.loads(frame[HEADER.size : start]) if extra_len else {}
+    payload = memoryview(frame)[start:]
+    if flags & FLAG_INT16:
+        samples = np.frombuffer(payload, dtype="<i2").astype(np.float32) / 32767
+        data = samples.tobytes()
+    else:
+        data = payload
+
+    return {
+        "task_id": str(uuid.UUID(bytes=task_id)),
+        "seg_duration": seg_duration,
+        "seg_overlap": seg_overlap,
+        "is_final": bool(flags & FLAG_FINAL),
+        "time_start": time_start,
+        "time_frame": time_frame,
+        "offset": offset,
+        "source": "file" if flags & FLAG_FILE else "mic",
+        "data": data,
+        "extra": extra,
+    }
+
+
+def _decode(message: Union[str, bytes]) -> dict:
+    if isinstance(message, bytes):
+        return unpack_frame(message)
+    # 旧版客户端：JSON + base64
+    message = json.loads(message)
+    if "data" in message:
+        message["data"] = b64decode(message["data"])
+    return message
+
+
+async def decode_message(message: Union[str, bytes]) -> dict:
+    """解码收到的消息，大消息放到线程中处理"""
+    if len(message) > OFFLOAD_SIZE:
+        return await asyncio.to_thread(_decode, message)
+    return _decode(message)
@@ -0,0 +1,69 @@
+from typing import Iterator
+
+import numpy as np
+
+__all__ = ["RingBuffer"]
+
+
+class RingBuffer:
+    """
+    预分配、可增长的音频缓冲区
+
+    写指针到达末尾时，把未读的残余（不足一个分段）挪回开头再继续写，
+    因此切出的窗口总是连续内存，可以直接以 memoryview 交出而不拷贝；
+    容量不够时才扩容。窗口在下一次 write 之前有效
+    """
+
+    def __init__(self, capacity: int = 4 * 16000 * 60):
+        self._buf = np.empty(capacity, dtype=np.uint8)
+        self._head = 0  # 读位置
+        self._tail = 0  # 写位置
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    def write(self, data):
+        n = len(data)
+        if self._tail + n > len(self._buf):
+            self._compact(n)
+        self._buf[self._tail : self._tail + n] = np.frombuffer(data, dtype=np.uint8)
+        self._tail += n
+
+    def _compact(self, n: int):
+        """把未读部分挪到开头，仍放不下时扩容"""
+        size = len(self)
+        if size + n > len(self._buf):
+            # 留出四分之一余量，避免相近大小的写入反复扩容
+            buf = np.empty((size + n) * 5 // 4, dtype=np.uint8)
+            buf[:size] = self._buf[self._head : self._tail]
+            self._buf = buf
+        else:
+            self._buf[:size] = self._buf[self._head : self._tail]
+        self._head, self._tail = 0, size
+
+    def peek(self, n: int) -> memoryview:
+        """不拷贝地查看开头的 n 个字节"""
+        n = min(n, len(self))
+        return memoryview(self._buf[self._head : self._head + n])
+
+    def consume(self, n: int):
+        self._head = min(self._head + n, self._tail)
+        if self._head == self._tail:
+            self._head = self._tail = 0
+
+    def clear(self):
+        self._head = self._tail = 0
+
+    def cut(self, window: int, step: int, threshold: int) -> Iterator[memoryview]:
+        """
+        长度达到 threshold 时，切出 window 字节的窗口并前移 step 字节
+
+        窗口需在迭代到下一个之前用完（转为 bytes）
+        """
+        while len(self) >= threshold:
+            yield self.peek(window)
+            self.consume(step)
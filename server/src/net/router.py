@@ -0,0 +1,195 @@
+import json
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+
+import websockets
+
+from .delta import LEVELS, DeltaEncoder
+from ..utils import console
+
+__all__ = ["Connection", "Router"]
+
+
+class Connection:
+    """
+    一个客户端连接，拥有独立的有界发送队列和发送协程
+
+    慢客户端不会拖住其它连接：同一任务的旧中间结果会被新结果替换，
+    队列满时丢弃最旧的中间结果；积压持续超过 slow_timeout 秒则断开
+    """
+
+    def __init__(self, websocket, maxsize: int = 64, slow_timeout: float = 10.0):
+        self.websocket = websocket
+        self.id = str(websocket.id)
+        self.maxsize = maxsize
+        self.slow_timeout = slow_timeout
+
+        self._queue: deque = deque()  # (task_id, is_final, message)
+        self._event = asyncio.Event()
+        self._slow_since: Optional[float] = None
+        self.slow = False  # 已判定为慢客户端并断开
+        self._sender: Optional[asyncio.Task] = None
+
+        self.level = "full"  # 订阅的结果级别，见 delta.LEVELS
+        # 以 binary 子协议连接的是新版客户端，能处理状态消息
+        self.v2 = getattr(websocket, "subprotocol", None) == "binary"
+        self._deltas = DeltaEncoder()
+
+        # 统计
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.decoded_seconds = 0.0  # 已识别的音频秒数
+        self.cpu_time = 0.0  # 识别进程为该连接花费的 CPU 时间
+
+    @property
+    def backlog(self) -> int:
+        return len(self._queue)
+
+    def start(self):
+        self._sender = asyncio.create_task(self._send_loop())
+
+    async def close(self):
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+
+    def push(self, task_id, is_final: bool, message: dict):
+        """放入发送队列，必要时丢弃过期的中间结果"""
+        if self.level == "final" and not is_final:
+            return
+        if not is_final:
+            # 同一任务还没发出去的中间结果已经过期，直接替换
+            for i, (tid, final, _) in enumerate(self._queue):
+                if tid == task_id and not final:
+                    self._queue[i] = (task_id, is_final, message)
+                    self.dropped += 1
+                    return
+
+        if len(self._queue) >= self.maxsize and not self._drop_oldest_partial():
+            if not is_final:
+                self.dropped += 1
+                return
+        self._queue.append((task_id, is_final, message))
+        self._check_slow()
+        self._event.set()
+
+    def _drop_oldest_partial(self) -> bool:
+        for i, (_, final, _) in enumerate(self._queue):
+            if not final:
+                del self._queue[i]
+                self.dropped += 1
+                return True
+        return False
+
+    def _check_slow(self):
+        """队列持续处于满载状态，判定为慢客户端并断开"""
+        if len(self._queue) < self.maxsize:
+            self._slow_since = None
+            return
+        now = time.time()
+        if self._slow_since is None:
+            self._slow_since = now
+        elif now - self._slow_since > self.slow_timeout and not self.slow:
+            self.slow = True
+            console.print(f"客户端 {self.id} 接收过慢，断开连接", style="bright_red")
+            asyncio.create_task(self.websocket.close(1008, "too slow"))
+
+    async def _send_loop(self):
+        while True:
+            await self._event.wait()
+            if not self._queue:
+                self._event.clear()
+                continue
+            _, _, message = self._queue.popleft()
+            # 增量相对于已发出的内容计算，被替换掉的中间结果不影响
+            message = self._deltas.encode(self.level, message)
+            if message is None:
+                continue
+            payload = json.dumps(message)
+            try:
+                await self.websocket.send(payload)
+            except websockets.ConnectionClosed:
+                return
+            self.sent += 1
+            self.bytes_sent += len(payload)
+            self._check_slow()
+
+    def stats(self) -> dict:
+        return {
+            "backlog": self.backlog,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "bytes_sent": self.bytes_sent,
+            "decoded_seconds": self.decoded_seconds,
+            "cpu_time": self.cpu_time,
+        }
+
+
+class Router:
+    """以 socket id 为键的连接路由表"""
+
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
+        self.maxsize = config.get("send_queue_size", 64)
+        self.slow_timeout = config.get("slow_timeout", 10.0)
+        self.connections: Dict[str, Connection] = {}
+        self.slow_disconnects = 0  # 因接收过慢被断开的连接数
+
+    def register(self, websocket) -> Connection:
+        connection = Connection(websocket, self.maxsize, self.slow_timeout)
+        self.connections[connection.id] = connection
+        connection.start()
+        return connection
+
+    async def unregister(self, socket_id: str):
+        connection = self.connections.pop(socket_id, None)
+        if connection is not None:
+            self.slow_disconnects += connection.slow
+            await connection.close()
+            if connection.decoded_seconds:
+                console.print(
+                    f"连接 {socket_id} 断开：共识别 {connection.decoded_seconds:.1f}s 音频，"
+                    f"CPU {connection.cpu_time:.2f}s"
+                )
+
+    def route(self, socket_id: str, task_id, is_final: bool, message: dict) -> bool:
+        """把消息交给对应连接，连接已不存在时返回 False"""
+        connection = self.connections.get(socket_id)
+        if connection is None:
+            return False
+        connection.push(task_id, is_final, message)
+        return True
+
+    def notify(self, socket_id: str, message: dict) -> bool:
+        """给新版客户端发送状态消息，旧版客户端不认识，不发"""
+        connection = self.connections.get(socket_id)
+        if connection is None or not connection.v2:
+            return False
+        connection.push(None, True, message)
+        return True
+
+    def broadcast(self, message: dict):
+        for socket_id in list(self.connections):
+            self.notify(socket_id, message)
+
+    def subscribe(self, socket_id: str, level: str):
+        """设置连接订阅的结果级别"""
+        if level not in LEVELS:
+            raise ValueError(f"Unsupported level: {level!r}")
+        connection = self.connections.get(socket_id)
+        if connection is not None:
+            connection.level = level
+
+    def account(self, socket_id: str, audio_seconds: float, cpu_time: float):
+        """累计某连接的识别开销，连接已断开则忽略"""
+        connection = self.connections.get(socket_id)
+        if connection is not None:
+            connection.decoded_seconds += audio_seconds
+            connection.cpu_time += cpu_time
+
+    def stats(self) -> Dict[str, dict]:
+        """各连接的发送积压与计数"""
+        return {sid: c.stats() for sid, c in self.connections.items()}
@@ -0,0 +1,220 @@
+from typing import List, Tuple
+
+import numpy as np
+
+__all__ = ["EnergyVad", "SileroVad", "VadSegmenter", "create_segmenter"]
+
+SAMPLE_RATE = 16000
+
+# 语音区间：[起始采样, 结束采样)，均为从音频开头算起的绝对位置
+Span = Tuple[int, int]
+
+
+class EnergyVad:
+    """
+    基于短时能量的简易 VAD，不需要模型，便于测试
+
+    帧能量高于 energy_db 即为语音；静音持续 min_silence 秒则结束一段语音，
+    短于 min_speech 的语音丢弃，超过 max_speech 的语音强制切开
+    """
+
+    def __init__(
+        self,
+        energy_db: float = -40.0,
+        min_silence: float = 0.5,
+        min_speech: float = 0.25,
+        max_speech: float = 25.0,
+        pad: float = 0.2,
+        frame: float = 0.03,
+    ):
+        self.threshold = 10 ** (energy_db / 10)
+        self.frame = int(frame * SAMPLE_RATE)
+        self.min_silence = int(min_silence / frame)
+        self.min_speech = int(min_speech * SAMPLE_RATE)
+        self.max_speech = int(max_speech * SAMPLE_RATE)
+        self.pad = int(pad * SAMPLE_RATE)
+
+        self._rest = np.empty(0, dtype=np.float32)  # 不足一帧的残余
+        self._pos = 0  # 下一帧的绝对位置
+        self._start = -1  # 当前语音的起点，-1 表示处于静音
+        self._silence = 0  # 连续静音帧数
+
+    def accept(self, samples: np.ndarray) -> List[Span]:
+        samples = np.concatenate([self._rest, samples])
+        frames = len(samples) // self.frame
+        self._rest = samples[frames * self.frame :]
+        if not frames:
+            return []
+
+        power = np.mean(
+            np.square(samples[: frames * self.frame].reshape(frames, self.frame)),
+            axis=1,
+        )
+        spans = []
+        for speech in power > self.threshold:
+            if speech:
+                if self._start < 0:
+                    self._start = max(self._pos - self.pad, 0)
+                self._silence = 0
+            elif self._start >= 0:
+                self._silence += 1
+                if self._silence >= self.min_silence:
+                    end = self._pos - (self._silence - 1) * self.frame + self.pad
+                    self._close(end, spans)
+            self._pos += self.frame
+
+            # 再加一帧就超长的语音，在此处强制切开
+            if (
+                self._start >= 0
+                and self._pos + self.frame - self._start > self.max_speech
+            ):
+                start = self._pos
+                self._close(self._pos, spans)
+                self._start = start
+        return spans
+
+    def _close(self, end: int, spans: List[Span]):
+        if end - self._start >= self.min_speech:
+            spans.append((self._start, end))
+        self._start = -1
+        self._silence = 0
+
+    def flush(self) -> List[Span]:
+        spans: List[Span] = []
+        end = self._pos + len(self._rest)
+        if self._start >= 0:
+            self._close(end - self._silence * self.frame, spans)
+        return spans
+
+
+class SileroVad:
+    """sherpa-onnx 的 Silero VAD"""
+
+    def __init__(
+        self,
+        model: str,
+        threshold: float = 0.5,
+        min_silence: float = 0.5,
+        min_speech: float = 0.25,
+        max_speech: float = 25.0,
+    ):
+        import sherpa_onnx
+
+        config = sherpa_onnx.VadModelConfig()
+        config.silero_vad.model = model
+        config.silero_vad.threshold = threshold
+        config.silero_vad.min_silence_duration = min_silence
+        config.silero_vad.min_speech_duration = min_speech
+        config.silero_vad.max_speech_duration = max_speech
+        config.sample_rate = SAMPLE_RATE
+        self.window = config.silero_vad.window_size
+        self._vad = sherpa_onnx.VoiceActivityDetector(
+            config, buffer_size_in_seconds=max_speech * 2
+        )
+        self._rest = np.empty(0, dtype=np.float32)
+
+    def accept(self, samples: np.ndarray) -> List[Span]:
+        samples = np.concatenate([self._rest, samples])
+        windows = len(samples) // self.window
+        for i in range(windows):
+            self._vad.accept_waveform(samples[i * self.window : (i + 1) * self.window])
+        self._rest = samples[windows * self.window :]
+        return self._drain()
+
+    def flush(self) -> List[Span]:
+        self._vad.accept_waveform(self._rest)
+        self._rest = np.empty(0, dtype=np.float32)
+        self._vad.flush()
+        return self._drain()
+
+    def _drain(self) -> List[Span]:
+        spans = []
+        while not self._vad.empty():
+            segment = self._vad.front
+            spans.append((segment.start, segment.start + len(segment.samples)))
+            self._vad.pop()
+        return spans
+
+
+class VadSegmenter:
+    """
+    根据 VAD 给出的语音区间切分音频
+
+    间隔不超过 max_gap 秒的相邻语音合并为一个片段（连同其间的短暂停顿），
+    片段不超过 max_duration 秒；更长的静音直接跳过，不送去识别
+    """
+
+    def __init__(self, vad, max_duration: float, max_gap: float = 1.0):
+        self.vad = vad
+        self.max_len = int(max_duration * SAMPLE_RATE)
+        self.max_gap = int(max_gap * SAMPLE_RATE)
+
+        self._audio = np.empty(0, dtype=np.float32)  # 尚可能被用到的音频
+        self._base = 0  # _audio[0] 的绝对位置
+        self._pending: List[int] = []  # 待合并的片段 [start, end]
+
+    @property
+    def position(self) -> int:
+        return self._base + len(self._audio)
+
+    def accept(self, samples: np.ndarray) -> List[Tuple[float, np.ndarray]]:
+        """送入音频，返回已确定的片段 [(起始秒数, 采样)]"""
+        self._audio = np.concatenate([self._audio, samples])
+        segments = self._merge(self.vad.accept(samples))
+
+        # 语音之后已经静默足够久，不必再等
+        if self._pending and self.position - self._pending[1] > self.max_gap:
+            segments.append(self._emit())
+        self._trim()
+        return segments
+
+    def flush(self) -> List[Tuple[float, np.ndarray]]:
+        segments = self._merge(self.vad.flush())
+        if self._pending:
+            segments.append(self._emit())
+        self._audio = np.empty(0, dtype=np.float32)
+        return segments
+
+    def _merge(self, spans: List[Span]) -> List[Tuple[float, np.ndarray]]:
+        segments = []
+        for start, end in spans:
+            start, end = max(start, self._base), min(end, self.position)
+            if self._pending and (
+                start - self._pending[1] > self.max_gap
+                or end - self._pending[0] > self.max_len
+            ):
+                segments.append(self._emit())
+            if self._pending:
+                self._pending[1] = end
+            else:
+                self._pending = [start, end]
+        return segments
+
+    def _emit(self) -> Tuple[float, np.ndarray]:
+        start, end = self._pending
+        self._pending = []
+        samples = self._audio[start - self._base : end - self._base]
+        return start / SAMPLE_RATE, samples
+
+    def _trim(self):
+        """丢弃不会再被用到的音频，只保留未决片段和最长一段语音"""
+        keep = self.position - self.max_len - self.max_gap
+        if self._pending:
+            keep = min(keep, self._pending[0])
+        if keep > self._base:
+            self._audio = self._audio[keep - self._base :]
+            self._base = keep
+
+
+def create_segmenter(config: dict, max_duration: float) -> VadSegmenter:
+    """按 [vad] 配置创建分段器"""
+    kwargs = {
+        "min_silence": config.get("min_silence", 0.5),
+        "min_speech": config.get("min_speech", 0.25),
+        "max_speech": max_duration,
+    }
+    if config.get("type", "silero") == "energy":
+        vad = EnergyVad(energy_db=config.get("energy_db", -40.0), **kwargs)
+    else:
+        vad = SileroVad(config["model"], config.get("threshold", 0.5), **kwargs)
+    return VadSegmenter(vad, max_duration, config.get("max_gap", 1.0))
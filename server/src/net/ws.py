@@ -1,18 +1,22 @@
+import hmac
 import time
-import json
 import asyncio
-from base64 import b64decode
 
+import numpy as np
 import websockets
 
+from .protocol import decode_message
+from .ring_buffer import RingBuffer
+from .vad import create_segmenter
 from ..utils import load_config, Cosmic, console, Status, Task, Result
+from ..utils import TRACE, span_end
 
-__all__ = ["ws_send_service", "ws_recv_service"]
+__all__ = ["ws_send_service", "ws_recv_service", "request_profile"]
 
 
 async def ws_send_service():
     queue_out = Cosmic.queue_out
-    sockets = Cosmic.sockets
+    router = Cosmic.router
 
     while True:
         try:
@@ -24,6 +28,26 @@ async def ws_send_service():
                 print("收到None，退出循环")  # 调试信息
                 return
 
+            # 识别进程交出结果后可能有空位，让积压的任务尽快派发
+            if Cosmic.pool is not None:
+                Cosmic.pool.wake()
+            router.account(result.socket_id, result.audio_seconds, result.cpu_time)
+            span_end(result, "deliver")
+            if Cosmic.metrics is not None:
+                Cosmic.metrics.observe(result)
+
+            if result.error:
+                # 任务失败（如结果被清理），告知新版客户端；最终消息照常发出
+                router.notify(
+                    result.socket_id,
+                    {
+                        "type": "status",
+                        "status": "failed",
+                        "task_id": result.task_id,
+                        "reason": result.error,
+                    },
+                )
+
             # 构建消息
             message = {
                 "task_id": result.task_id,
@@ -32,24 +56,25 @@ async def ws_send_service():
                 "time_submit": result.time_submit,
                 "time_complete": result.time_complete,
                 "tokens": result.tokens,
-                "timestamps": result.timestamps,
+                "timestamps": result.timestamps.tolist(),
                 "text": result.text,
                 "is_final": result.is_final,
             }
-
-            # 获得 socket
-            websocket = next(
-                (ws for ws in sockets.values() if str(ws.id) == result.socket_id),
-                None,
-            )
-
-            if not websocket:
+            if result.sentence is not None:
+                # 流式识别在端点确定的一句
+                message["sentence"] = result.sentence
+            if result.spans:
+                # 开启追踪时带上服务端各阶段的时刻，并写入追踪文件
+                message["spans"] = result.spans
+                TRACE.write(result.task_id, result.spans)
+
+            # 交给对应连接的发送队列，由各自的发送协程发出
+            # 最终结果与确定的句子不能被后来的中间结果替换或丢弃
+            keep = result.is_final or result.sentence is not None
+            if not router.route(result.socket_id, result.task_id, keep, message):
                 continue
 
-            # 发送消息
-            await websocket.send(json.dumps(message))
-
-            if result.source == "mic":
+            if result.source == "mic" and result.is_final:
                 console.print(f"识别结果：\n    [green]{result.text}")
             elif result.source == "file":
                 console.print(f"    转录进度：{result.duration:.2f}s", end="\r")
@@ -87,12 +112,12 @@ status_mic = Status("正在接收音频", spinner="point")
 async def _ws_recv(websocket):
     global status_mic
 
-    # 登记 socket 到字典，以 socket id 字符串为索引
-    sockets = Cosmic.sockets
-    sockets_id = Cosmic.sockets_id
-    sockets[str(websocket.id)] = websocket
-    sockets_id.append(str(websocket.id))
+    # 登记连接到路由表，以 socket id 字符串为索引
+    router = Cosmic.router
+    router.register(websocket)
     console.print(f"接客了：{websocket}\n", style="yellow")
+    if not Cosmic.pool.ready:
+        router.notify(str(websocket.id), {"type": "status", "status": "warming_up"})
 
     # # 设定分段长度
     # seg_duration = 15
@@ -105,10 +130,28 @@ async def _ws_recv(websocket):
     # 接收数据
     try:
         async for message in websocket:
-            # json 解码字符串
-            message = json.loads(message)
+            # 解码消息：二进制帧（v2）或 JSON 字符串（旧版）
+            t = time.time()
+            message = await decode_message(message)
+            decoded = time.time()
+
+            # 控制消息：取消任务
+            if message.get("type") == "cancel":
+                cancel_handler(message["task_id"], cache)
+                continue
+
+            # 管理消息：按需剖析
+            if message.get("type") == "profile":
+                profile_handler(str(websocket.id), message)
+                continue
+
+            # 控制消息：订阅结果级别
+            if message.get("type") == "subscribe":
+                subscribe_handler(str(websocket.id), message.get("level", "full"))
+                continue
 
             # 处理数据
+            cache.add_unpack(t, decoded)
             await message_handler(websocket, message, cache)
 
         console.print(
@@ -125,23 +168,132 @@ async def _ws_recv(websocket):
     finally:
         status_mic.stop()
         status_mic.on = False
-        sockets.pop(str(websocket.id))
-        sockets_id.remove(str(websocket.id))
+        await router.unregister(str(websocket.id))
+        # 标记连接已断开，移除它排队中的片段
+        Cosmic.pool.cancel_socket(str(websocket.id))
+        if cache.task_id is not None:
+            Cosmic.pool.cancel(cache.task_id)
 
 
 class Cache:
     # 定义一个可变对象，用于保存音频数据、偏移时间
     def __init__(self):
-        self.chunks = b""
+        self.chunks = RingBuffer()
+        self.offset = 0
+        self.frame_num = 0
+        self.seq = 0  # 下一个片段的序号
+        self.task_id = None  # 正在接收的任务
+        self.vad = None  # 文件转录的 VAD 分段器
+        self.spans = TRACE.new_spans()  # 下一个片段累积的阶段（消息解码）
+
+    def add_unpack(self, start: float, end: float):
+        """
+        累计消息解码的耗时：每个片段只记一个 unpack 阶段，
+        时长为各条消息之和，结束于最后一条消息解码完成
+        """
+        if self.spans is None:
+            return
+        if self.spans and self.spans[-1][0] == "unpack":
+            item = self.spans[-1]
+            start = end - (item[2] - item[1]) - (end - start)
+            item[1], item[2] = start, end
+        else:
+            self.spans.append(["unpack", start, end])
+
+    def take_spans(self):
+        """交出累积的阶段，给新片段的任务"""
+        spans, self.spans = self.spans, TRACE.new_spans()
+        return spans
+
+    def next_seq(self) -> int:
+        seq, self.seq = self.seq, self.seq + 1
+        return seq
+
+    def reset(self):
+        self.chunks.clear()
         self.offset = 0
         self.frame_num = 0
+        self.seq = 0
+        self.task_id = None
+        self.vad = None
+        self.spans = TRACE.new_spans()
+
+
+_unknown_models = set()
+
+
+def select_model(message: dict) -> str | None:
+    """消息中指定的识别模型；未指定或未配置时用默认模型"""
+    model = message.get("extra", {}).get("model") or message.get("model")
+    if not model:
+        return None
+    if model not in load_config().get("models", {}):
+        # 每个音频块都会带上模型名，只提示一次
+        if model not in _unknown_models:
+            _unknown_models.add(model)
+            console.print(f"未配置的模型 {model}，改用默认模型", style="yellow")
+        return None
+    return model
+
+
+def submit(task: Task, cache: Cache) -> bool:
+    """提交任务；模型载入期间缓存已满时取消该任务、清空连接的缓冲，并告知客户端"""
+    if Cosmic.pool.submit(task):
+        return True
+    Cosmic.pool.cancel(task.task_id)
+    # 该任务的后续帧都会被丢弃，缓冲不能留给同一连接的下一个任务
+    if cache.task_id == task.task_id:
+        cache.reset()
+    Cosmic.router.notify(
+        task.socket_id,
+        {"type": "status", "status": "rejected", "task_id": task.task_id},
+    )
+    console.print(f"模型尚未就绪且缓存已满，拒绝任务：{task.task_id}", style="yellow")
+    return False
+
+
+def cancel_handler(task_id: str, cache: Cache):
+    """客户端取消任务：丢弃缓冲的音频，并通知识别进程丢弃排队中的片段"""
+    global status_mic
+    Cosmic.pool.cancel(task_id)
+    if cache.task_id == task_id:
+        cache.reset()
+        status_mic.stop()
+    console.print(f"任务已取消：{task_id}", style="yellow")
+
+
+def request_profile(seconds: float | None = None) -> bool:
+    """主进程与各识别进程各剖析一次；未启用或正在剖析时返回 False"""
+    if Cosmic.profiler is None or not Cosmic.profiler.trigger(seconds):
+        return False
+    Cosmic.pool.profile(seconds)
+    return True
+
+
+def profile_handler(socket_id: str, message: dict):
+    """管理消息触发剖析，口令须与 [profiler].admin_token 相符，口令为空则不接受"""
+    token = load_config().get("profiler", {}).get("admin_token", "")
+    if not token or not hmac.compare_digest(str(message.get("token", "")), token):
+        console.print("拒绝剖析请求：口令不符", style="yellow")
+        return
+    started = request_profile(message.get("seconds"))
+    Cosmic.router.notify(
+        socket_id,
+        {"type": "status", "status": "profiling" if started else "profile_busy"},
+    )
+
+
+def subscribe_handler(socket_id: str, level: str):
+    """客户端选择接收完整结果、只收最终结果、只收进度，或增量结果"""
+    try:
+        Cosmic.router.subscribe(socket_id, level)
+    except ValueError as e:
+        console.print(f"订阅失败：{e}", style="yellow")
 
 
 async def message_handler(websocket, message, cache: Cache):
     """处理得到的音频流数据"""
 
-    queue_in = Cosmic.queue_in
-
     global status_mic
     source = message["source"]
     is_final = message["is_final"]
@@ -151,17 +303,62 @@ async def message_handler(websocket, message, cache: Cache):
     task_id = message["task_id"]
     socket_id = str(websocket.id)
 
+    # 已取消任务的后续帧直接丢弃
+    if task_id in Cosmic.cancelled:
+        if cache.task_id == task_id:
+            cache.reset()
+        return
+    cache.task_id = task_id
+
+    # 客户端选用的识别模型（二进制帧放在扩展字段中）
+    model = select_model(message)
+
     # 获取分段长度（以多长的音频进行识别）
     seg_duration = message["seg_duration"]
     seg_overlap = message["seg_overlap"]
     seg_threshold = seg_duration + seg_overlap * 2
 
-    # base64 解码音频数据，再
     # 音频数据是 float32、单声道、16000采样率
-    data = b64decode(message["data"])
-    cache.chunks += data
+    data = message["data"]
     cache.frame_num += len(data)
 
+    # 文件转录可以用 VAD 在静音处切分
+    vad_config = load_config().get("vad", {})
+    if source == "file" and vad_config.get("enable"):
+        if cache.vad is None:
+            console.print("正在接收音频文件...")
+            cache.vad = create_segmenter(vad_config, seg_duration)
+        await vad_handler(message, data, cache, socket_id, model)
+        return
+
+    cache.chunks.write(data)
+
+    # 流式识别：麦克风音频攒够一小块就提交，不按固定窗口分段
+    streaming_config = load_config().get("streaming_model", {})
+    if source == "mic" and streaming_config.get("_enable"):
+        chunk = 4 * 16 * streaming_config.get("_chunk_ms", 200)
+        if is_final or len(cache.chunks) >= chunk:
+            task = Task(
+                source=source,
+                data=bytes(cache.chunks.peek(len(cache.chunks))),
+                offset=0,  # 时间由识别进程里的持久流自己累计
+                task_id=task_id,
+                socket_id=socket_id,
+                overlap=0,
+                is_final=is_final,
+                time_start=message["time_start"],
+                time_submit=time.time(),
+                streaming=True,
+            )
+            cache.chunks.clear()
+            submit(task, cache)
+        if is_final:
+            status_mic.stop()
+            cache.reset()
+        else:
+            status_mic.start()
+        return
+
     if not is_final:
         # 打印消息
         if source == "mic":
@@ -170,12 +367,14 @@ async def message_handler(websocket, message, cache: Cache):
             console.print("正在接收音频文件...")
 
         # 若缓冲已达到分段长度，将片段作为任务提交
-        while len(cache.chunks) / 4 / 16000 >= seg_threshold:
-            data = cache.chunks[: 4 * 16000 * (seg_duration + seg_overlap)]
-            cache.chunks = cache.chunks[4 * 16000 * seg_duration :]
+        for window in cache.chunks.cut(
+            int(4 * 16000 * (seg_duration + seg_overlap)),
+            int(4 * 16000 * seg_duration),
+            int(4 * 16000 * seg_threshold),
+        ):
             task = Task(
                 source=message["source"],
-                data=data,
+                data=bytes(window),
                 offset=cache.offset,
                 task_id=task_id,
                 socket_id=socket_id,
@@ -183,9 +382,13 @@ async def message_handler(websocket, message, cache: Cache):
                 is_final=False,
                 time_start=message["time_start"],
                 time_submit=time.time(),
+                seq=cache.next_seq(),
+                model=model,
+                spans=cache.take_spans(),
             )
             cache.offset += seg_duration
-            queue_in.put(task)
+            if not submit(task, cache):
+                break
 
     elif is_final:
         # 打印消息
@@ -197,7 +400,7 @@ async def message_handler(websocket, message, cache: Cache):
         # 客户端说片段结束，将缓冲区音频识别
         task = Task(
             source=message["source"],
-            data=cache.chunks[0:],
+            data=bytes(cache.chunks.peek(len(cache.chunks))),
             offset=cache.offset,
             task_id=task_id,
             socket_id=socket_id,
@@ -205,10 +408,53 @@ async def message_handler(websocket, message, cache: Cache):
             is_final=True,
             time_start=message["time_start"],
             time_submit=time.time(),
+            seq=cache.next_seq(),
+            model=model,
+            spans=cache.take_spans(),
         )
-        queue_in.put(task)
+        submit(task, cache)
 
         # 还原缓冲区、偏移时长
-        cache.chunks = b""
-        cache.offset = 0
-        cache.frame_num = 0
+        cache.reset()
+
+
+async def vad_handler(
+    message, data, cache: Cache, socket_id: str, model: str | None = None
+):
+    """用 VAD 切分文件音频：在静音处切开，跳过长段静音，片段之间不重叠"""
+    is_final = message["is_final"]
+    samples = np.frombuffer(data, dtype=np.float32)
+
+    def segment():
+        segments = cache.vad.accept(samples)
+        if is_final:
+            segments += cache.vad.flush()
+        return segments
+
+    # VAD 计算放到线程里，不阻塞事件循环
+    segments = await asyncio.to_thread(segment)
+    if is_final:
+        print(f"音频文件接收完毕，时长 {cache.frame_num / 16000 / 4:.2f}s")
+        if not segments:
+            segments = [(0.0, np.empty(0, dtype=np.float32))]
+
+    for i, (offset, seg) in enumerate(segments):
+        task = Task(
+            source=message["source"],
+            data=seg.tobytes(),
+            offset=offset,
+            task_id=message["task_id"],
+            socket_id=socket_id,
+            overlap=0,
+            is_final=is_final and i == len(segments) - 1,
+            time_start=message["time_start"],
+            time_submit=time.time(),
+            seq=cache.next_seq(),
+            model=model,
+            spans=cache.take_spans(),
+        )
+        if not submit(task, cache):
+            return
+
+    if is_final:
+        cache.reset()
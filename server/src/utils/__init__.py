@@ -5,6 +5,12 @@ from typing import Union
 from functools import lru_cache
 
 from .types import Status, Cosmic, console, Task, Result
+from .shm import AudioArena, AudioRef
+from .cancel import CancelSet
+from .profile import StartupProfile, PROFILE
+from .histogram import Histogram, LATENCY_BUCKETS
+from .trace import TraceLog, TRACE, span_begin, span_end, span
+from .sampler import SamplingProfiler
 
 
 __all__ = [
@@ -16,6 +22,19 @@ __all__ = [
     "console",
     "Task",
     "Result",
+    "AudioArena",
+    "AudioRef",
+    "CancelSet",
+    "StartupProfile",
+    "PROFILE",
+    "Histogram",
+    "LATENCY_BUCKETS",
+    "TraceLog",
+    "TRACE",
+    "span_begin",
+    "span_end",
+    "span",
+    "SamplingProfiler",
 ]
 
 
@@ -0,0 +1,52 @@
+import hashlib
+from multiprocessing import Array, Value
+
+__all__ = ["CancelSet"]
+
+
+def _key_hash(key: str) -> int:
+    """跨进程稳定的 64 位哈希（内置 hash 对字符串带随机种子）"""
+    digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True) or 1
+
+
+class CancelSet:
+    """
+    跨进程共享的取消集合，存放已取消的 task_id 和已断开的 socket_id
+
+    主进程写入，识别进程读取。数据放在共享内存数组里，读端只在版本号
+    变化时才重建本地 set，平时的成员判断是一次本地查找，没有 Manager 往返。
+    容量有限，写满后覆盖最旧的条目
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._keys = Array("q", capacity)
+        self._version = Value("q", 0)
+        self._seen = -1
+        self._local: set = set()
+
+    def add(self, key: str):
+        with self._version.get_lock():
+            version = self._version.value
+            self._keys[version % self.capacity] = _key_hash(key)
+            self._version.value = version + 1
+
+    def refresh(self) -> bool:
+        """版本号变化时重建本地 set，返回是否有更新"""
+        version = self._version.value
+        if version == self._seen:
+            return False
+        with self._version.get_lock():
+            self._local = set(self._keys[:])
+            self._local.discard(0)
+            self._seen = self._version.value
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        self.refresh()
+        return _key_hash(key) in self._local
+
+    def cancelled(self, task) -> bool:
+        """任务本身被取消，或其所属连接已断开"""
+        return task.task_id in self or task.socket_id in self
@@ -0,0 +1,30 @@
+from bisect import bisect_left
+from typing import Sequence
+
+__all__ = ["Histogram", "LATENCY_BUCKETS"]
+
+# 延迟类指标的默认分桶上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """固定分桶的直方图，按 Prometheus 的约定输出累积计数"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个桶是 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """(le, 累积计数)，le 为桶上界的文本形式"""
+        result, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else f"{bound:g}", total))
+        return result
@@ -0,0 +1,58 @@
+import sys
+import json
+import time
+import threading
+import importlib
+from pathlib import Path
+from contextlib import contextmanager
+
+__all__ = ["StartupProfile", "PROFILE"]
+
+
+class StartupProfile:
+    """启动耗时剖析：各模块的导入耗时、各模型的载入耗时，以及就绪时刻"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.imports: dict[str, float] = {}
+        self.stages: dict[str, float] = {}
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def import_module(self, name: str):
+        """导入模块并记录首次导入的耗时"""
+        if name in sys.modules:
+            return sys.modules[name]
+        t = time.perf_counter()
+        module = importlib.import_module(name)
+        with self._lock:
+            self.imports.setdefault(name, time.perf_counter() - t)
+        return module
+
+    @contextmanager
+    def stage(self, name: str):
+        """记录一个阶段（如某个模型的载入）的耗时"""
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] = time.perf_counter() - t
+
+    def to_dict(self) -> dict:
+        return {
+            "imports": {k: round(v, 4) for k, v in self.imports.items()},
+            "stages": {k: round(v, 4) for k, v in self.stages.items()},
+            "elapsed": round(self.elapsed(), 4),
+        }
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+
+
+# 每个进程一份
+PROFILE = StartupProfile()
@@ -0,0 +1,161 @@
+import sys
+import time
+import marshal
+import threading
+import tracemalloc
+from pathlib import Path
+from collections import Counter
+from typing import Optional
+
+from .types import console
+
+__all__ = ["SamplingProfiler", "write_pstats", "write_collapsed"]
+
+# 一帧的键，与 pstats 相同：(文件, 函数首行, 函数名)
+FrameKey = tuple[str, int, str]
+# 一次采样：(线程名, 从外到内的调用栈)
+Stack = tuple[str, tuple[FrameKey, ...]]
+
+
+def _stack(frame) -> tuple[FrameKey, ...]:
+    keys = []
+    while frame is not None:
+        code = frame.f_code
+        keys.append((code.co_filename, code.co_firstlineno, code.co_name))
+        frame = frame.f_back
+    return tuple(reversed(keys))
+
+
+def write_collapsed(samples: Counter, path: Path):
+    """折叠栈格式，每行「线程;外层;…;内层 次数」，可用 flamegraph.pl 或 speedscope 打开"""
+    with open(path, "w", encoding="utf-8") as f:
+        for (thread, stack), count in samples.most_common():
+            frames = ";".join(
+                f"{name} ({Path(file).name}:{line})" for file, line, name in stack
+            )
+            f.write(f"{thread};{frames} {count}\n")
+
+
+def write_pstats(samples: Counter, interval: float, path: Path):
+    """
+    按 pstats 的格式写出，可用 pstats.Stats(path) 或 snakeviz 查看
+
+    采样得不到真实调用次数，以出现的样本数代替；自身耗时与累计耗时为样本数乘以采样间隔
+    """
+    stats: dict = {}
+
+    def entry(key):
+        return stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+
+    for (_, stack), count in samples.items():
+        seconds = count * interval
+        for key in set(stack):
+            item = entry(key)
+            item[0] += count
+            item[1] += count
+            item[3] += seconds
+        if stack:
+            entry(stack[-1])[2] += seconds
+        for caller, callee in set(zip(stack, stack[1:])):
+            callers = entry(callee)[4]
+            nc, cc, tt, ct = callers.get(caller, (0, 0, 0.0, 0.0))
+            self_time = seconds if callee == stack[-1] else 0.0
+            callers[caller] = (nc + count, cc + count, tt + self_time, ct + seconds)
+
+    with open(path, "wb") as f:
+        marshal.dump({k: tuple(v) for k, v in stats.items()}, f)
+
+
+class SamplingProfiler:
+    """
+    按需的栈采样剖析器，平时不运行，没有开销
+
+    trigger() 后在后台线程里每 interval 秒采样一次本进程所有线程的调用栈，
+    持续 seconds 秒，同时用 tracemalloc 记录期间的内存分配；结束后在 dir 下写出
+    pstats、折叠栈，以及 tracemalloc 快照与其前 30 项的文本摘要
+    """
+
+    def __init__(self, label: str, config: Optional[dict] = None):
+        config = config or {}
+        self.label = label
+        self.seconds = config.get("seconds", 10.0)
+        self.interval = config.get("interval", 0.005)
+        self.dir = Path(config.get("dir", "./logs/profile"))
+        self.memory_frames = config.get("memory_frames", 1)
+        self._lock = threading.Lock()
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def trigger(self, seconds: Optional[float] = None) -> bool:
+        """在后台开始一次剖析；正在剖析时忽略，返回 False"""
+        with self._lock:
+            if self._running:
+                return False
+            self._running = True
+        thread = threading.Thread(
+            target=self._run, args=(seconds or self.seconds,), daemon=True
+        )
+        thread.start()
+        return True
+
+    def watch(self, event, seconds=None):
+        """等待跨进程的 event 被置位后开始剖析，seconds 为共享的 Value"""
+        while True:
+            event.wait()
+            event.clear()
+            self.trigger(seconds.value if seconds is not None else None)
+
+    def _run(self, seconds: float):
+        try:
+            paths = self.capture(seconds)
+            console.print(f"剖析完成（{self.label}）：{paths['pstats'].parent}")
+        except Exception as e:
+            console.print(f"剖析失败（{self.label}）：{e}", style="bright_red")
+        finally:
+            self._running = False
+
+    def capture(self, seconds: float) -> dict[str, Path]:
+        """阻塞地剖析 seconds 秒，返回写出的文件"""
+        console.print(f"开始剖析（{self.label}），持续 {seconds:g}s")
+        started_memory = not tracemalloc.is_tracing()
+        if started_memory:
+            tracemalloc.start(self.memory_frames)
+        try:
+            samples = self.sample(seconds)
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            if started_memory:
+                tracemalloc.stop()
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.label}-{time.strftime('%Y%m%d-%H%M%S')}"
+        paths = {
+            "pstats": self.dir / f"{stem}.pstats",
+            "collapsed": self.dir / f"{stem}.collapsed",
+            "memory": self.dir / f"{stem}.tracemalloc",
+            "memory_top": self.dir / f"{stem}.memory.txt",
+        }
+        write_pstats(samples, self.interval, paths["pstats"])
+        write_collapsed(samples, paths["collapsed"])
+        snapshot.dump(str(paths["memory"]))
+        top = snapshot.statistics("lineno")[:30]
+        paths["memory_top"].write_text(
+            "\n".join(str(stat) for stat in top) + "\n", encoding="utf-8"
+        )
+        return paths
+
+    def sample(self, seconds: float) -> Counter:
+        """采样除本线程外的所有线程，返回各调用栈出现的次数"""
+        me = threading.get_ident()
+        samples: Counter = Counter()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    samples[(names.get(ident, str(ident)), _stack(frame))] += 1
+            time.sleep(self.interval)
+        return samples
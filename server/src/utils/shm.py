@@ -0,0 +1,124 @@
+from typing import Union
+from multiprocessing import Lock
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+__all__ = ["AudioArena", "AudioRef"]
+
+
+class AudioRef:
+    """共享内存中一段音频的描述符，跨进程只传递它，而不是音频本身"""
+
+    __slots__ = ("name", "slot", "count", "length")
+
+    def __init__(self, name: str, slot: int, count: int, length: int):
+        self.name = name  # 共享内存名
+        self.slot = slot  # 起始槽位
+        self.count = count  # 占用的连续槽位数
+        self.length = length  # 字节数
+
+    def __len__(self) -> int:
+        return self.length
+
+
+class AudioArena:
+    """
+    存放音频片段的共享内存，按固定大小的槽位分配
+
+    每段音频只有一个持有者：主进程派发任务时 pack 写入一次，识别进程 unpack
+    得到零拷贝的 numpy 视图，用完后 release 归还槽位。头部是每个槽位的
+    占用标记，其后是槽位数据区。短于 min_bytes 的音频（如流式识别的小块）
+    不占槽位，直接以 bytes 经队列传输
+    """
+
+    def __init__(self, slots: int, slot_size: int, min_bytes: int = 0):
+        self.slots = slots
+        self.slot_size = slot_size
+        self.min_bytes = min_bytes
+        self.lock = Lock()
+        self._header = (slots + 63) // 64 * 64
+        self._shm = SharedMemory(create=True, size=self._header + slots * slot_size)
+        self._owner = True
+        self._cursor = 0  # 下次从这里开始查找空闲槽位
+        self._bind()
+        self._used[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _bind(self):
+        self._used = np.ndarray((self.slots,), np.uint8, buffer=self._shm.buf)
+
+    def __getstate__(self):
+        # 传给子进程时只带名字和锁，由子进程自行挂载
+        return {
+            "slots": self.slots,
+            "slot_size": self.slot_size,
+            "min_bytes": self.min_bytes,
+            "lock": self.lock,
+            "name": self._shm.name,
+        }
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.slot_size = state["slot_size"]
+        self.min_bytes = state["min_bytes"]
+        self.lock = state["lock"]
+        self._header = (self.slots + 63) // 64 * 64
+        self._shm = SharedMemory(name=state["name"])
+        self._owner = False
+        self._cursor = 0
+        self._bind()
+
+    def _allocate(self, count: int) -> int:
+        """找 count 个连续的空闲槽位，返回起始槽位，找不到返回 -1"""
+        for i in range(self.slots):
+            start = (self._cursor + i) % self.slots
+            if start + count > self.slots:
+                continue
+            if not self._used[start : start + count].any():
+                self._used[start : start + count] = 1
+                self._cursor = (start + count) % self.slots
+                return start
+        return -1
+
+    def pack(self, data) -> Union[AudioRef, bytes]:
+        """写入共享内存并返回描述符；音频太短或空间不足时退回为 bytes"""
+        length = len(data)
+        if length < max(self.min_bytes, 1):
+            return bytes(data)
+        count = -(-length // self.slot_size)
+        with self.lock:
+            slot = self._allocate(count) if count <= self.slots else -1
+        if slot < 0:
+            return bytes(data)
+        offset = self._header + slot * self.slot_size
+        self._shm.buf[offset : offset + length] = data
+        return AudioRef(self._shm.name, slot, count, length)
+
+    def unpack(self, data) -> Union[np.ndarray, bytes]:
+        """得到音频的 float32 视图，不发生拷贝"""
+        if not isinstance(data, AudioRef):
+            return data
+        offset = self._header + data.slot * self.slot_size
+        return np.ndarray(
+            (data.length // 4,), np.float32, buffer=self._shm.buf, offset=offset
+        )
+
+    def release(self, data):
+        """归还槽位，由持有者调用一次"""
+        if isinstance(data, AudioRef):
+            with self.lock:
+                self._used[data.slot : data.slot + data.count] = 0
+
+    def usage(self) -> float:
+        """已占用槽位的比例"""
+        return float(np.count_nonzero(self._used)) / self.slots
+
+    def close(self):
+        self._used = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,82 @@
+import json
+import time
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Optional
+
+__all__ = ["TraceLog", "TRACE", "span_begin", "span_end", "span"]
+
+# 追踪以任务 id 为 trace id；任务与结果的 spans 是 [阶段名, 开始, 结束] 的列表，
+# 时间为 time.time()，客户端与服务端的记录可以排在同一条时间线上。
+# 未开启追踪时 spans 为 None，各处记录都直接跳过
+
+
+def span_begin(obj, name: str):
+    """在任务或结果上开始一个阶段"""
+    if obj.spans is not None:
+        obj.spans.append([name, time.time(), None])
+
+
+def span_end(obj, name: str):
+    """结束最近一个同名且未结束的阶段"""
+    if obj.spans is None:
+        return
+    for item in reversed(obj.spans):
+        if item[0] == name and item[2] is None:
+            item[2] = time.time()
+            return
+
+
+@contextmanager
+def span(objs, name: str):
+    """给一个或一组任务（结果）记录同一个阶段"""
+    objs = [
+        o for o in (objs if isinstance(objs, list) else [objs]) if o.spans is not None
+    ]
+    for obj in objs:
+        span_begin(obj, name)
+    try:
+        yield
+    finally:
+        for obj in objs:
+            span_end(obj, name)
+
+
+class TraceLog:
+    """把各阶段追加写入 JSONL 文件，每行一个阶段"""
+
+    def __init__(self):
+        self.enable = False
+        self.path: Optional[Path] = None
+        self._file = None
+
+    def configure(self, config: dict):
+        self.enable = config.get("enable", False)
+        self.path = Path(config.get("path", "./logs/trace.jsonl"))
+
+    def new_spans(self) -> Optional[list]:
+        """新任务的 spans，未开启时为 None"""
+        return [] if self.enable else None
+
+    def write(self, trace_id: str, spans: list, process: str = "server"):
+        if not self.enable or not spans:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        for name, start, end in spans:
+            if end is None:
+                continue
+            record = {
+                "trace_id": trace_id,
+                "name": name,
+                "start": start,
+                "end": end,
+                "process": process,
+            }
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+
+# 主进程一份，由 main 按 config.toml 的 [trace] 配置
+TRACE = TraceLog()
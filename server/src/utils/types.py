@@ -1,8 +1,6 @@
-from typing import Dict
+from array import array
 from multiprocessing import Queue
-from multiprocessing.managers import ListProxy
 
-import websockets
 from rich.style import StyleType
 from rich.console import Console
 from rich.status import Status as St
@@ -53,9 +51,12 @@ console = Console(highlight=False)
 
 
 class Cosmic:
-    sockets: Dict[str, websockets.WebSocketClientProtocol] = {}
-    sockets_id: ListProxy
-    queue_in = Queue()
+    router = None  # 连接路由表 Router，由主进程初始化
+    cancelled = None  # 跨进程共享的取消集合 CancelSet，由主进程初始化
+    pool = None  # 识别进程池 RecognizerPool，由主进程初始化
+    arena = None  # 存放音频片段的共享内存 AudioArena，未启用时为 None
+    metrics = None  # 运行指标 Metrics，由主进程初始化
+    profiler = None  # 主进程的按需剖析器 SamplingProfiler，未启用时为 None
     queue_out = Queue()
 
 
@@ -71,9 +72,13 @@ class Task:
         is_final: bool,
         time_start: float,
         time_submit: float,
+        streaming: bool = False,
+        seq: int | None = None,
+        model: str | None = None,
+        spans: list | None = None,
     ) -> None:
         self.source = source
-        self.data = data
+        self.data = data  # float32 音频 bytes，或共享内存中的 AudioRef
         self.offset = offset
         self.overlap = overlap
         self.task_id = task_id
@@ -81,10 +86,36 @@ class Task:
         self.is_final = is_final
         self.time_start = time_start
         self.time_submit = time_submit
+        self.streaming = streaming  # 交给流式识别器，逐帧解码
+        self.seq = seq  # 片段在任务中的序号，识别进程据此按序合并乱序解码的片段
+        self.model = model  # 客户端选用的识别模型，None 为默认模型
+        self.spans = spans  # 各阶段的 [名称, 开始, 结束]，未开启追踪时为 None
         self.samplerate = 16000
 
 
 class Result:
+    # 长文件的结果会累积数万个 token，用 __slots__ 和紧凑数组减少内存
+    __slots__ = (
+        "task_id",
+        "socket_id",
+        "source",
+        "duration",
+        "time_start",
+        "time_submit",
+        "time_complete",
+        "tokens",
+        "timestamps",
+        "text",
+        "is_final",
+        "audio_seconds",
+        "cpu_time",
+        "decode_time",
+        "punc_time",
+        "spans",
+        "error",
+        "sentence",
+    )
+
     def __init__(self, task_id, socket_id, source) -> None:
         self.task_id = task_id  # 任务 id
         self.socket_id = socket_id  # socket id
@@ -95,7 +126,27 @@ class Result:
         self.time_submit: float = 0.0  # 片段提交时间 (float)
         self.time_complete: float = 0.0  # 识别完成时间 (float)
 
-        self.tokens = []  # 字级 token
-        self.timestamps = []  # 字级 token 的时间戳
+        self.tokens: list[str] = []  # 字级 token（已 intern，重复的字共享同一对象）
+        self.timestamps = array("d")  # 字级 token 的时间戳
         self.text = ""  # 合并的文字
         self.is_final = False  # 是否已完成所有片段识别
+
+        # 本条结果对应的解码开销，由主进程按连接累计
+        self.audio_seconds: float = 0.0  # 本次解码的音频秒数
+        self.cpu_time: float = 0.0  # 本次解码的 CPU 时间（秒）
+        self.decode_time: float = 0.0  # 本次解码所在批次的耗时（秒）
+        self.punc_time: float = 0.0  # 本次加标点的耗时（秒）
+        self.spans: list | None = None  # 最新片段经过的各阶段，见 utils.trace
+        self.error: str | None = None  # 任务失败的原因，如结果被清理（evicted）
+        self.sentence: str | None = None  # 流式识别在端点确定的一句，其余结果为 None
+
+    def snapshot(self) -> "Result":
+        """复制一份，之后对原结果的合并不影响快照"""
+        result = Result(self.task_id, self.socket_id, self.source)
+        for name in self.__slots__:
+            setattr(result, name, getattr(self, name))
+        result.tokens = self.tokens[:]
+        result.timestamps = self.timestamps[:]
+        if self.spans is not None:
+            result.spans = [item[:] for item in self.spans]
+        return result
@@ -0,0 +1,86 @@
+"""各测试共用的替身与构造函数，测试文件中 from conftest import ... 使用"""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.utils import Task, Result
+
+
+class FakeWorker:
+    """识别进程的替身：put 只记下任务 id 并增加积压计数"""
+
+    def __init__(self, index, pending=0, pid=None, context=None):
+        self.index = index
+        self.pending = pending
+        self.ready = True
+        self.draining = False
+        self.tasks = []
+        self.process = SimpleNamespace(pid=pid)
+        self.context = context
+
+    def put(self, task):
+        self.pending += 1
+        self.tasks.append(task.task_id)
+
+
+class FakeWebSocket:
+    """连接的替身：记下发出的消息，delay 模拟接收慢的客户端"""
+
+    def __init__(self, socket_id, delay=0.0, subprotocol=None):
+        self.id = socket_id
+        self.delay = delay
+        self.subprotocol = subprotocol
+        self.messages = []
+        self.closed_code = None
+
+    async def send(self, payload):
+        await asyncio.sleep(self.delay)
+        self.messages.append(payload)
+
+    async def close(self, code=1000, reason=""):
+        self.closed_code = code
+
+
+def make_task(
+    task_id="t",
+    source="mic",
+    seconds=0.0,
+    is_final=False,
+    *,
+    socket_id="s",
+    offset=0.0,
+    fill=0.0,
+    data=None,
+    **kwargs,
+) -> Task:
+    """seconds 秒取值均为 fill 的音频（或直接给出 data）；streaming、seq 等按关键字传入"""
+    if data is None:
+        data = np.full(int(16000 * seconds), fill, dtype=np.float32).tobytes()
+    return Task(
+        source, data, offset, 0, task_id, socket_id, is_final, 0.0, 0.0, **kwargs
+    )
+
+
+def make_segment(task_id, index, seconds, is_final=False, seq=None) -> Task:
+    """文件的第 index 个片段，每段间隔 4 秒，音频取值为 index 以便区分"""
+    return make_task(
+        task_id,
+        "file",
+        seconds,
+        is_final,
+        offset=index * 4.0,
+        fill=index,
+        seq=seq,
+    )
+
+
+def make_result(text="", is_final=False, source="file", task_id="t", **fields):
+    """识别结果，其余字段按关键字设置"""
+    result = Result(task_id, "s", source)
+    result.text = text
+    result.is_final = is_final
+    for name, value in fields.items():
+        setattr(result, name, value)
+    return result
@@ -0,0 +1,132 @@
+import time
+from queue import Queue
+from types import SimpleNamespace
+
+import pytest
+
+from src.asr.loaders import ParaformerLoader, RESULTS
+from src.asr.recognizer import collect_batch
+
+from conftest import make_segment
+
+
+class FakeRecognizer:
+    """按音频长度生成 token 的假识别器，每秒一个 token"""
+
+    def __init__(self):
+        self.batches = []
+
+    def create_stream(self):
+        stream = SimpleNamespace(result=None)
+
+        def accept_waveform(samplerate, samples):
+            seconds = len(samples) // samplerate
+            stream.result = SimpleNamespace(
+                tokens=[f"{samples[0]:.0f}-{i}" for i in range(seconds)],
+                timestamps=[float(i) + 0.5 for i in range(seconds)],
+            )
+
+        stream.accept_waveform = accept_waveform
+        return stream
+
+    def decode_streams(self, streams):
+        self.batches.append(len(streams))
+
+
+class SlowRecognizer(FakeRecognizer):
+    """包含首个片段的批解码得慢，使后面的片段先解码完"""
+
+    def decode_streams(self, streams):
+        if streams[0].result.tokens[0].startswith("0-"):
+            time.sleep(0.05)
+        super().decode_streams(streams)
+
+
+@pytest.mark.unit
+class TestBatch:
+    """测试批量解码"""
+
+    def test_merge_in_order(self):
+        recognizer = FakeRecognizer()
+        tasks = [
+            make_segment("a", 0, 4),
+            make_segment("b", 0, 2, is_final=True),
+            make_segment("a", 1, 4, is_final=True),
+        ]
+        results = ParaformerLoader()._sherpa_recognize_batch(recognizer, tasks)
+
+        assert recognizer.batches == [3]
+        assert results[1].tokens == ["0-0", "0-1"]
+        assert results[2].tokens == ["0-0", "0-1", "0-2", "0-3"] + [
+            "1-0",
+            "1-1",
+            "1-2",
+            "1-3",
+        ]
+        assert results[2].timestamps[4] == 4.5
+        assert results[2].is_final
+        assert "a" not in RESULTS and "b" not in RESULTS
+
+    def test_reorder_segments(self):
+        loader = ParaformerLoader()
+        recognizer = FakeRecognizer()
+        late = [make_segment("c", 1, 2, seq=1), make_segment("c", 2, 2, True, seq=2)]
+        assert loader._sherpa_recognize_batch(recognizer, late) == []
+
+        results = loader._sherpa_recognize_batch(
+            recognizer, [make_segment("c", 0, 2, seq=0)]
+        )
+        assert results[-1].is_final
+        assert results[-1].tokens == ["0-0", "0-1", "1-0", "1-1", "2-0", "2-1"]
+        assert "c" not in RESULTS and not loader._buffers
+
+    def test_evicted_task_fails(self):
+        loader = ParaformerLoader()
+        recognizer = FakeRecognizer()
+        loader._sherpa_recognize_batch(recognizer, [make_segment("e", 0, 2, seq=0)])
+        RESULTS.pop("e")  # 任务进行中结果被清理（超时或超出内存预算）
+
+        # 后续片段被丢弃，不会从 seq 0 重新缓冲
+        assert (
+            loader._sherpa_recognize_batch(recognizer, [make_segment("e", 1, 2, seq=1)])
+            == []
+        )
+        results = loader._sherpa_recognize_batch(
+            recognizer, [make_segment("e", 2, 2, True, seq=2)]
+        )
+        assert len(results) == 1 and results[0].is_final
+        assert results[0].error == "evicted" and results[0].text == ""
+        assert "e" not in RESULTS and "e" not in loader._buffers
+
+    def test_evicted_with_final_buffered(self):
+        loader = ParaformerLoader()
+        recognizer = FakeRecognizer()
+        late = [make_segment("g", 1, 2, True, seq=1)]
+        assert loader._sherpa_recognize_batch(recognizer, late) == []
+        RESULTS.pop("g")
+
+        # 最后一个片段已在缓冲中，下一次合并时就告知失败
+        results = loader._sherpa_recognize_batch(
+            recognizer, [make_segment("h", 0, 2, True, seq=0)]
+        )
+        assert {r.task_id: r.error for r in results} == {"g": "evicted", "h": None}
+        assert not loader._buffers
+
+    def test_parallel_decode(self):
+        loader = ParaformerLoader()
+        loader._decode_threads = 2
+        recognizer = SlowRecognizer()
+        tasks = [make_segment("d", i, 2, i == 3, seq=i) for i in range(4)]
+
+        results = loader._sherpa_recognize_batch(recognizer, tasks)
+        assert sorted(recognizer.batches) == [2, 2]
+        assert results[-1].is_final
+        assert [t[0] for t in results[-1].tokens[::2]] == ["0", "1", "2", "3"]
+        assert results[-1].timestamps.tolist() == sorted(results[-1].timestamps)
+
+    def test_collect_batch(self):
+        queue = Queue()
+        for i in range(5):
+            queue.put(i)
+        assert collect_batch(queue, 3, 0.0) == [0, 1, 2]
+        assert collect_batch(queue, 3, 0.01) == [3, 4]
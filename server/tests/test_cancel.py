@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from src.asr.result_store import ResultStore, TOKEN_BYTES
+from src.utils import CancelSet, Result
+
+
+@pytest.mark.unit
+class TestCancelSet:
+    """测试跨进程取消集合"""
+
+    def test_add_and_contains(self):
+        cancelled = CancelSet(capacity=4)
+        assert "task" not in cancelled
+        cancelled.add("task")
+        assert "task" in cancelled
+
+        result = Result("other", "task", "mic")
+        assert cancelled.cancelled(result)
+
+    def test_overwrite_oldest(self):
+        cancelled = CancelSet(capacity=2)
+        for key in ("a", "b", "c"):
+            cancelled.add(key)
+        assert "a" not in cancelled
+        assert "b" in cancelled and "c" in cancelled
+
+
+@pytest.mark.unit
+class TestResultStore:
+    """测试识别结果的过期清理"""
+
+    def test_ttl(self):
+        store = ResultStore(ttl=0.01)
+        store["a"] = Result("a", "s", "mic")
+        time.sleep(0.02)
+        store["b"] = Result("b", "s", "mic")
+        assert store.evict() == 1
+        assert "a" not in store and "b" in store
+
+    def test_memory_budget(self):
+        store = ResultStore(memory_budget=10 * TOKEN_BYTES)
+        for task_id in ("a", "b", "c"):
+            store[task_id] = Result(task_id, "s", "file")
+            store[task_id].tokens = ["x"] * 4
+        store["a"]  # 访问后 a 变为最近使用
+
+        assert store.evict() == 1
+        assert "b" not in store and "a" in store and "c" in store
+
+    def test_discard_if(self):
+        store = ResultStore()
+        store["a"] = Result("a", "s1", "mic")
+        store["b"] = Result("b", "s2", "mic")
+        assert store.discard_if(lambda r: r.socket_id == "s1") == 1
+        assert len(store) == 1
@@ -0,0 +1,95 @@
+import json
+import asyncio
+
+import pytest
+
+from src.net.delta import DeltaEncoder, checksum, common_prefix
+from src.net.router import Router
+
+from conftest import FakeWebSocket
+
+
+def make_message(text, is_final=False, task_id="t"):
+    return {
+        "task_id": task_id,
+        "duration": float(len(text)),
+        "time_start": 0.0,
+        "time_submit": 0.0,
+        "time_complete": 0.0,
+        "tokens": list(text),
+        "timestamps": [float(i) for i in range(len(text))],
+        "text": text,
+        "is_final": is_final,
+    }
+
+
+def apply(state, delta):
+    """客户端拼接增量的参考实现"""
+    state["text"] = state["text"][: delta["text_start"]] + delta["text"]
+    state["tokens"] = state["tokens"][: delta["token_start"]] + delta["tokens"]
+    return state
+
+
+@pytest.mark.unit
+class TestDelta:
+    """测试增量结果消息与订阅级别"""
+
+    def test_sentence_kept(self):
+        encoder = DeltaEncoder()
+        message = {**make_message("你好"), "sentence": "你好"}
+        # 流式识别在端点确定的句子，final 级别也发出，各级别都带上这一句
+        assert encoder.encode("final", message) is message
+        assert encoder.encode("progress", message)["sentence"] == "你好"
+        assert encoder.encode("text", message)["sentence"] == "你好"
+        assert encoder.encode("final", make_message("你好")) is None
+
+    def test_common_prefix(self):
+        assert common_prefix("你好", "你好吗") == 2
+        assert common_prefix("你好吗", "你好呀呀") == 2
+        assert common_prefix(["a", "b"], ["c"]) == 0
+
+    def test_token_deltas(self):
+        encoder = DeltaEncoder()
+        state = {"text": "", "tokens": []}
+        # 第三条改写了末尾（流式识别或标点修正）
+        for text in ("今天", "今天天气", "今天天汽很好"):
+            delta = encoder.encode("tokens", make_message(text))
+            apply(state, delta)
+        assert delta["text_start"] == 3 and delta["text"] == "汽很好"
+
+        delta = encoder.encode("tokens", make_message("今天天气很好。", True))
+        apply(state, delta)
+        assert state["text"] == "今天天气很好。" and state["tokens"] == list(
+            state["text"]
+        )
+        assert delta["checksum"] == checksum(state["text"])
+        assert delta["token_count"] == 7 and not encoder._sent
+
+    def test_levels(self):
+        encoder = DeltaEncoder()
+        partial, final = make_message("你好"), make_message("你好吗", True)
+        assert encoder.encode("full", partial) is partial
+        assert encoder.encode("final", partial) is None
+        assert encoder.encode("final", final) is final
+
+        progress = encoder.encode("progress", partial)
+        assert "text" not in progress and progress["duration"] == 2.0
+        text = encoder.encode("text", partial)
+        assert text["text"] == "你好" and "tokens" not in text
+
+    async def test_subscribe(self):
+        router = Router()
+        websocket = FakeWebSocket("a")
+        router.register(websocket)
+        router.subscribe("a", "text")
+        with pytest.raises(ValueError):
+            router.subscribe("a", "everything")
+
+        router.route("a", "t", False, make_message("你好"))
+        await asyncio.sleep(0.01)
+        router.route("a", "t", True, make_message("你好吗", True))
+        await asyncio.sleep(0.01)
+
+        first, last = map(json.loads, websocket.messages)
+        assert (first["text"], last["text"], last["text_start"]) == ("你好", "吗", 2)
+        await router.unregister("a")
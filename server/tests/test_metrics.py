@@ -0,0 +1,108 @@
+import os
+import socket
+import asyncio
+
+import pytest
+
+from src.asr.pool import RecognizerPool
+from src.net.metrics import Metrics, metrics_service, process_rss
+from src.net.router import Router
+from src.utils import Histogram, Task
+
+from conftest import FakeWebSocket, FakeWorker, make_result
+
+# 一次麦克风识别的各项耗时
+TIMINGS = {
+    "audio_seconds": 2.0,
+    "cpu_time": 0.5,
+    "decode_time": 0.2,
+    "punc_time": 0.01,
+    "time_submit": 100.0,
+    "time_complete": 100.3,
+}
+
+
+@pytest.mark.unit
+class TestHistogram:
+    """测试直方图的累积分桶"""
+
+    def test_cumulative(self):
+        histogram = Histogram((0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        assert histogram.cumulative() == [("0.1", 2), ("1", 3), ("+Inf", 4)]
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(3.65)
+
+
+@pytest.mark.unit
+class TestMetrics:
+    """测试指标的汇总与文本输出"""
+
+    def test_render(self):
+        metrics = Metrics()
+        metrics.observe(make_result(source="mic", **TIMINGS))
+        metrics.observe(make_result(source="mic", **TIMINGS))
+
+        pool = RecognizerPool(None, None, {})
+        pool.workers = [FakeWorker(0, pending=2, pid=os.getpid())]
+        pool.scheduler.put(Task("file", b"\0" * 64, 0, 0, "f", "s", False, 0, 0))
+        text = metrics.render(pool)
+
+        assert 'capswriter_results_total{source="mic"} 2' in text
+        assert 'capswriter_audio_seconds_total{source="mic"} 4.0' in text
+        assert 'capswriter_decode_rtf{source="mic"} 0.25' in text
+        assert 'capswriter_decode_seconds_bucket{source="mic",le="0.25"} 2' in text
+        assert 'capswriter_result_latency_seconds_count{source="mic"} 2' in text
+        assert "capswriter_punctuation_seconds_count 2" in text
+        assert 'capswriter_queue_depth{class="batch"} 1' in text
+        assert 'capswriter_queue_wait_seconds_count{class="interactive"} 0' in text
+        assert 'capswriter_worker_pending{worker="0"} 2' in text
+        if process_rss(os.getpid()) is not None:
+            assert 'capswriter_worker_rss_bytes{worker="0"}' in text
+        # 每个指标名只声明一次
+        assert text.count("# TYPE capswriter_decode_seconds histogram") == 1
+
+    async def test_connections(self):
+        router = Router({"send_queue_size": 2})
+        connection = router.register(FakeWebSocket("a"))
+        connection.dropped, connection.bytes_sent = 3, 120
+        router.account("a", 2.0, 0.5)
+        router.route("a", "t", True, {})
+        router.slow_disconnects = 1
+        text = Metrics().render(router=router)
+        await router.unregister("a")
+
+        assert 'capswriter_connection_backlog{socket="a"} 1' in text
+        assert 'capswriter_connection_dropped{socket="a"} 3' in text
+        assert 'capswriter_connection_sent_bytes{socket="a"} 120' in text
+        assert 'capswriter_connection_decoded_seconds{socket="a"} 2.0' in text
+        assert 'capswriter_connection_cpu_seconds{socket="a"} 0.5' in text
+        assert "capswriter_slow_disconnects_total 1" in text
+        assert "capswriter_send_backlog 1" in text
+
+    async def test_http(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        metrics = Metrics()
+        metrics.observe(make_result(**TIMINGS))
+        config = {"addr": "127.0.0.1", "port": port}
+        server = asyncio.create_task(metrics_service(config, metrics))
+        await asyncio.sleep(0.1)
+
+        async def get(path):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            return response.decode("utf-8")
+
+        try:
+            response = await get("/metrics")
+            assert response.startswith("HTTP/1.1 200 OK")
+            assert 'capswriter_results_total{source="file"} 1' in response
+            assert (await get("/")).startswith("HTTP/1.1 404")
+        finally:
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
@@ -0,0 +1,53 @@
+import time
+from queue import Queue
+
+import pytest
+
+from src.asr.pipeline import PunctuationStage, StageTimer, split_threads
+
+from conftest import make_result
+
+
+@pytest.mark.unit
+class TestPipeline:
+    """测试标点流水线级"""
+
+    def test_snapshot_and_order(self):
+        queue_out = Queue()
+
+        def punctuate(result):
+            time.sleep(0.01)
+            return result.text + "。"
+
+        stage = PunctuationStage(punctuate, queue_out)
+        result = make_result("你好", task_id="a", tokens=["你", "好"])
+        stage.put(result)
+        # 识别线程继续合并同一个结果容器，不影响已交出的快照
+        result.tokens += ["吗"]
+        result.text = "你好吗"
+        stage.put(result)
+        stage.stop()
+
+        first, second = queue_out.get(), queue_out.get()
+        assert (first.text, first.tokens) == ("你好。", ["你", "好"])
+        assert second.text == "你好吗。"
+        assert stage.timer.items == 2 and stage.backlog() == 0
+
+    def test_error_passthrough(self):
+        queue_out = Queue()
+        stage = PunctuationStage(lambda result: 1 / 0, queue_out)
+        stage.put(make_result("你", task_id="a", tokens=["你"]))
+        stage.stop()
+        assert queue_out.get().text == "你"
+
+    def test_split_threads(self):
+        assert split_threads(8, 0.25) == (6, 2)
+        assert split_threads(2, 0.9) == (1, 1)
+        assert split_threads(1, 0.5) == (1, 1)
+
+    def test_utilization(self):
+        timer = StageTimer()
+        time.sleep(0.02)
+        timer.add(0.01)
+        assert 0 < timer.utilization() <= 0.5
+        assert timer.utilization() == 0
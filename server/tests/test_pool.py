@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from src.asr.pool import RecognizerPool
+from src.utils import AudioArena, CancelSet, Task
+
+from conftest import FakeWorker, make_task
+
+
+class FifoWorker(FakeWorker):
+    """按先进先出的输入队列逐批解码，模拟识别进程"""
+
+    def __init__(self, index, batch_size):
+        super().__init__(index)
+        self.batch_size = batch_size
+        self.done = []
+
+    def step(self):
+        batch = self.tasks[: self.batch_size]
+        del self.tasks[: self.batch_size]
+        self.pending -= len(batch)
+        self.done += batch
+
+
+@pytest.mark.unit
+class TestRecognizerPool:
+    """测试识别进程池的派发"""
+
+    def test_affinity_and_balance(self):
+        pool = RecognizerPool(None, None, {"workers": 2})
+        pool.workers = [FakeWorker(0, pending=3), FakeWorker(1)]
+
+        pool.submit(make_task("a"))
+        pool.submit(make_task("b"))
+        pool.submit(make_task("a", is_final=True))
+        assert pool.dispatch_once() == 3
+
+        # 0 号积压更多，新任务都派给 1 号；a 的后续片段跟随 a
+        assert pool.workers[1].tasks == ["a", "b", "a"]
+        assert "a" not in pool.affinity
+        assert pool.affinity["b"] is pool.workers[1]
+
+    def test_skip_draining(self):
+        pool = RecognizerPool(None, None, {"workers": 2})
+        pool.workers = [FakeWorker(0), FakeWorker(1, pending=5)]
+        pool.workers[0].draining = True
+
+        pool.submit(make_task("a"))
+        pool.dispatch_once()
+        assert pool.workers[1].tasks == ["a"]
+
+    def test_max_inflight(self):
+        pool = RecognizerPool(None, None, {}, scheduler_config={"max_inflight": 1})
+        pool.workers = [FakeWorker(0, pending=1)]
+
+        pool.submit(make_task("f", source="file"))
+        pool.submit(make_task("m"))
+        # 进程已满载，只有麦克风任务能派发，文件片段留在调度队列
+        assert pool.dispatch_once() == 1
+        assert pool.workers[0].tasks == ["m"]
+
+        pool.workers[0].pending = 0
+        assert pool.dispatch_once() == 1
+
+    def test_cancel_purges_queue(self):
+        pool = RecognizerPool(None, CancelSet(), {})
+        pool.submit(make_task("a", source="file"))
+        pool.submit(make_task("b", source="file"))
+        pool.cancel("a")
+        assert len(pool.scheduler) == 1 and "a" in pool.cancelled
+
+    def test_buffer_before_ready(self):
+        pool = RecognizerPool(None, None, {"warmup_buffer_mb": 1})
+        pool.workers = [FakeWorker(0)]
+        pool.workers[0].ready = False
+        audio = bytes(600 * 1024)
+
+        assert pool.submit(Task("mic", audio, 0, 0, "a", "s", False, 0.0, 0.0))
+        assert not pool.submit(Task("mic", audio, 0, 0, "b", "s", False, 0.0, 0.0))
+        assert pool.dispatch_once() == 0
+
+        # 载入完成后缓存的任务照常派发，不再受缓存上限约束
+        pool.workers[0].ready = True
+        assert pool.submit(Task("mic", audio, 0, 0, "b", "s", False, 0.0, 0.0))
+        assert pool.dispatch_once() == 2
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    @pytest.mark.parametrize("batch_size", [1, 8])
+    def test_mic_latency_under_file_backlog(self, batch_size, streaming):
+        # max_inflight 取批大小，与 main.start_recognizer_service 的默认一致
+        pool = RecognizerPool(
+            None, None, {}, scheduler_config={"max_inflight": batch_size}
+        )
+        worker = FifoWorker(0, batch_size)
+        pool.workers = [worker]
+        for i in range(80):
+            pool.submit(make_task(f"f{i}", source="file"))
+        pool.dispatch_once()
+        worker.step()
+        pool.dispatch_once()
+
+        # 流式识别的音频块与分段的麦克风任务走同一条优先路径
+        pool.submit(make_task("m", is_final=True, streaming=streaming))
+        pool.dispatch_once()
+        steps = 0
+        while "m" not in worker.done:
+            worker.step()
+            pool.dispatch_once()
+            steps += 1
+        # 麦克风任务最多等进程里已有的一批，与文件积压的长度无关
+        assert steps <= 2
+        assert len(pool.scheduler) > 40
+
+    def test_default_max_inflight(self):
+        pool = RecognizerPool(None, None, {})
+        assert pool.max_inflight == 1
+
+    def test_pack_on_dispatch(self):
+        arena = AudioArena(slots=2, slot_size=64)
+        try:
+            pool = RecognizerPool(None, None, {}, arena)
+            pool.workers = [FakeWorker(0, pending=1)]
+            for task_id in ("a", "b", "c"):
+                pool.submit(Task("file", b"\0" * 64, 0, 0, task_id, "s", False, 0, 0))
+            # 排队中的片段不占共享内存
+            assert arena.usage() == 0
+
+            pool.workers[0].pending = 0
+            assert pool.dispatch_once() == 1
+            assert arena.usage() == 0.5
+        finally:
+            arena.close()
+
+    def test_dispatch_idle_waits(self, monkeypatch):
+        pool = RecognizerPool(None, None, {"poll_interval": 0.005})
+        calls = []
+        monkeypatch.setattr(pool, "dispatch_once", lambda: calls.append(1))
+
+        async def run():
+            loop = asyncio.create_task(pool.dispatch())
+            # 队列为空时不轮询，只在被唤醒时派发
+            await asyncio.sleep(0.05)
+            assert len(calls) == 1
+            pool.wake()
+            await asyncio.sleep(0.01)
+            assert len(calls) == 2
+            # 有积压时定时轮询
+            pool.scheduler.put(make_task("a", source="file"))
+            pool.wake()
+            await asyncio.sleep(0.05)
+            assert len(calls) > 4
+            loop.cancel()
+
+        asyncio.run(run())
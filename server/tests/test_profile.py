@@ -0,0 +1,25 @@
+import json
+import sys
+
+import pytest
+
+from src.utils import StartupProfile
+
+
+@pytest.mark.unit
+class TestStartupProfile:
+    """测试启动耗时剖析"""
+
+    def test_profile(self, tmp_path):
+        profile = StartupProfile()
+        sys.modules.pop("colorsys", None)
+        module = profile.import_module("colorsys")
+        assert module is sys.modules["colorsys"]
+        profile.import_module("colorsys")  # 已导入的模块不重复记录
+        with profile.stage("load recognizer"):
+            pass
+
+        profile.save(tmp_path / "logs" / "startup.json")
+        saved = json.loads((tmp_path / "logs" / "startup.json").read_text())
+        assert list(saved["imports"]) == ["colorsys"]
+        assert "load recognizer" in saved["stages"] and saved["elapsed"] >= 0
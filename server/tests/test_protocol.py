@@ -0,0 +1,62 @@
+import json
+import uuid
+import base64
+
+import numpy as np
+import pytest
+
+from src.net.protocol import pack_frame, unpack_frame, decode_message
+
+
+def make_message(data: bytes, **kwargs):
+    message = {
+        "task_id": str(uuid.uuid1()),
+        "seg_duration": 15,
+        "seg_overlap": 2,
+        "is_final": False,
+        "time_start": 1700000000.25,
+        "time_frame": 1700000001.5,
+        "source": "mic",
+        "offset": 4800,
+        "data": data,
+    }
+    message.update(kwargs)
+    return message
+
+
+@pytest.mark.unit
+class TestProtocol:
+    """测试 v2 二进制帧与旧版 JSON 协议"""
+
+    def test_frame_roundtrip(self):
+        samples = np.linspace(-1, 1, 1600, dtype=np.float32)
+        message = make_message(samples.tobytes(), is_final=True, source="file")
+        decoded = unpack_frame(pack_frame(message))
+
+        for key in ("task_id", "is_final", "source", "offset", "time_start"):
+            assert decoded[key] == message[key]
+        assert bytes(decoded["data"]) == samples.tobytes()
+
+    def test_int16(self):
+        samples = np.linspace(-1, 1, 1600, dtype=np.float32)
+        frame = pack_frame(make_message(samples.tobytes()), int16=True)
+        decoded = unpack_frame(frame)
+
+        restored = np.frombuffer(decoded["data"], dtype=np.float32)
+        assert len(frame) < len(samples.tobytes())
+        assert np.allclose(restored, samples, atol=1e-4)
+
+    def test_extra(self):
+        message = make_message(b"", extra={"model": "sensevoice"})
+        assert unpack_frame(pack_frame(message))["extra"] == {"model": "sensevoice"}
+
+    async def test_decode_json(self):
+        message = make_message(b"")
+        message["data"] = base64.b64encode(b"\0" * 8).decode("utf-8")
+        decoded = await decode_message(json.dumps(message))
+        assert decoded["data"] == b"\0" * 8
+
+    async def test_decode_large_frame(self):
+        samples = np.zeros(16000 * 5, dtype=np.float32)
+        decoded = await decode_message(pack_frame(make_message(samples.tobytes())))
+        assert len(decoded["data"]) == len(samples) * 4
@@ -0,0 +1,49 @@
+import pytest
+
+from src.asr.punctuation import IncrementalPunctuator
+
+from conftest import make_result
+
+SENTENCE = "今天天气很好我们出去玩了"
+
+
+class FakePunctuator:
+    """在“好”后加逗号、“了”后加句号，并记录处理过的字数"""
+
+    def __init__(self):
+        self.chars = 0
+
+    def __call__(self, text):
+        self.chars += len(text)
+        return text.replace("好", "好，").replace("了", "了。")
+
+
+@pytest.mark.unit
+class TestIncrementalPunctuator:
+    """测试增量加标点"""
+
+    def test_same_as_full(self):
+        fake = FakePunctuator()
+        punctuator = IncrementalPunctuator(fake, context=4)
+        for i in range(1, 6):
+            text = punctuator(make_result(SENTENCE * i, is_final=i == 5))
+        assert text == fake(SENTENCE * 5)
+        assert not punctuator._states
+
+    def test_linear_work(self):
+        fake = FakePunctuator()
+        punctuator = IncrementalPunctuator(fake, context=4)
+        for i in range(1, 101):
+            punctuator(make_result(SENTENCE * i))
+        # 全文重算约为 50 倍全文长度，增量只处理新文字与上下文
+        assert fake.chars < len(SENTENCE) * 100 * 3
+
+    def test_rewritten_tail(self):
+        punctuator = IncrementalPunctuator(FakePunctuator(), context=4)
+        punctuator(make_result(SENTENCE + "明天"))
+        assert punctuator(make_result("昨天天气很好")) == "昨天天气很好，"
+
+    def test_skip_partial_file(self):
+        punctuator = IncrementalPunctuator(FakePunctuator(), skip_partial_file=True)
+        assert punctuator(make_result(SENTENCE)) == SENTENCE
+        assert punctuator(make_result(SENTENCE, is_final=True)).endswith("了。")
@@ -0,0 +1,134 @@
+import os
+
+import pytest
+
+from src.asr import loaders
+from src.asr.loaders import BaseLoader
+from src.asr.recognizer import recognize
+from src.asr.registry import ModelRegistry, DEFAULT_MODEL
+from src.utils import Result
+
+from conftest import make_task
+
+
+class FakeLoader(BaseLoader):
+    """按配置里的 model 文件载入，识别结果的文字为模型名"""
+
+    loads = []
+
+    def load(self, **kwargs):
+        if kwargs.get("_fail"):
+            raise RuntimeError("broken model")
+        self.name = kwargs["_name"]
+        FakeLoader.loads.append(self.name)
+        return self
+
+    def __call__(self, task):
+        result = Result(task.task_id, task.socket_id, task.source)
+        result.text = self.name
+        return result
+
+
+@pytest.fixture
+def fake_loader(monkeypatch):
+    FakeLoader.loads = []
+    monkeypatch.setitem(loaders.LOADERS, "fake", FakeLoader)
+
+
+def make_config(tmp_path, name, size=100):
+    path = tmp_path / f"{name}.onnx"
+    path.write_bytes(b"\0" * size)
+    return {"_type": "fake", "_name": name, "model": str(path)}
+
+
+def wait_loading(registry):
+    """载入线程只有一个，排在后面的空任务完成时之前的载入都已完成"""
+    registry._executor.submit(lambda: None).result()
+
+
+@pytest.mark.unit
+class TestModelRegistry:
+    """测试识别模型的按需载入、卸载与重新载入"""
+
+    def test_lazy_load(self, tmp_path, fake_loader):
+        registry = ModelRegistry({"a": make_config(tmp_path, "a")})
+        assert FakeLoader.loads == []
+        assert registry.get("a").name == "a"
+        assert registry.get("a").name == "a"
+        assert FakeLoader.loads == ["a"]
+        assert registry.get("missing") is None
+
+    def test_evict_over_budget(self, tmp_path, fake_loader):
+        configs = {name: make_config(tmp_path, name) for name in "abc"}
+        registry = ModelRegistry(configs, memory_budget=250)
+        default = FakeLoader().load(_name=DEFAULT_MODEL)
+        registry.put(DEFAULT_MODEL, default, {}, pinned=True)
+
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")
+        registry.get("c")
+        # 超出预算时卸载最久未用的 b，默认模型常驻
+        assert DEFAULT_MODEL in registry
+        assert "a" in registry and "c" in registry
+        assert "b" not in registry
+        assert registry.memory() <= 250
+
+    def test_evict_idle(self, tmp_path, fake_loader):
+        registry = ModelRegistry({"a": make_config(tmp_path, "a")}, idle_timeout=0)
+        registry.get("a")
+        assert "a" in registry
+        assert registry.evict() == ["a"]
+        # 卸载后再次选用会重新载入
+        registry.get("a")
+        assert FakeLoader.loads == ["a", "a"]
+
+    def test_reload_on_change(self, tmp_path, fake_loader):
+        config = make_config(tmp_path, "a")
+        registry = ModelRegistry({"a": config}, check_interval=0)
+        first = registry.get("a")
+        assert registry.get("a") is first
+
+        os.utime(config["model"], (0, 0))
+        second = registry.get("a")
+        assert second is not first
+        assert FakeLoader.loads == ["a", "a"]
+
+        # 新文件载入失败时继续用旧模型
+        os.utime(config["model"], (1, 1))
+        config["_fail"] = True
+        assert registry.get("a") is second
+
+    def test_recognize_by_model(self, tmp_path, fake_loader):
+        registry = ModelRegistry({"a": make_config(tmp_path, "a")})
+        default = FakeLoader().load(_name=DEFAULT_MODEL)
+        registry.put(DEFAULT_MODEL, default, {}, pinned=True)
+
+        tasks = [
+            make_task("x"),
+            make_task("y", model="a"),
+            make_task("z", model="missing"),
+        ]
+        results = recognize(tasks, default, None, registry)
+        texts = {result.task_id: result.text for result in results}
+        assert texts == {"x": DEFAULT_MODEL, "y": "a", "z": DEFAULT_MODEL}
+
+    def test_background_load(self, tmp_path, fake_loader):
+        config = make_config(tmp_path, "a")
+        registry = ModelRegistry({"a": config}, check_interval=0, background=True)
+        default = FakeLoader().load(_name=DEFAULT_MODEL)
+        registry.put(DEFAULT_MODEL, default, {}, pinned=True)
+
+        # 载入完成前不等待，任务先用默认模型识别
+        results = recognize([make_task("y", model="a")], None, None, registry)
+        assert results[0].text == DEFAULT_MODEL
+        wait_loading(registry)
+        first = registry.get("a")
+        assert first.name == "a"
+
+        # 文件被替换后，新模型载入完成前继续用旧模型
+        os.utime(config["model"], (0, 0))
+        assert registry.get("a") is first
+        wait_loading(registry)
+        assert registry.get("a") is not first
+        assert FakeLoader.loads == [DEFAULT_MODEL, "a", "a"]
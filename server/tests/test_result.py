@@ -0,0 +1,56 @@
+import pickle
+from types import SimpleNamespace
+
+import pytest
+
+from src.asr.loaders import ParaformerLoader
+from src.utils import Result
+
+
+def make_stream(tokens, timestamps):
+    return SimpleNamespace(result=SimpleNamespace(tokens=tokens, timestamps=timestamps))
+
+
+@pytest.mark.unit
+class TestResult:
+    """测试紧凑的结果表示与增量合并"""
+
+    def test_append_text(self):
+        loader = ParaformerLoader()
+        tokens = ["你", "好", "hel@@", "lo", "world", "的", "ok", "。", "好"]
+        text = ""
+        for i in range(len(tokens)):
+            text = loader._append_text(text, tokens[: i + 1], i)
+            assert text == loader._format_text(tokens[: i + 1])
+        assert loader._append_text(text, tokens, len(tokens)) == text
+        assert loader._append_text("你好。", ["你", "好", "吗"], 2) == "你好吗"
+
+    def test_deduplicate(self):
+        loader = ParaformerLoader()
+        result = Result("t", "s", "file")
+        stream = make_stream(list("abcdefg"), [0.2, 0.6, 1.1, 3.0, 4.5, 5.2, 5.8])
+
+        # 重叠 2 秒：丢掉前 1 秒内和 5 秒之后（保留第一个越界的）的 token；
+        # 还没有结果时不丢开头
+        assert loader._deduplicate_timestamps(stream, result, 6, 2, False) == (0, 6)
+        result.timestamps.append(0.0)
+        assert loader._deduplicate_timestamps(stream, result, 6, 2, False) == (2, 6)
+        assert loader._deduplicate_timestamps(stream, result, 6, 2, True) == (2, 7)
+        assert loader._deduplicate_timestamps(stream, result, 6, 0, False) == (0, 7)
+
+    def test_pickle_snapshot(self):
+        result = Result("t", "s", "file")
+        result.tokens += ["你", "好"]
+        result.timestamps.extend([0.5, 1.0])
+        result.text = "你好"
+
+        copied = pickle.loads(pickle.dumps(result))
+        assert copied.tokens == ["你", "好"] and copied.timestamps.tolist() == [
+            0.5,
+            1.0,
+        ]
+        snapshot = result.snapshot()
+        result.tokens.append("吗")
+        result.timestamps.append(1.5)
+        assert len(snapshot.tokens) == len(snapshot.timestamps) == 2
+        assert snapshot.text == "你好"
@@ -0,0 +1,34 @@
+import pytest
+
+from src.net.ring_buffer import RingBuffer
+
+
+@pytest.mark.unit
+class TestRingBuffer:
+    """测试分段用的环形缓冲区"""
+
+    def test_cut_matches_bytes(self):
+        stream = bytes(range(256)) * 40
+        buffer, cache = RingBuffer(capacity=100), b""
+        windows, expected = [], []
+        for i in range(0, len(stream), 37):
+            buffer.write(stream[i : i + 37])
+            windows += [bytes(w) for w in buffer.cut(60, 50, 70)]
+
+            cache += stream[i : i + 37]
+            while len(cache) >= 70:
+                expected.append(cache[:60])
+                cache = cache[50:]
+
+        assert windows == expected
+        assert bytes(buffer.peek(len(buffer))) == cache
+
+    def test_grow(self):
+        buffer = RingBuffer(capacity=8)
+        buffer.write(b"abc")
+        buffer.write(b"0123456789")
+        assert buffer.capacity >= 13
+        assert bytes(buffer.peek(100)) == b"abc0123456789"
+
+        buffer.consume(13)
+        assert len(buffer) == 0
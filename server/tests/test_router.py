@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from src.net.router import Router
+
+from conftest import FakeWebSocket
+
+
+@pytest.mark.unit
+class TestRouter:
+    """测试连接路由与慢客户端处理"""
+
+    async def test_route_by_id(self):
+        router = Router()
+        fast, other = FakeWebSocket("a"), FakeWebSocket("b")
+        router.register(fast)
+        router.register(other)
+
+        assert router.route("a", "t1", True, {"text": "hi"})
+        assert not router.route("missing", "t1", True, {})
+        await asyncio.sleep(0.01)
+
+        assert fast.messages == ['{"text": "hi"}'] and other.messages == []
+        await router.unregister("a")
+        await router.unregister("b")
+
+    async def test_drop_stale_partial(self):
+        router = Router({"send_queue_size": 2})
+        slow = FakeWebSocket("a", delay=0.05)
+        connection = router.register(slow)
+
+        for i in range(5):
+            router.route("a", "t1", False, {"i": i})
+        router.route("a", "t1", True, {"i": "final"})
+
+        # 尚未发出的中间结果只保留最新一条
+        assert connection.backlog == 2
+        assert connection.dropped == 4
+        await asyncio.sleep(0.2)
+        assert slow.messages == ['{"i": 4}', '{"i": "final"}']
+        await router.unregister("a")
+
+    async def test_disconnect_slow_consumer(self):
+        router = Router({"send_queue_size": 1, "slow_timeout": 0.0})
+        slow = FakeWebSocket("a", delay=1)
+        router.register(slow)
+
+        for i in range(3):
+            router.route("a", f"t{i}", True, {})
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+        assert slow.closed_code == 1008
+        await router.unregister("a")
+        assert router.slow_disconnects == 1
+
+    async def test_account(self):
+        router = Router()
+        router.register(FakeWebSocket("a"))
+
+        router.account("a", 2.0, 0.5)
+        router.account("a", 1.0, 0.25)
+        router.account("missing", 1.0, 1.0)
+
+        stats = router.stats()["a"]
+        assert stats["decoded_seconds"] == 3.0 and stats["cpu_time"] == 0.75
+        await router.unregister("a")
+
+    async def test_notify_v2_only(self):
+        router = Router()
+        old, new = FakeWebSocket("old"), FakeWebSocket("new", subprotocol="binary")
+        router.register(old)
+        router.register(new)
+        router.subscribe("new", "final")
+
+        router.broadcast({"type": "status", "status": "ready"})
+        await asyncio.sleep(0.01)
+
+        assert old.messages == []
+        assert new.messages == ['{"type": "status", "status": "ready"}']
+        await router.unregister("old")
+        await router.unregister("new")
@@ -0,0 +1,66 @@
+import time
+import pstats
+import threading
+import tracemalloc
+
+import pytest
+
+from src.asr.pool import RecognizerPool, WorkerContext
+from src.utils import SamplingProfiler
+
+from conftest import FakeWorker
+
+
+def busy_loop(stop):
+    data = []
+    while not stop.is_set():
+        data.append(sum(i * i for i in range(1000)))
+
+
+@pytest.mark.unit
+class TestSamplingProfiler:
+    """测试按需的栈采样剖析"""
+
+    def test_capture(self, tmp_path):
+        stop = threading.Event()
+        thread = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+        thread.start()
+        profiler = SamplingProfiler("test", {"dir": str(tmp_path), "interval": 0.001})
+        try:
+            paths = profiler.capture(0.2)
+        finally:
+            stop.set()
+            thread.join()
+
+        stats = pstats.Stats(str(paths["pstats"]))
+        functions = {name for _, _, name in stats.stats}
+        assert "busy_loop" in functions
+        stats.sort_stats("cumulative").print_stats(0)  # 能被标准工具读取
+
+        collapsed = paths["collapsed"].read_text(encoding="utf-8")
+        assert any(
+            line.startswith("busy;") and "busy_loop" in line
+            for line in collapsed.splitlines()
+        )
+        tracemalloc.Snapshot.load(str(paths["memory"]))
+        assert paths["memory_top"].exists()
+        # 剖析结束后不再追踪内存分配
+        assert not tracemalloc.is_tracing()
+
+    def test_trigger_once(self, tmp_path):
+        profiler = SamplingProfiler("test", {"dir": str(tmp_path), "seconds": 0.2})
+        assert profiler.trigger()
+        assert not profiler.trigger()
+        deadline = time.time() + 5
+        while profiler.running and time.time() < deadline:
+            time.sleep(0.05)
+        assert not profiler.running
+        assert len(list(tmp_path.glob("test-*.pstats"))) == 1
+
+    def test_pool_forwards(self):
+        pool = RecognizerPool(None, None, {})
+        pool.workers = [FakeWorker(i, context=WorkerContext(i, None)) for i in (0, 1)]
+        pool.profile(3.0)
+        for worker in pool.workers:
+            assert worker.context.profile.is_set()
+            assert worker.context.profile_seconds.value == 3.0
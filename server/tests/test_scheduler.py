@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+from src.asr.scheduler import TaskScheduler
+
+from conftest import make_task
+
+
+@pytest.mark.unit
+class TestTaskScheduler:
+    """测试麦克风优先的调度"""
+
+    def test_mic_first(self):
+        scheduler = TaskScheduler()
+        for i in range(3):
+            scheduler.put(make_task(f"f{i}", "file"))
+        scheduler.put(make_task("m", "mic"))
+
+        order = [scheduler.pop().task_id for _ in range(4)]
+        assert order == ["m", "f0", "f1", "f2"]
+        assert scheduler.pop() is None
+
+    def test_starvation_by_streak(self):
+        scheduler = TaskScheduler(batch_every=2)
+        scheduler.put(make_task("f", "file"))
+        for i in range(4):
+            scheduler.put(make_task(f"m{i}", "mic"))
+
+        order = [scheduler.pop().task_id for _ in range(5)]
+        assert order == ["m0", "m1", "f", "m2", "m3"]
+
+    def test_starvation_by_age(self):
+        scheduler = TaskScheduler(max_batch_wait=0.01)
+        scheduler.put(make_task("f", "file"))
+        time.sleep(0.02)
+        scheduler.put(make_task("m", "mic"))
+        assert scheduler.pop().task_id == "f"
+
+    def test_old_backlog_does_not_invert_priority(self):
+        scheduler = TaskScheduler(max_batch_wait=0.05)
+        for i in range(5):
+            scheduler.put(make_task(f"f{i}", "file"))
+        time.sleep(0.1)
+        # 积压已超过 max_batch_wait：先派发一个文件片段防饿死
+        assert scheduler.pop().task_id == "f0"
+        # 之后新的麦克风任务仍然先出队，直到再过 max_batch_wait
+        scheduler.put(make_task("m0", "mic"))
+        assert scheduler.pop().task_id == "m0"
+        time.sleep(0.1)
+        scheduler.put(make_task("m1", "mic"))
+        assert scheduler.pop().task_id == "f1"
+        assert scheduler.pop().task_id == "m1"
+
+    def test_eligible_and_report(self):
+        scheduler = TaskScheduler()
+        scheduler.put(make_task("a", "file"))
+        scheduler.put(make_task("b", "file"))
+
+        assert scheduler.pop(lambda t: t.task_id == "b").task_id == "b"
+        report = scheduler.report()
+        assert report["batch"]["count"] == 1 and report["batch"]["depth"] == 1
+        assert report["interactive"]["count"] == 0
+
+
+@pytest.mark.unit
+class TestFairShare:
+    """测试文件片段按连接公平轮询"""
+
+    def test_round_robin_between_connections(self):
+        scheduler = TaskScheduler(max_batch_wait=60, quantum=30)
+        for i in range(4):
+            scheduler.put(make_task(f"a{i}", "file", 25, socket_id="A"))
+        scheduler.put(make_task("b0", "file", 25, socket_id="B"))
+        scheduler.put(make_task("b1", "file", 25, socket_id="B"))
+
+        order = [scheduler.pop().task_id for _ in range(6)]
+        assert order[:4] == ["a0", "b0", "a1", "b1"]
+        assert scheduler.pop() is None
+
+    def test_weighted_by_audio_seconds(self):
+        # A 的片段短、B 的片段长，按音频秒数两者识别量相当
+        scheduler = TaskScheduler(max_batch_wait=60, quantum=10)
+        for i in range(12):
+            scheduler.put(make_task(f"a{i}", "file", 5, socket_id="A"))
+        for i in range(3):
+            scheduler.put(make_task(f"b{i}", "file", 20, socket_id="B"))
+
+        seconds = {"A": 0, "B": 0}
+        for _ in range(8):
+            task = scheduler.pop()
+            seconds[task.socket_id] += len(task.data) / 4 / 16000
+        assert abs(seconds["A"] - seconds["B"]) <= 20
+
+    def test_ineligible_flow_skipped(self):
+        scheduler = TaskScheduler(max_batch_wait=60)
+        scheduler.put(make_task("a", "file", 1, socket_id="A"))
+        scheduler.put(make_task("b", "file", 1, socket_id="B"))
+
+        assert scheduler.pop(lambda t: t.socket_id == "B").task_id == "b"
+        assert scheduler.pop().task_id == "a"
+
+    def test_reject_non_positive_quantum(self):
+        for quantum in (0, -1.0):
+            with pytest.raises(ValueError):
+                TaskScheduler(quantum=quantum)
+
+    def test_purge_connection(self):
+        scheduler = TaskScheduler()
+        scheduler.put(make_task("a", "file", 1, socket_id="A"))
+        scheduler.put(make_task("b", "file", 1, socket_id="B"))
+
+        removed = scheduler.purge(lambda t: t.socket_id == "A")
+        assert [t.task_id for t in removed] == ["a"]
+        assert len(scheduler) == 1 and scheduler.pop().task_id == "b"
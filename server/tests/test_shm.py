@@ -0,0 +1,50 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from src.utils import AudioArena, AudioRef
+
+
+@pytest.fixture
+def arena():
+    arena = AudioArena(slots=4, slot_size=64)
+    yield arena
+    arena.close()
+
+
+@pytest.mark.unit
+class TestAudioArena:
+    """测试音频共享内存"""
+
+    def test_pack_unpack(self, arena):
+        data = np.arange(40, dtype=np.float32).tobytes()
+        ref = arena.pack(data)
+        assert isinstance(ref, AudioRef) and ref.count == 3
+
+        # 描述符很小，可以跨进程传递
+        ref = pickle.loads(pickle.dumps(ref))
+        samples = arena.unpack(ref)
+        assert np.array_equal(samples, np.arange(40, dtype=np.float32))
+        assert arena.usage() == 0.75
+
+        arena.release(ref)
+        assert arena.usage() == 0
+
+    def test_fallback_when_full(self, arena):
+        refs = [arena.pack(b"\0" * 64) for _ in range(4)]
+        assert all(isinstance(ref, AudioRef) for ref in refs)
+        assert arena.pack(b"\1" * 8) == b"\1" * 8
+
+        arena.release(refs[1])
+        assert arena.pack(b"\1" * 8).slot == 1
+
+    def test_small_chunks_bypass(self):
+        arena = AudioArena(slots=4, slot_size=64, min_bytes=16)
+        try:
+            # 短音频（如流式识别的小块）不占槽位
+            assert arena.pack(b"\1" * 8) == b"\1" * 8
+            assert arena.usage() == 0
+            assert isinstance(arena.pack(b"\0" * 16), AudioRef)
+        finally:
+            arena.close()
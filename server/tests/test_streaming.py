@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.asr.loaders import StreamingParaformerLoader, RESULTS
+
+from conftest import make_task
+
+
+class FakeOnlineRecognizer:
+    """每 0.1 秒音频解码出一个 token；有字之后解码到全为 0 的一帧视为端点"""
+
+    def create_stream(self):
+        stream = SimpleNamespace(samples=np.zeros(0, np.float32), tokens=[])
+        stream.silent = False
+
+        def accept_waveform(samplerate, samples):
+            stream.samples = np.concatenate([stream.samples, samples])
+
+        stream.accept_waveform = accept_waveform
+        stream.input_finished = lambda: None
+        return stream
+
+    def is_ready(self, stream):
+        return len(stream.samples) >= 1600
+
+    def decode_streams(self, streams):
+        for stream in streams:
+            frame, stream.samples = stream.samples[:1600], stream.samples[1600:]
+            stream.silent = not frame.any()
+            if not stream.silent:
+                stream.tokens.append("甲乙丙丁戊"[len(stream.tokens)])
+
+    def tokens(self, stream):
+        return stream.tokens
+
+    def timestamps(self, stream):
+        return [i * 0.1 for i in range(len(stream.tokens))]
+
+    def is_endpoint(self, stream):
+        return stream.silent and bool(stream.tokens)
+
+    def reset(self, stream):
+        stream.tokens = []
+
+
+def make_frame(seconds, is_final=False, silent=False, data=None):
+    """流式任务 t 的一段麦克风音频，非静音时取值为 1"""
+    fill = 0.0 if silent else 1.0
+    return make_task(
+        seconds=seconds, is_final=is_final, fill=fill, data=data, streaming=True
+    )
+
+
+def make_loader():
+    loader = StreamingParaformerLoader()
+    loader._model = FakeOnlineRecognizer()
+    loader._states = {}
+    return loader
+
+
+@pytest.mark.unit
+class TestStreamingLoader:
+    """测试流式识别的中间结果与端点"""
+
+    def test_partial_endpoint_final(self):
+        loader = make_loader()
+
+        partial = loader(make_frame(0.2))
+        assert partial.text == "甲乙" and not partial.is_final
+
+        # 不足一帧，文本没变化，不产出结果
+        assert loader(make_frame(0.05)) is None
+
+        # 端点之后流被重置，之前的文本保留下来
+        (sentence,) = loader.recognize_batch([make_frame(0.15, silent=True)])
+        assert sentence.sentence == "甲乙丙" and not sentence.is_final
+        partial = loader(make_frame(0.1))
+        assert partial.text == "甲乙丙甲" and partial.sentence is None
+        assert partial.timestamps[-1] == pytest.approx(0.4)
+
+        final = loader(make_frame(0.1, is_final=True))
+        assert final.is_final and final.text == "甲乙丙甲乙"
+        assert "t" not in RESULTS and not loader._states
+
+    def test_two_sentences_in_one_batch(self):
+        loader = make_loader()
+        speech, silence = np.ones(3200, np.float32), np.zeros(1600, np.float32)
+        frames = [speech, silence, speech, silence, speech[:1600]]
+        tasks = [make_frame(0, data=frame.tobytes()) for frame in frames]
+
+        # 一批里的两个端点各产出一条句子结果，最后是当前的中间结果
+        first, second, partial = loader.recognize_batch(tasks)
+        assert (first.sentence, first.text) == ("甲乙", "甲乙")
+        assert (second.sentence, second.text) == ("甲乙", "甲乙甲乙")
+        assert list(second.timestamps) == pytest.approx([0, 0.1, 0.3, 0.4])
+        assert partial.text == "甲乙甲乙甲" and partial.sentence is None
+        assert partial.timestamps[-1] == pytest.approx(0.6)
+        RESULTS.pop("t", None)
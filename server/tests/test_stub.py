@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.asr.loaders import load_model, RESULTS
+from src.asr.stub import StubRecognizer, VOCABULARY
+
+from conftest import make_segment
+
+
+@pytest.mark.unit
+class TestStub:
+    """测试不需要模型的 stub 识别器"""
+
+    def test_deterministic_tokens(self):
+        recognizer = StubRecognizer(rtf=0.0, overhead=0.0, token_rate=2.0)
+        stream = recognizer.create_stream()
+        stream.accept_waveform(16000, np.zeros(16000 * 3, dtype=np.float32))
+        recognizer.decode_stream(stream)
+        assert stream.result.tokens == list("今天天气很好")
+        assert stream.result.timestamps == [0.25, 0.75, 1.25, 1.75, 2.25, 2.75]
+
+    def test_cost_scales_with_audio(self):
+        recognizer = StubRecognizer(rtf=0.02, overhead=0.0)
+        streams = []
+        for seconds in (2, 3):
+            stream = recognizer.create_stream()
+            stream.accept_waveform(16000, np.zeros(16000 * seconds, np.float32))
+            streams.append(stream)
+        t = time.perf_counter()
+        recognizer.decode_streams(streams)
+        assert time.perf_counter() - t >= 0.1
+
+    def test_loader_merges_segments(self):
+        loader = load_model("stub", _type="stub", rtf=0.0, overhead=0.0)
+        tasks = [
+            make_segment("stub", 0, 4, seq=0),
+            make_segment("stub", 1, 2, is_final=True, seq=1),
+        ]
+        results = loader.recognize_batch(tasks)
+        final = results[-1]
+        assert final.is_final
+        # 每秒 4 个 token，两个片段各自从词表开头取
+        assert final.text == VOCABULARY[:16] + VOCABULARY[:8]
+        assert final.duration == pytest.approx(6.0)
+        assert "stub" not in RESULTS
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from src.asr.pool import RecognizerPool
+from src.asr.loaders import BaseLoader
+from src.asr.recognizer import recognize
+from src.net.delta import DeltaEncoder
+from src.utils import TraceLog, Result, span, span_begin, span_end
+
+from conftest import FakeWorker, make_task
+
+
+class EchoLoader(BaseLoader):
+    def load(self, **kwargs):
+        return self
+
+    def __call__(self, task):
+        return Result(task.task_id, task.socket_id, task.source)
+
+
+def names(spans):
+    return [name for name, _, _ in spans]
+
+
+@pytest.mark.unit
+class TestTrace:
+    """测试逐阶段追踪"""
+
+    def test_span_helpers(self):
+        task = make_task("a", spans=[])
+        span_begin(task, "queue")
+        with span([task], "decode"):
+            pass
+        span_end(task, "queue")
+        assert names(task.spans) == ["queue", "decode"]
+        assert all(end is not None and end >= start for _, start, end in task.spans)
+
+        # 未开启追踪时什么也不记录
+        task = make_task("b")
+        with span(task, "decode"):
+            span_begin(task, "queue")
+        assert task.spans is None
+
+    def test_pool_and_recognize(self):
+        pool = RecognizerPool(None, None, {})
+        pool.workers = [FakeWorker(0)]
+        task = make_task("a", spans=[["unpack", 1.0, 1.1]])
+        pool.submit(task)
+        pool.dispatch_once()
+        span_end(task, "transfer")
+
+        results = recognize([task], EchoLoader(), None)
+        assert names(results[0].spans) == ["unpack", "queue", "transfer", "recognize"]
+
+        # 结果快照的阶段与原结果互不影响
+        snapshot = results[0].snapshot()
+        span_begin(snapshot, "punctuation")
+        assert len(results[0].spans) == 4
+
+    def test_write_jsonl(self, tmp_path):
+        log = TraceLog()
+        log.configure({"enable": True, "path": str(tmp_path / "trace.jsonl")})
+        assert log.new_spans() == []
+        log.write("a", [["queue", 1.0, 2.0], ["deliver", 3.0, None]])
+        lines = (tmp_path / "trace.jsonl").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {
+                "trace_id": "a",
+                "name": "queue",
+                "start": 1.0,
+                "end": 2.0,
+                "process": "server",
+            }
+        ]
+
+    def test_delta_keeps_spans(self):
+        message = {
+            "task_id": "a",
+            "duration": 1.0,
+            "time_start": 0.0,
+            "time_submit": 0.0,
+            "time_complete": 0.0,
+            "tokens": ["你"],
+            "timestamps": [0.0],
+            "text": "你",
+            "is_final": True,
+            "spans": [["queue", 1.0, 2.0]],
+        }
+        delta = DeltaEncoder().encode("text", message)
+        assert delta["spans"] == [["queue", 1.0, 2.0]]
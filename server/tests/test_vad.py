@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.net.vad import EnergyVad, VadSegmenter
+
+
+def tone(seconds):
+    t = np.arange(int(16000 * seconds)) / 16000
+    return (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(16000 * seconds), dtype=np.float32)
+
+
+def run(segmenter, audio, chunk=16000 * 7):
+    segments = []
+    for i in range(0, len(audio), chunk):
+        segments += segmenter.accept(audio[i : i + chunk])
+    return segments + segmenter.flush()
+
+
+@pytest.mark.unit
+class TestVadSegmenter:
+    """测试 VAD 分段"""
+
+    def test_skip_long_silence(self):
+        audio = np.concatenate([silence(3), tone(2), silence(30), tone(4), silence(1)])
+        segments = run(VadSegmenter(EnergyVad(), max_duration=25), audio)
+
+        assert len(segments) == 2
+        (start1, seg1), (start2, seg2) = segments
+        assert start1 == pytest.approx(2.8, abs=0.05)
+        assert start2 == pytest.approx(34.8, abs=0.05)
+        assert len(seg2) / 16000 == pytest.approx(4.4, abs=0.1)
+        # 长段静音没有被送去识别
+        assert (len(seg1) + len(seg2)) / 16000 < 8
+
+    def test_merge_short_gaps(self):
+        audio = np.concatenate([tone(2), silence(0.6), tone(2), silence(3)])
+        segments = run(VadSegmenter(EnergyVad(), max_duration=25), audio)
+        assert len(segments) == 1
+        assert len(segments[0][1]) / 16000 == pytest.approx(4.8, abs=0.1)
+
+    def test_max_duration(self):
+        audio = tone(60)
+        segments = run(VadSegmenter(EnergyVad(max_speech=25), max_duration=25), audio)
+        assert [round(start) for start, _ in segments] == [0, 25, 50]
+        assert all(len(seg) <= 25 * 16000 for _, seg in segments)
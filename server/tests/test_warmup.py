@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.asr.loaders import ParaformerLoader, RESULTS
+from src.asr.punctuation import IncrementalPunctuator
+from src.asr.recognizer import recognize
+from src.asr.warmup import warm_up
+
+
+class FakeModel:
+    """记录每次解码批大小的假模型"""
+
+    def __init__(self):
+        self.batches = []
+
+    def create_stream(self):
+        stream = SimpleNamespace(result=SimpleNamespace(tokens=[], timestamps=[]))
+        stream.accept_waveform = lambda samplerate, samples: None
+        return stream
+
+    def decode_streams(self, streams):
+        self.batches.append(len(streams))
+
+
+@pytest.mark.unit
+class TestWarmUp:
+    """测试启动预热"""
+
+    def test_warm_up(self):
+        loader = ParaformerLoader()
+        loader._model = FakeModel()
+        texts = []
+        punctuator = IncrementalPunctuator(lambda text: texts.append(text) or text)
+
+        report = warm_up(recognize, loader, None, punctuator, [1.0, 2.0], 3, 4)
+
+        assert loader._model.batches == [1] * 6 + [4] * 3
+        assert len(texts) == 6 and len(texts[-1]) == 8
+        assert set(report) == {
+            "recognize 1s",
+            "recognize 2s",
+            "punctuate 4字",
+            "punctuate 8字",
+            "batch 4",
+        }
+        assert all(item["first"] >= 0 for item in report.values())
+        # 预热任务不在识别进程中留下结果
+        assert len(RESULTS) == 0 and not punctuator._states
+
+    def test_default_single_pass(self):
+        loader = ParaformerLoader()
+        loader._model = FakeModel()
+
+        # 默认每个模型只跑一遍短句，不跑满批
+        report = warm_up(recognize, loader, None, None, [2.0])
+        assert loader._model.batches == [1]
+        assert report["recognize 2s"]["first"] == report["recognize 2s"]["steady"]
@@ -0,0 +1,71 @@
+import asyncio
+import uuid
+
+import numpy as np
+import pytest
+
+from src.asr.pool import RecognizerPool
+from src.net import ws
+from src.net.router import Router
+from src.utils import CancelSet, Cosmic
+
+from conftest import FakeWebSocket, FakeWorker
+
+
+def make_message(task_id, seconds, is_final=False):
+    return {
+        "task_id": task_id,
+        "source": "file",
+        "seg_duration": 15,
+        "seg_overlap": 2,
+        "is_final": is_final,
+        "time_start": 0.0,
+        "time_frame": 0.0,
+        "data": np.zeros(int(16000 * seconds), dtype=np.float32).tobytes(),
+    }
+
+
+@pytest.mark.unit
+class TestMessageHandler:
+    """测试消息处理与任务提交"""
+
+    def test_rejected_task_resets_cache(self, monkeypatch):
+        pool = RecognizerPool(None, CancelSet(), {"warmup_buffer_mb": 3})
+        monkeypatch.setattr(Cosmic, "pool", pool)
+        monkeypatch.setattr(Cosmic, "cancelled", pool.cancelled)
+        monkeypatch.setattr(Cosmic, "router", Router())
+        monkeypatch.setattr(Cosmic, "arena", None)
+        socket, cache = FakeWebSocket(uuid.uuid4()), ws.Cache()
+
+        async def send(task_id, chunks, seconds):
+            for i in range(chunks):
+                message = make_message(task_id, seconds, i == chunks - 1)
+                await ws.message_handler(socket, message, cache)
+
+        # 模型未就绪，A 的第三个片段超出缓存上限被拒绝
+        asyncio.run(send("A", 13, 5))
+        assert "A" in pool.cancelled and len(pool.scheduler) == 0
+        assert cache.task_id is None and not cache.chunks
+
+        pool.workers = [FakeWorker(0)]
+        asyncio.run(send("B", 5, 5))
+        tasks = []
+        while (task := pool.scheduler.pop()) is not None:
+            tasks.append(task)
+        # B 从头开始，不带 A 的音频与序号
+        assert [t.seq for t in tasks] == [0, 1]
+        assert [t.offset for t in tasks] == [0, 15]
+        assert len(tasks[0].data) == 4 * 16000 * 17
+        assert tasks[-1].is_final
+
+    def test_unpack_aggregated(self, monkeypatch):
+        monkeypatch.setattr(ws.TRACE, "enable", True)
+        cache = ws.Cache()
+        for t in (0.0, 1.0, 2.0):
+            cache.add_unpack(t, t + 0.1)
+
+        # 每个片段只记一个 unpack 阶段，时长为各条消息之和
+        ((name, start, end),) = cache.take_spans()
+        assert name == "unpack"
+        assert end == pytest.approx(2.1) and end - start == pytest.approx(0.3)
+        assert cache.spans == []